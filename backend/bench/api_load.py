@@ -0,0 +1,61 @@
+"""
+Per-endpoint latency and throughput, driving the app in-process over
+httpx's ASGI transport with a fixed number of concurrent clients. Used by
+bench.run, which starts the app and installs bench.stubs first.
+"""
+import asyncio
+import itertools
+import random
+import time
+import httpx
+from bench.report import summarize
+
+def _scenarios(item_ids: list, rng: random.Random) -> dict:
+    """name -> factory returning (method, url, kwargs) for one request."""
+    questions = itertools.count()
+    return {
+        "GET /inventory/": lambda etag: ("GET", "/inventory/", {}),
+        "GET /inventory/ (304)": lambda etag: ("GET", "/inventory/", {"headers": {"If-None-Match": etag}}),
+        "GET /orders/": lambda etag: ("GET", "/orders/?limit=100", {}),
+        "PUT /inventory/{id}": lambda etag: (
+            "PUT", f"/inventory/{rng.choice(item_ids)}", {"json": {"current_stock": rng.randint(0, 200)}},
+        ),
+        "POST /inventory/bulk": lambda etag: ("POST", "/inventory/bulk", {"json": [
+            {"item_id": rng.choice(item_ids), "delta": -rng.randint(1, 3)} for _ in range(100)
+        ]}),
+        "POST /orders/manual/{id}": lambda etag: ("POST", f"/orders/manual/{rng.choice(item_ids)}", {}),
+        # A new question each time, so every chat misses the answer cache
+        "POST /chat/": lambda etag: ("POST", "/chat/", {"json": {"message": f"status report {next(questions)}"}}),
+    }
+
+async def _drive(client: httpx.AsyncClient, make, requests: int, concurrency: int) -> dict:
+    samples, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            method, url, kwargs = make()
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            await response.aread()
+            samples.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {**summarize(samples, time.perf_counter() - started), "errors": errors}
+
+async def run_all(app, item_ids: list, requests: int = 500, concurrency: int = 16, token: str = None) -> dict:
+    rng = random.Random(7)
+    transport = httpx.ASGITransport(app=app)
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60, headers=headers) as client:
+        for name, make in _scenarios(item_ids, rng).items():
+            etag = (await client.get("/inventory/")).headers.get("etag")
+            # Chats stream ~60 fake tokens each; fewer of them keeps the suite short
+            n = max(concurrency, requests // 10) if name == "POST /chat/" else requests
+            results[name] = await _drive(client, lambda: make(etag), n, concurrency)
+    return results
@@ -0,0 +1,153 @@
+"""
+Event-loop latency during a shift-change login burst.
+
+    python -m bench.auth_burst --logins 64
+
+Fires concurrent POST /auth/login requests at the app in-process while a
+ticker measures how late the event loop wakes it, and GET /inventory/ runs
+with an already-issued token. The same burst is then replayed with bcrypt
+called directly on the loop (what the login route used to do) for contrast.
+Also times token verification with and without the token cache.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import httpx
+from bench.report import summarize
+
+PASSWORD = "shift-change-123"
+TICK_S = 0.005
+
+async def _ticker(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_S)
+        lags.append(max(0.0, time.perf_counter() - started - TICK_S))
+
+async def _with_lag(burst) -> dict:
+    lags, stop = [], asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+    await asyncio.sleep(TICK_S * 2)
+    result = await burst()
+    stop.set()
+    await ticker
+    lag = summarize(lags)
+    lag["max_ms"] = round(max(lags) * 1000, 3) if lags else 0
+    return {**result, "loop_lag": lag}
+
+async def _create_users(n: int) -> list:
+    from database import pool
+    from services.auth_service import hash_password
+    emails = [f"agent{i}@bench.test" for i in range(n)]
+    # One hash shared by every account; the burst pays for the checks, not setup
+    hashed = await hash_password(PASSWORD)
+    async with pool.write() as db:
+        await db.executemany(
+            "INSERT INTO users (email, password_hash) VALUES (?, ?) ON CONFLICT (email) DO NOTHING",
+            [(email, hashed) for email in emails],
+        )
+    return emails
+
+async def login_burst(app, logins: int = 32) -> dict:
+    import bcrypt
+    from database import pool
+    from services.auth_service import create_access_token
+
+    emails = await _create_users(logins)
+    transport = httpx.ASGITransport(app=app)
+    token = create_access_token(emails[0])
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        login_samples, read_samples, statuses = [], [], {}
+        done = asyncio.Event()
+
+        async def one_login(email):
+            started = time.perf_counter()
+            response = await client.post("/auth/login", data={"username": email, "password": PASSWORD})
+            login_samples.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        async def reader():
+            headers = {"Authorization": f"Bearer {token}"}
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/inventory/", headers=headers)
+                read_samples.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        async def pooled():
+            read_task = asyncio.create_task(reader())
+            started = time.perf_counter()
+            await asyncio.gather(*(one_login(email) for email in emails))
+            elapsed = time.perf_counter() - started
+            done.set()
+            await read_task
+            return {
+                "logins": summarize(login_samples, elapsed),
+                "statuses": {str(k): v for k, v in statuses.items()},
+                "inventory_reads": summarize(read_samples),
+            }
+
+        pool_result = await _with_lag(pooled)
+
+    async def inline():
+        # The old route: read the user, then bcrypt on the event loop
+        samples = []
+
+        async def one(email):
+            started = time.perf_counter()
+            async with pool.read() as db:
+                user = await (await db.execute("SELECT password_hash FROM users WHERE email=?", (email,))).fetchone()
+            bcrypt.checkpw(PASSWORD.encode("utf-8"), user["password_hash"].encode("utf-8"))
+            samples.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(email) for email in emails))
+        return {"logins": summarize(samples, time.perf_counter() - started)}
+
+    return {"pool": pool_result, "inline": await _with_lag(inline)}
+
+def token_verify(runs: int = 20_000) -> dict:
+    from services.auth_service import create_access_token, decode_token, token_cache
+    token = create_access_token("agent0@bench.test")
+    token_cache.clear()
+    started = time.perf_counter()
+    for _ in range(runs):
+        token_cache.clear()
+        decode_token(token)
+    uncached = (time.perf_counter() - started) / runs
+    decode_token(token)
+    started = time.perf_counter()
+    for _ in range(runs):
+        decode_token(token)
+    cached = (time.perf_counter() - started) / runs
+    return {"uncached_us": round(uncached * 1e6, 2), "cached_us": round(cached * 1e6, 2)}
+
+async def run_all(app, logins: int = 32) -> dict:
+    return {"burst": await login_burst(app, logins), "token_verify": token_verify()}
+
+async def _main(logins: int) -> dict:
+    import main
+    from bench import stubs
+    stubs.install()
+    await main.startup()
+    try:
+        return await run_all(main.app, logins)
+    finally:
+        await main.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64, help="concurrent logins in the burst")
+    args = parser.parse_args()
+    os.environ["DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench-auth-"), "inventory.db")
+    with contextlib.redirect_stdout(sys.stderr):
+        result = asyncio.run(_main(args.logins))
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Stock update throughput: per-item PUT vs POST /inventory/bulk vs NDJSON ingest.
+
+    python -m bench.bulk_ingest --updates 5000 --batch 1000
+
+Drives the app in-process over httpx's ASGI transport (startup/shutdown
+hooks included, so the reorder worker reacts to every write as it would
+in production) against a synthetic database from bench.datagen.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import httpx
+import numpy as np
+
+def _updates(rng, ids, n: int) -> list:
+    """Half absolute counts from scanners, half POS consumption deltas."""
+    items = rng.choice(ids, size=n)
+    out = []
+    for k, item_id in enumerate(items):
+        if k % 2:
+            out.append({"item_id": int(item_id), "delta": -int(rng.integers(1, 4))})
+        else:
+            out.append({"item_id": int(item_id), "current_stock": int(rng.integers(0, 200))})
+    return out
+
+async def run(updates: int, batch: int, put_updates: int) -> dict:
+    import main
+    from services import inventory_cache
+    from services.auth_service import create_access_token
+
+    await main.startup()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        headers = {"Authorization": f"Bearer {create_access_token('bench@bench.test')}"}
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            ids = [r.id for r in inventory_cache.items()]
+            rng = np.random.default_rng(7)
+            report = {}
+
+            # Per-item PUT only takes absolute stock
+            work = [u for u in _updates(rng, ids, put_updates * 2) if "current_stock" in u][:put_updates]
+            started = time.perf_counter()
+            for u in work:
+                r = await client.put(f"/inventory/{u['item_id']}", json={"current_stock": u["current_stock"]})
+                r.raise_for_status()
+            report["put"] = {"updates": len(work), "updates_per_s": round(len(work) / (time.perf_counter() - started))}
+
+            work = _updates(rng, ids, updates)
+            started = time.perf_counter()
+            applied = 0
+            for start in range(0, len(work), batch):
+                r = await client.post("/inventory/bulk", json=work[start:start + batch])
+                r.raise_for_status()
+                applied += r.json()["applied"]
+            report["bulk"] = {
+                "updates": applied, "batch": batch,
+                "updates_per_s": round(applied / (time.perf_counter() - started)),
+            }
+
+            work = _updates(rng, ids, updates)
+            body = "".join(json.dumps(u) + "\n" for u in work).encode()
+            started = time.perf_counter()
+            r = await client.post("/inventory/ingest", content=body,
+                                  headers={"Content-Type": "application/x-ndjson"})
+            r.raise_for_status()
+            applied = r.json()["applied"]
+            report["ingest"] = {"updates": applied, "updates_per_s": round(applied / (time.perf_counter() - started))}
+
+            report["bulk_vs_put"] = round(report["bulk"]["updates_per_s"] / report["put"]["updates_per_s"], 1)
+            # Let the reorder worker drain before shutting down
+            await asyncio.sleep(0.5)
+    finally:
+        await main.shutdown()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--put-updates", type=int, default=1000)
+    parser.add_argument("--lounges", type=int, default=10)
+    parser.add_argument("--skus", type=int, default=1000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bulk-bench-"), "inventory.db")
+    os.environ["DB_PATH"] = path
+    from bench.datagen import populate
+
+    with contextlib.redirect_stdout(sys.stderr):
+        populate(path, args.lounges, args.skus)
+        report = asyncio.run(run(args.updates, args.batch, args.put_updates))
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
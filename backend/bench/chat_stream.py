@@ -0,0 +1,128 @@
+"""
+/chat latency + throughput against the fake LLM server.
+
+    python -m bench.chat_stream --clients 32 --rounds 3 [--repeat]
+
+Starts bench.fake_llm_server and the app as separate uvicorn processes,
+fires concurrent chats, and reports time-to-first-token, full-response
+time, tokens/sec and how long GET / takes while chats are streaming.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _pct(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * p))] * 1000, 2)
+
+async def _wait_ready(url: str, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+async def _one_chat(client: httpx.AsyncClient, results: dict, repeat: bool):
+    # Unique questions defeat the answer cache unless --repeat is given
+    message = "what's critical?" if repeat else uuid.uuid4().hex
+    started = time.perf_counter()
+    first = None
+    tokens = 0
+    async with client.stream("POST", "/chat/", json={"message": message}) as resp:
+        if resp.status_code == 429:
+            results["rejected"] += 1
+            return
+        async for line in resp.aiter_lines():
+            if not line.startswith("data: ") or line == "data: [DONE]":
+                continue
+            if first is None:
+                first = time.perf_counter() - started
+            tokens += 1
+    results["ttft"].append(first or 0.0)
+    results["total"].append(time.perf_counter() - started)
+    results["tokens"] += tokens
+
+async def _probe(client: httpx.AsyncClient, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/")
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+
+async def run(clients: int, rounds: int, app_port: int, llm_port: int, repeat: bool = False) -> dict:
+    env = dict(os.environ,
+               GROQ_BASE_URL=f"http://127.0.0.1:{llm_port}",
+               GROQ_API_KEY="fake",
+               DB_PATH=os.path.join(tempfile.mkdtemp(), "bench.db"))
+    procs = [
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "bench.fake_llm_server:app",
+                          "--port", str(llm_port), "--log-level", "warning"], cwd=BACKEND_DIR, env=env),
+        subprocess.Popen([sys.executable, "-m", "uvicorn", "main:app",
+                          "--port", str(app_port), "--log-level", "warning"], cwd=BACKEND_DIR, env=env,
+                         stdout=subprocess.DEVNULL),
+    ]
+    try:
+        await _wait_ready(f"http://127.0.0.1:{llm_port}/stats")
+        await _wait_ready(f"http://127.0.0.1:{app_port}/")
+        results = {"ttft": [], "total": [], "tokens": 0, "rejected": 0}
+        probe_samples = []
+        limits = httpx.Limits(max_connections=clients + 4)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{app_port}", limits=limits, timeout=120) as client:
+            stop = asyncio.Event()
+            probe = asyncio.create_task(_probe(client, stop, probe_samples))
+            started = time.perf_counter()
+            for _ in range(rounds):
+                await asyncio.gather(*(_one_chat(client, results, repeat) for _ in range(clients)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await probe
+        return {
+            "clients": clients,
+            "rounds": rounds,
+            "repeat": repeat,
+            "completed": len(results["total"]),
+            "rejected": results["rejected"],
+            "ttft_p50_ms": _pct(results["ttft"], 0.50),
+            "ttft_p99_ms": _pct(results["ttft"], 0.99),
+            "total_p50_ms": _pct(results["total"], 0.50),
+            "total_p99_ms": _pct(results["total"], 0.99),
+            "chats_per_sec": round(len(results["total"]) / elapsed, 2),
+            "tokens_per_sec": round(results["tokens"] / elapsed, 1),
+            "health_p50_ms": _pct(probe_samples, 0.50),
+            "health_p99_ms": _pct(probe_samples, 0.99),
+            "health_mean_ms": round(statistics.mean(probe_samples) * 1000, 2) if probe_samples else None,
+        }
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--app-port", type=int, default=8900)
+    parser.add_argument("--llm-port", type=int, default=8901)
+    parser.add_argument("--repeat", action="store_true", help="ask the same question every time (answer cache hits)")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.clients, args.rounds, args.app_port, args.llm_port, args.repeat)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Synthetic inventory and order history for benchmarks (and seed.py).
+
+    python -m bench.datagen /tmp/bench.db --lounges 100 --skus 1000 --orders 100000
+
+Creates the schema with database.init_db, replaces every row with
+lounges x skus items (lounge-000, lounge-001, ...), leaves roughly `--low`
+of them at or below their base threshold, and adds `--orders` fulfilled
+orders and `--movements` consumption ledger rows spread over the last
+HISTORY_DAYS. SKUs are spread over SUPPLIERS suppliers with random case
+packs, minimums and lead times. Deterministic for a given seed.
+"""
+import argparse
+import asyncio
+import json
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from database import OPENING_BALANCE_SQL, USAGE_TABLES, init_db
+
+CATEGORIES = ("liquor", "beverage", "food")
+UNITS = ("bottles", "cans", "units")
+HISTORY_DAYS = 90
+ORDER_CHUNK = 100_000
+SUPPLIERS = 20
+CASE_PACKS = (1, 6, 12, 24)
+
+def supplier_name(i: int) -> str:
+    return f"supplier-{i:02d}"
+
+def _catalogue(seed: int, skus: int) -> dict:
+    """Per-SKU purchasing terms, the same in every lounge. Own generator, so the stock numbers don't shift."""
+    rng = np.random.default_rng(seed + 1)
+    packs = np.asarray(CASE_PACKS)[rng.integers(0, len(CASE_PACKS), skus)]
+    return {
+        "supplier": rng.integers(0, SUPPLIERS, skus),
+        "case_pack": packs,
+        "min_order_qty": packs * rng.integers(0, 3, skus),
+        "lead_time_hours": rng.integers(4, 73, SUPPLIERS),
+    }
+
+def lounge_name(i: int) -> str:
+    return f"lounge-{i:03d}"
+
+def _insert_items(conn, rng, lounges: int, skus: int, low: float, terms: dict):
+    conn.executemany(
+        "INSERT INTO suppliers (name, lead_time_hours) VALUES (?, ?)",
+        [(supplier_name(i), int(h)) for i, h in enumerate(terms["lead_time_hours"])],
+    )
+    for lounge in range(lounges):
+        base = rng.integers(10, 60, skus)
+        capacity = base * rng.integers(3, 6, skus)
+        below = rng.random(skus) < low
+        stock = np.where(below, rng.integers(0, base + 1), rng.integers(base + 1, capacity + 1))
+        kinds = rng.integers(0, len(CATEGORIES), skus)
+        conn.executemany(
+            """INSERT INTO inventory_items
+               (name, category, current_stock, base_threshold, max_capacity, unit, location,
+                supplier, case_pack, min_order_qty)
+               VALUES (?,?,?,?,?,?,?,?,?,?)""",
+            [
+                (f"SKU {sku:05d}", CATEGORIES[kinds[sku]], int(stock[sku]), int(base[sku]),
+                 int(capacity[sku]), UNITS[kinds[sku]], lounge_name(lounge),
+                 supplier_name(terms["supplier"][sku]), int(terms["case_pack"][sku]), int(terms["min_order_qty"][sku]))
+                for sku in range(skus)
+            ],
+        )
+
+def _insert_orders(conn, rng, orders: int):
+    items = conn.execute("SELECT id, name, location FROM inventory_items").fetchall()
+    if not items:
+        return
+    start = datetime.now(timezone.utc) - timedelta(days=HISTORY_DAYS)
+    for offset in range(0, orders, ORDER_CHUNK):
+        n = min(ORDER_CHUNK, orders - offset)
+        picks = rng.integers(0, len(items), n)
+        quantities = rng.integers(5, 150, n)
+        manual = rng.random(n) < 0.1
+        peak = rng.random(n) < 0.4
+        # Sorted so ids follow triggered_at, as they do in production
+        seconds = np.sort(rng.integers(0, HISTORY_DAYS * 86400, n))
+        fulfil = rng.integers(1800, 2 * 86400, n)
+        stamp = lambda s: (start + timedelta(seconds=int(s))).strftime("%Y-%m-%d %H:%M:%S")
+        conn.executemany(
+            """INSERT INTO restock_orders
+               (item_id, item_name, quantity_ordered, triggered_by, is_peak_hour,
+                email_sent, status, triggered_at, location, fulfilled_at)
+               VALUES (?,?,?,?,?,1,'fulfilled',?,?,?)""",
+            [
+                (items[p][0], items[p][1], int(q), "manual" if m else "auto", int(pk),
+                 stamp(s), items[p][2], stamp(s + f))
+                for p, q, m, pk, s, f in zip(picks, quantities, manual, peak, seconds, fulfil)
+            ],
+        )
+
+def _insert_consumption(conn, rng, movements: int):
+    """Consumption ledger rows spread over HISTORY_DAYS; opening balances square the stock afterwards."""
+    items = [r[0] for r in conn.execute("SELECT id FROM inventory_items")]
+    if not items:
+        return
+    start = datetime.now(timezone.utc) - timedelta(days=HISTORY_DAYS)
+    for offset in range(0, movements, ORDER_CHUNK):
+        n = min(ORDER_CHUNK, movements - offset)
+        picks = rng.integers(0, len(items), n)
+        used = rng.integers(1, 6, n)
+        seconds = np.sort(rng.integers(0, HISTORY_DAYS * 86400, n))
+        conn.executemany(
+            """INSERT INTO stock_movements (item_id, kind, delta, stock_after, source, created_at)
+               VALUES (?, 'consumption', ?, 0, 'pos', ?)""",
+            [
+                (items[p], -int(u), (start + timedelta(seconds=int(s))).strftime("%Y-%m-%d %H:%M:%S"))
+                for p, u, s in zip(picks, used, seconds)
+            ],
+        )
+
+def populate(path: str, lounges: int, skus: int, low: float = 0.2, orders: int = 0, seed: int = 7,
+             movements: int = 0) -> dict:
+    asyncio.run(init_db(path))
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("DELETE FROM inventory_items")
+        conn.execute("DELETE FROM restock_orders")
+        conn.execute("DELETE FROM notification_outbox")
+        conn.execute("DELETE FROM stock_movements")
+        conn.execute("DELETE FROM purchase_orders")
+        conn.execute("DELETE FROM suppliers")
+        # Rebuilt from the new history by the app's first backfill
+        for table in USAGE_TABLES:
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute("DELETE FROM rollup_backfills")
+        _insert_items(conn, rng, lounges, skus, low, _catalogue(seed, skus))
+        _insert_orders(conn, rng, orders)
+        _insert_consumption(conn, rng, movements)
+        conn.execute(OPENING_BALANCE_SQL)
+        conn.commit()
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return {
+        "path": path,
+        "items": lounges * skus,
+        "lounges": lounges,
+        "orders": orders,
+        "movements": movements,
+        "populate_s": round(time.perf_counter() - started, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--lounges", type=int, default=100)
+    parser.add_argument("--skus", type=int, default=1000)
+    parser.add_argument("--low", type=float, default=0.2)
+    parser.add_argument("--orders", type=int, default=0)
+    parser.add_argument("--movements", type=int, default=0, help="historical consumption ledger rows")
+    args = parser.parse_args()
+    print(json.dumps(populate(
+        args.path, args.lounges, args.skus, args.low, args.orders, movements=args.movements,
+    ), indent=2))
+
+if __name__ == "__main__":
+    main()
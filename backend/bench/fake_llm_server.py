@@ -0,0 +1,56 @@
+"""
+Local stand-in for Groq's OpenAI-compatible streaming endpoint, so /chat
+latency and throughput can be measured without network access.
+
+    uvicorn bench.fake_llm_server:app --port 8901
+    GROQ_BASE_URL=http://127.0.0.1:8901 GROQ_API_KEY=fake uvicorn main:app
+"""
+import asyncio
+import json
+import os
+import time
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+TOKENS = int(os.getenv("FAKE_LLM_TOKENS", "60"))
+TTFT_MS = float(os.getenv("FAKE_LLM_TTFT_MS", "150"))
+TOKEN_DELAY_MS = float(os.getenv("FAKE_LLM_TOKEN_DELAY_MS", "10"))
+
+app = FastAPI()
+stats = {"started": 0, "completed": 0, "cancelled": 0}
+
+def _chunk(model: str, content=None, finish_reason=None) -> str:
+    delta = {"content": content} if content is not None else {}
+    return "data: " + json.dumps({
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }) + "\n\n"
+
+@app.post("/openai/v1/chat/completions")
+async def completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake")
+    tokens = min(TOKENS, body.get("max_tokens") or TOKENS)
+
+    async def stream():
+        stats["started"] += 1
+        try:
+            await asyncio.sleep(TTFT_MS / 1000)
+            for i in range(tokens):
+                yield _chunk(model, f"tok{i} ")
+                await asyncio.sleep(TOKEN_DELAY_MS / 1000)
+            yield _chunk(model, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+            stats["completed"] += 1
+        except asyncio.CancelledError:
+            stats["cancelled"] += 1
+            raise
+
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+@app.get("/stats")
+async def get_stats():
+    return stats
@@ -0,0 +1,69 @@
+"""
+Demand forecast fit time on synthetic history.
+
+    python -m bench.forecast_fit --items 50000 --days 90
+
+Generates hourly consumption (daily + weekly seasonality, Poisson noise)
+one day at a time, so history never has to sit in memory all at once, and
+times DemandForecast.fit plus a full plan() lookup.
+"""
+import argparse
+import json
+import time
+import numpy as np
+from services.forecast import DemandForecast, HOURS_PER_WEEK, hour_of_week
+
+def synthetic_days(items: int, days: int, now_hour: int, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    base = rng.gamma(2.0, 0.5, size=items).astype(np.float32)           # units/hour per SKU
+    profile = 1 + 0.8 * np.sin(np.linspace(0, 2 * np.pi, HOURS_PER_WEEK, endpoint=False))
+    item_ids = np.repeat(np.arange(1, items + 1, dtype=np.int64), 24)
+    for day in range(days, 0, -1):
+        hours = now_hour - day * 24 + np.arange(24, dtype=np.int64)
+        lam = base[:, None] * profile[hour_of_week(hours)][None, :]
+        units = rng.poisson(lam).astype(np.float64).ravel()
+        yield item_ids, np.tile(hours, items), units
+
+def run(items: int, days: int) -> dict:
+    now_hour = int(time.time()) // 3600
+    started = time.perf_counter()
+    for _ in synthetic_days(items, days, now_hour):
+        pass
+    generated = time.perf_counter() - started
+
+    model = DemandForecast()
+    started = time.perf_counter()
+    model.fit(synthetic_days(items, days, now_hour), now_hour, history_hours=days * 24)
+    # Same generator again, so subtract its cost to isolate the fit itself
+    fit_s = time.perf_counter() - started - generated
+
+    started = time.perf_counter()
+    ids, thresholds, targets = model.plan(now_hour)
+    plan_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for item_id in range(1, 1001):
+        model.observe(item_id, 1.0, now_hour)
+    model.observe(1, 1.0, now_hour + 1)     # closes an hour for every item
+    observe_s = time.perf_counter() - started
+
+    return {
+        "items": items,
+        "days": days,
+        "hourly_cells": items * days * 24,
+        "generate_s": round(generated, 2),
+        "fit_s": round(fit_s, 2),
+        "plan_ms": round(plan_s * 1000, 1),
+        "observe_1001_ms": round(observe_s * 1000, 1),
+        "planned_items": int(ids.size),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--days", type=int, default=90)
+    args = parser.parse_args()
+    print(json.dumps(run(args.items, args.days), indent=2))
+
+if __name__ == "__main__":
+    main()
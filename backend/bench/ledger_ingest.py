@@ -0,0 +1,79 @@
+"""
+Stock ledger ingest rate and compaction time.
+
+    python -m bench.ledger_ingest --events 200000 --batch 2000
+
+Applies random POS consumption events through stock_ledger.apply_movements
+in write transactions of --batch events, checks every item's stock still
+equals the sum of its ledger rows, then ages the ledger and compacts it.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+async def run(events: int, batch: int) -> dict:
+    from database import pool
+    from services import stock_ledger
+
+    await pool.open()
+    try:
+        async with pool.read() as db:
+            ids = [r["id"] for r in await db.execute_fetchall("SELECT id FROM inventory_items")]
+        rng = np.random.default_rng(7)
+        items = rng.choice(ids, size=events)
+        units = rng.integers(1, 4, size=events)
+        movements = [(int(i), "consumption", -int(u), "pos") for i, u in zip(items, units)]
+
+        started = time.perf_counter()
+        for start in range(0, events, batch):
+            async with pool.write() as db:
+                await stock_ledger.apply_movements(db, movements[start:start + batch])
+        ingest_s = time.perf_counter() - started
+
+        async with pool.read() as db:
+            drift = await (await db.execute(
+                """SELECT COUNT(*) FROM inventory_items i
+                   WHERE i.current_stock != (SELECT SUM(delta) FROM stock_movements m WHERE m.item_id = i.id)"""
+            )).fetchone()
+
+        # Spread the ledger over the last few days so the hourly tier applies
+        async with pool.write() as db:
+            await db.execute(
+                "UPDATE stock_movements SET created_at = datetime('now', '-3 days', printf('-%d minutes', id % 4320))"
+            )
+        compaction = await stock_ledger.compact()
+    finally:
+        await pool.close()
+    return {
+        "events": events,
+        "batch": batch,
+        "events_per_s": round(events / ingest_s),
+        "items_out_of_balance": drift[0],
+        "compaction": compaction,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--batch", type=int, default=2000)
+    parser.add_argument("--lounges", type=int, default=10)
+    parser.add_argument("--skus", type=int, default=1000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="ledger-bench-"), "inventory.db")
+    os.environ["DB_PATH"] = path
+    from bench.datagen import populate
+
+    with contextlib.redirect_stdout(sys.stderr):
+        populate(path, args.lounges, args.skus)
+        report = asyncio.run(run(args.events, args.batch))
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Micro-benchmarks of the hot service paths, run against an open pool:
+the full and per-item reorder sweep, create_order and the chat system
+prompt build. Used by bench.run; each returns a bench.report.summarize dict.
+"""
+import random
+import time
+from datetime import datetime, timezone
+from bench.report import summarize
+
+async def _reset_sweep_state():
+    """Every sweep run starts from the same state: no pending orders, stale statuses."""
+    from database import pool
+    from services import inventory_cache
+    async with pool.write() as db:
+        await db.execute("DELETE FROM restock_orders WHERE status = 'pending'")
+        await db.execute("DELETE FROM notification_outbox")
+        await db.execute("UPDATE inventory_items SET status = 'ok'")
+    await inventory_cache.load()
+
+async def sweep_full(runs: int = 3) -> dict:
+    from services.inventory_service import check_and_trigger_reorders
+    now = datetime.now(timezone.utc)
+    samples = []
+    for _ in range(runs):
+        await _reset_sweep_state()
+        started = time.perf_counter()
+        report = await check_and_trigger_reorders(now=now)
+        samples.append(time.perf_counter() - started)
+    return {**summarize(samples), "orders_created": report["orders_created"], "phases_ms": report["timings_ms"]}
+
+async def sweep_items(runs: int = 50, batch: int = 100) -> dict:
+    """What the reorder worker does after a stock write: a sweep over a few ids."""
+    from services import inventory_cache
+    from services.inventory_service import check_and_trigger_reorders
+    ids = [r.id for r in inventory_cache.items()]
+    rng = random.Random(7)
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await check_and_trigger_reorders(rng.sample(ids, min(batch, len(ids))))
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+async def create_order(runs: int = 200) -> dict:
+    from services import inventory_cache
+    from services.order_service import create_order
+    ids = [r.id for r in inventory_cache.items()]
+    rng = random.Random(7)
+    samples = []
+    started_all = time.perf_counter()
+    for _ in range(runs):
+        started = time.perf_counter()
+        # Manual orders skip the pending-order dedupe, so every call inserts
+        await create_order(rng.choice(ids), triggered_by="manual")
+        samples.append(time.perf_counter() - started)
+    return summarize(samples, time.perf_counter() - started_all)
+
+async def prompt_build(runs: int = 20) -> dict:
+    from services import prompt_builder
+    samples = []
+    for _ in range(runs):
+        # Forget the cached prompt so every call measures a full build
+        prompt_builder._cached_prompt = None
+        started = time.perf_counter()
+        await prompt_builder.get_system_prompt()
+        samples.append(time.perf_counter() - started)
+    return {**summarize(samples), "prompt_tokens": prompt_builder.stats["last_prompt_tokens"]}
+
+async def run_all() -> dict:
+    return {
+        "sweep_full": await sweep_full(),
+        "sweep_items": await sweep_items(),
+        "create_order": await create_order(),
+        "prompt_build": await prompt_build(),
+    }
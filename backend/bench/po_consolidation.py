@@ -0,0 +1,92 @@
+"""
+Purchase order consolidation of 100k candidate lines.
+
+    python -m bench.po_consolidation --lounges 100 --skus 1000 --runs 3
+
+Populates lounges x skus items, all below threshold, lets one full sweep
+raise an order line for each, then consolidates them into per-supplier
+purchase orders. Reports the NumPy quantity planning on its own (fed the
+same lines as arrays) and the whole consolidation pass, which also reads
+the lines and writes the orders, assignments and notifications.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+from bench.report import summarize
+
+async def _reset(db):
+    await db.execute("UPDATE restock_orders SET purchase_order_id = NULL WHERE status = 'pending'")
+    await db.execute("DELETE FROM purchase_orders")
+    await db.execute("DELETE FROM notification_outbox")
+
+async def _run(runs: int) -> dict:
+    from database import pool
+    from services import forecast, inventory_cache, purchase_orders
+    from services.inventory_service import check_and_trigger_reorders
+
+    await pool.open()
+    try:
+        await inventory_cache.load()
+        await forecast.load()
+        sweep = await check_and_trigger_reorders()
+
+        # Planning alone, on the lines the pass would read
+        async with pool.read() as db:
+            rows = await db.execute_fetchall(purchase_orders.DUE_LINES_SQL, {
+                "hold": "+1 day", "default_lead": forecast.LEAD_TIME_HOURS,
+            })
+        lines = purchase_orders._columns(rows)
+        plan_samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            batch = purchase_orders.plan_batch(lines)
+            plan_samples.append(time.perf_counter() - started)
+
+        pass_samples, report = [], None
+        for _ in range(runs):
+            async with pool.write() as db:
+                await _reset(db)
+            started = time.perf_counter()
+            report = await purchase_orders.consolidate_once(hold_seconds=0)
+            pass_samples.append(time.perf_counter() - started)
+
+        async with pool.read() as db:
+            [unassigned] = await (await db.execute(
+                "SELECT COUNT(*) FROM restock_orders WHERE status = 'pending' AND purchase_order_id IS NULL"
+            )).fetchone()
+        return {
+            "lines": len(rows),
+            "sweep_orders": sweep["orders_created"],
+            "purchase_orders": len(batch["orders"]),
+            "units": int(batch["quantities"].sum()),
+            "unassigned_after": unassigned,
+            "plan": summarize(plan_samples),
+            "consolidate": summarize(pass_samples),
+            "last_pass": report,
+        }
+    finally:
+        await pool.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lounges", type=int, default=100)
+    parser.add_argument("--skus", type=int, default=1000)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-po-"), "inventory.db")
+    os.environ["DB_PATH"] = path
+    from bench.datagen import populate
+    with contextlib.redirect_stdout(sys.stderr):
+        # Every item below threshold, so the sweep raises one line per item
+        data = populate(path, args.lounges, args.skus, low=1.0)
+        result = asyncio.run(_run(args.runs))
+    print(json.dumps({"items": data["items"], **result}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark report helpers: latency summaries, and comparing two JSON
+reports with regression thresholds.
+
+    python -m bench.report current.json baseline.json --max-regression 0.2
+"""
+import argparse
+import json
+import statistics
+import sys
+
+# Changes smaller than this are noise whatever the ratio
+MIN_DELTA_MS = 0.5
+
+def summarize(samples_s: list, elapsed_s: float = None) -> dict:
+    """p50/p99/mean in ms for per-call durations in seconds (+ rate when timed as a batch)."""
+    ms = sorted(s * 1000 for s in samples_s)
+    if not ms:
+        return {"count": 0}
+    out = {
+        "count": len(ms),
+        "p50_ms": round(ms[len(ms) // 2], 3),
+        "p99_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.99))], 3),
+        "mean_ms": round(statistics.fmean(ms), 3),
+    }
+    if elapsed_s:
+        out["per_s"] = round(len(ms) / elapsed_s, 1)
+    return out
+
+def flatten(report: dict, prefix: str = "") -> dict:
+    """{"a": {"b_ms": 1}} -> {"a.b_ms": 1}, numbers only."""
+    flat = {}
+    for key, value in report.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def _direction(metric: str):
+    """+1 when higher is better, -1 when lower is better, None if not a performance figure."""
+    leaf = metric.rsplit(".", 1)[-1]
+    if leaf.endswith("per_s") or leaf in ("rps", "speedup"):
+        return 1
+    if leaf.endswith("_ms") or leaf.endswith("_s"):
+        return -1
+    return None
+
+def compare(current: dict, baseline: dict, max_regression: float = 0.2) -> list:
+    """Metrics that got worse than baseline by more than max_regression (a ratio)."""
+    now, before = flatten(current.get("results", current)), flatten(baseline.get("results", baseline))
+    regressions = []
+    for metric, old in before.items():
+        new = now.get(metric)
+        direction = _direction(metric)
+        if new is None or direction is None or old <= 0:
+            continue
+        if direction < 0:
+            worse = (new - old) / old
+            if metric.endswith("_ms") and new - old < MIN_DELTA_MS:
+                continue
+        else:
+            worse = (old - new) / old
+        if worse > max_regression:
+            regressions.append({"metric": metric, "baseline": old, "current": new, "change": round(worse, 3)})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("current")
+    parser.add_argument("baseline")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+    with open(args.current) as f:
+        current = json.load(f)
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.max_regression)
+    print(json.dumps(regressions, indent=2))
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark suite: synthetic data, service micro-benchmarks and in-process
+API load, written to one JSON report that can be compared between runs.
+
+    python -m bench.run --scale small --out bench-report.json
+    python -m bench.run --scale medium --baseline bench-report.json --max-regression 0.2
+
+Scales (items / historical orders): small 10^3 / 10^4, medium 10^5 / 10^5,
+large 10^6 / 10^6. Email, Twilio and Groq are replaced by bench.stubs. With
+--baseline the run exits 1 if any latency or rate regressed by more than
+--max-regression (0.2 = 20%) against that report.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+SCALES = {
+    # lounges, skus, orders
+    "small": (10, 100, 10_000),
+    "medium": (100, 1000, 100_000),
+    "large": (100, 10_000, 1_000_000),
+}
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+async def _run(requests: int, concurrency: int) -> dict:
+    import main
+    from bench import api_load, auth_burst, micro, stubs
+    from services import inventory_cache
+    from services.auth_service import create_access_token
+
+    stubs.install()
+    started = time.perf_counter()
+    await main.startup()
+    startup_s = time.perf_counter() - started
+    try:
+        results = {"startup_s": round(startup_s, 2), "micro": await micro.run_all()}
+        item_ids = [r.id for r in inventory_cache.items()]
+        token = create_access_token("bench@bench.test")
+        results["api"] = await api_load.run_all(main.app, item_ids, requests, concurrency, token)
+        results["auth"] = await auth_burst.run_all(main.app, logins=concurrency)
+    finally:
+        await main.shutdown()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--out", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier report to check for regressions")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-"), "inventory.db")
+    # Before anything imports config, so the app under test uses this file
+    os.environ["DB_PATH"] = path
+    from bench.datagen import populate
+    from bench.report import compare
+
+    lounges, skus, orders = SCALES[args.scale]
+    # Keep the app's own prints out of stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        data = populate(path, lounges, skus, orders=orders)
+        results = asyncio.run(_run(args.requests, args.concurrency))
+    results["populate_s"] = data["populate_s"]
+
+    report = {
+        "meta": {
+            "scale": args.scale,
+            "items": data["items"],
+            "orders": data["orders"],
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("scale") != args.scale:
+            print(f"warning: baseline was run at scale {baseline.get('meta', {}).get('scale')}", file=sys.stderr)
+        report["regressions"] = compare(report, baseline, args.max_regression)
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    if report.get("regressions"):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
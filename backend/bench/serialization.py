@@ -0,0 +1,109 @@
+"""
+JSON encoding of 100k-row responses: the old path (sqlite Row -> dict ->
+jsonable_encoder -> json.dumps, as FastAPI does for a returned list)
+against the row models (Row -> slotted dataclass -> orjson).
+
+    python -m bench.serialization --rows 100000 --runs 5
+
+Times and peak Python heap (tracemalloc, separate run) for GET /orders/
+sized pages and the inventory snapshot body, plus what the inventory
+cache holds per row as dicts vs InventoryItem.
+"""
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from bench.report import summarize
+
+def _fastapi_dumps(rows) -> bytes:
+    from fastapi.encoders import jsonable_encoder
+    content = jsonable_encoder([dict(r) for r in rows])
+    # starlette.responses.JSONResponse.render
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def _measure(encode, rows, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        gc.collect()
+        started = time.perf_counter()
+        body = encode(rows)
+        samples.append(time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    encode(rows)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {**summarize(samples), "peak_heap_mb": round(peak / 2**20, 1), "bytes": len(body)}
+
+def _retained(build) -> float:
+    """MB still allocated by what build() returns."""
+    gc.collect()
+    tracemalloc.start()
+    kept = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return round(size / 2**20, 1)
+
+async def _fetch(sql: str) -> list:
+    from database import pool
+    await pool.open()
+    try:
+        async with pool.read() as db:
+            return await db.execute_fetchall(sql)
+    finally:
+        await pool.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-serial-"), "inventory.db")
+    os.environ["DB_PATH"] = path
+    import orjson
+    from bench.datagen import populate
+    from models.inventory import ITEM_SELECT, InventoryItem
+    from models.orders import ORDER_SELECT, RestockOrder
+
+    lounges = max(1, args.rows // 1000)
+    with contextlib.redirect_stdout(sys.stderr):
+        populate(path, lounges, args.rows // lounges, orders=args.rows)
+        order_rows = asyncio.run(_fetch(f"SELECT {ORDER_SELECT} FROM restock_orders"))
+        item_rows = asyncio.run(_fetch(f"SELECT {ITEM_SELECT} FROM inventory_items"))
+
+    item_dicts = [dict(r) for r in item_rows]
+    items = [InventoryItem(*r) for r in item_rows]
+    report = {
+        "rows": len(order_rows),
+        "orders": {
+            "dict_jsonable_encoder_json": _measure(_fastapi_dumps, order_rows, args.runs),
+            "dataclass_orjson": _measure(lambda rows: orjson.dumps([RestockOrder(*r) for r in rows]), order_rows, args.runs),
+        },
+        # The cache holds its rows already; only encoding is per version
+        "inventory_body": {
+            "dicts_json": _measure(
+                lambda rows: json.dumps(rows, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+                item_dicts, args.runs,
+            ),
+            "dataclasses_orjson": _measure(orjson.dumps, items, args.runs),
+        },
+        "inventory_cache_mb": {
+            "dicts": _retained(lambda: {r["id"]: dict(r) for r in item_rows}),
+            "dataclasses": _retained(lambda: {r[0]: InventoryItem(*r) for r in item_rows}),
+        },
+    }
+    for old, new in ((report["orders"]["dict_jsonable_encoder_json"], report["orders"]["dataclass_orjson"]),
+                     (report["inventory_body"]["dicts_json"], report["inventory_body"]["dataclasses_orjson"])):
+        new["speedup"] = round(old["p50_ms"] / new["p50_ms"], 1)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Cold start: how long `import main` takes, which top-level imports it goes
+to, and how long a fresh uvicorn process takes to answer its first request.
+
+    python -m bench.startup --runs 5 --import-budget-ms 900 --first-request-budget-ms 2500
+
+Every run is a new interpreter against an empty database, with the email,
+Twilio and Groq settings cleared; it also checks that their SDKs (and
+bcrypt/jwt) are still unloaded once the app is imported. Exits 1 if a
+median is over its budget or one of those modules was imported.
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only imported once the integration (or login) is actually used
+LAZY_MODULES = ("twilio", "groq", "aiosmtplib", "httpx", "bcrypt", "jwt")
+UNCONFIGURED = (
+    "EMAIL_SENDER", "EMAIL_PASSWORD", "WAREHOUSE_EMAIL",
+    "TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN", "WHATSAPP_TO",
+    "GROQ_API_KEY", "GROQ_BASE_URL",
+)
+
+CHECK_LAZY = f"""
+import json, sys
+import main
+print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))
+"""
+
+def _env(db_dir: str) -> dict:
+    env = {k: v for k, v in os.environ.items() if k not in UNCONFIGURED}
+    # Set but empty, so a .env file can't fill them back in
+    env.update({k: "" for k in UNCONFIGURED}, DB_PATH=os.path.join(db_dir, "inventory.db"))
+    return env
+
+def _import_profile(env: dict) -> tuple:
+    """(total ms, {top-level module: cumulative ms}) from one -X importtime run."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True,
+    )
+    children = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or not line.split("|")[1].strip().isdigit():
+            continue
+        _, cumulative, name = line.split("|")
+        # Imports are listed after everything they pulled in, nested ones
+        # indented two more spaces; main's own imports sit one level in
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth == 1:
+            children[name.strip()] = int(cumulative) / 1000
+        elif depth == 0:
+            if name.strip() == "main":
+                return int(cumulative) / 1000, children
+            children = {}
+    raise RuntimeError("no import time reported for main")
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def _first_request(env: dict, timeout: float = 30.0) -> float:
+    """Seconds from spawning uvicorn until GET / answers."""
+    port = _free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1):
+                    return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                if proc.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with {proc.returncode}")
+                time.sleep(0.01)
+        raise RuntimeError(f"no response within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def run(runs: int, top: int) -> dict:
+    imports, first_requests, profiles = [], [], []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory(prefix="bench-startup-") as db_dir:
+            env = _env(db_dir)
+            total, modules = _import_profile(env)
+            imports.append(total)
+            profiles.append(modules)
+            first_requests.append(_first_request(env) * 1000)
+            loaded = json.loads(subprocess.run(
+                [sys.executable, "-c", CHECK_LAZY], cwd=BACKEND_DIR, env=env,
+                capture_output=True, text=True, check=True,
+            ).stdout.splitlines()[-1])
+
+    names = set().union(*profiles)
+    medians = {name: statistics.median(p.get(name, 0.0) for p in profiles) for name in names}
+    return {
+        "runs": runs,
+        "import_main_ms": round(statistics.median(imports), 1),
+        "first_request_ms": round(statistics.median(first_requests), 1),
+        "top_imports_ms": {
+            name: round(ms, 1) for name, ms in sorted(medians.items(), key=lambda kv: -kv[1])[:top]
+        },
+        "eagerly_loaded": loaded,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="top-level imports to list")
+    parser.add_argument("--import-budget-ms", type=float, help="fail if `import main` takes longer (median)")
+    parser.add_argument("--first-request-budget-ms", type=float, help="fail if the first response takes longer (median)")
+    args = parser.parse_args()
+
+    report = run(args.runs, args.top)
+    over = []
+    if args.import_budget_ms is not None and report["import_main_ms"] > args.import_budget_ms:
+        over.append(f"import main {report['import_main_ms']} ms > {args.import_budget_ms} ms")
+    if args.first_request_budget_ms is not None and report["first_request_ms"] > args.first_request_budget_ms:
+        over.append(f"first request {report['first_request_ms']} ms > {args.first_request_budget_ms} ms")
+    if report["eagerly_loaded"]:
+        over.append(f"imported at startup: {', '.join(report['eagerly_loaded'])}")
+    report["over_budget"] = over
+    print(json.dumps(report, indent=2))
+    if over:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+In-process stand-ins for the outside world, so benchmarks exercise the
+app's own code paths without SMTP, Twilio or Groq.
+"""
+import asyncio
+import httpx
+
+class FakeTransport:
+    """Notification transport that just waits as long as a real send might."""
+
+    configured = True
+
+    def __init__(self, delay_ms: float = 5):
+        self.delay_ms = delay_ms
+        self.sent = 0
+
+    async def send(self, lines: list, is_peak: bool):
+        await asyncio.sleep(self.delay_ms / 1000)
+        self.sent += 1
+
+    async def close(self):
+        pass
+
+def fake_llm_client():
+    """AsyncGroq pointed at bench.fake_llm_server over an ASGI transport."""
+    from groq import AsyncGroq
+    from bench import fake_llm_server
+    http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_llm_server.app))
+    return AsyncGroq(api_key="fake", base_url="http://fake-llm", http_client=http_client)
+
+def install() -> dict:
+    from services import llm_client, notification_service
+    transports = {"email": FakeTransport(), "whatsapp": FakeTransport()}
+    for channel, transport in transports.items():
+        notification_service.set_transport(channel, transport)
+    llm_client.set_client(fake_llm_client())
+    return transports
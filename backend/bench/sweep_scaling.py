@@ -0,0 +1,98 @@
+"""
+Full reorder sweep time from 1 to N worker processes.
+
+    python -m bench.sweep_scaling --lounges 100 --skus 1000 --max-processes 8
+
+Builds a synthetic database with bench.datagen, then times the in-process
+sweep (SWEEP_PROCESSES=1) followed by sweep_shards.run at each process
+count. Every run starts from the same state: no orders, all statuses 'ok'.
+Reports the median total plus the slowest shard's phase timings.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+async def _reset():
+    from database import pool
+    from services import inventory_cache
+    async with pool.write() as db:
+        await db.execute("DELETE FROM restock_orders")
+        await db.execute("DELETE FROM notification_outbox")
+        await db.execute("UPDATE inventory_items SET status = 'ok'")
+    await inventory_cache.load()
+
+async def run(max_processes: int, repeat: int) -> dict:
+    from database import pool
+    from services import inventory_cache, sweep_shards
+    from services.inventory_service import check_and_trigger_reorders
+
+    await pool.open()
+    await inventory_cache.load()
+    now = datetime.now(timezone.utc)
+    results = []
+    try:
+        samples = []
+        for _ in range(repeat):
+            await _reset()
+            report = await check_and_trigger_reorders(now=now)
+            samples.append(report["total_ms"])
+        results.append({
+            "mode": "inline",
+            "processes": 1,
+            "median_ms": round(statistics.median(samples), 2),
+            "orders_created": report["orders_created"],
+            "timings_ms": report["timings_ms"],
+        })
+
+        for processes in range(1, max_processes + 1):
+            await _reset()
+            await sweep_shards.run(now, processes)      # warm-up: spawns the workers
+            samples = []
+            for _ in range(repeat):
+                await _reset()
+                report = await sweep_shards.run(now, processes)
+                samples.append(report["total_ms"])
+            slowest = max(report["shards"], key=lambda s: s.get("timings_ms", {}).get("total_ms", 0))
+            results.append({
+                "mode": "sharded",
+                "processes": processes,
+                "median_ms": round(statistics.median(samples), 2),
+                "speedup": round(results[0]["median_ms"] / statistics.median(samples), 2),
+                "orders_created": report["orders_created"],
+                "slowest_shard": slowest,
+            })
+    finally:
+        sweep_shards.shutdown()
+        await pool.close()
+    return {"cpus": os.cpu_count(), "runs": results}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lounges", type=int, default=100)
+    parser.add_argument("--skus", type=int, default=1000)
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="sweep-bench-"), "inventory.db")
+    # Before anything imports config, so the pool and workers use this file
+    os.environ["DB_PATH"] = path
+    from bench.datagen import populate
+
+    # Keep the app's own prints out of the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        setup = populate(path, args.lounges, args.skus)
+        started = time.perf_counter()
+        report = asyncio.run(run(args.max_processes, args.repeat))
+    report.update(setup, bench_s=round(time.perf_counter() - started, 1))
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Usage rollup backfill and /analytics range queries over months of history.
+
+    python -m bench.usage_rollups --lounges 100 --skus 100 --orders 1000000 --movements 2000000
+
+Populates HISTORY_DAYS of fulfilled orders and consumption ledger rows,
+rebuilds the rollups with analytics.backfill (peak Python heap reported by
+tracemalloc, to show it stays flat as history grows), then times the
+analytics routes over the whole history against the raw GROUP BY scans
+of restock_orders / stock_movements they replace.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from bench.report import summarize
+
+RAW_DAILY_SQL = """
+    SELECT substr(triggered_at, 1, 10) AS day, COUNT(*), SUM(is_peak_hour)
+    FROM restock_orders WHERE triggered_at >= ? GROUP BY day
+"""
+RAW_CONSUMPTION_SQL = """
+    SELECT i.category, SUM(-m.delta) FROM stock_movements m
+    JOIN inventory_items i ON i.id = m.item_id
+    WHERE m.kind = 'consumption' AND m.created_at >= ? GROUP BY i.category
+"""
+
+async def _time(call, runs: int) -> dict:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+async def _run(runs: int, days: int) -> dict:
+    from datetime import datetime, timedelta, timezone
+    from database import pool
+    from routes import analytics as routes
+    from services import analytics
+
+    await pool.open()
+    try:
+        tracemalloc.start()
+        backfill = await analytics.backfill()
+        backfill["peak_heap_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        queries = {
+            "summary": lambda: routes.summary(since=since, until=None, location=None, category=None, group_by=None),
+            "summary_by_category": lambda: routes.summary(
+                since=since, until=None, location=None, category=None, group_by="category"),
+            "daily_series": lambda: routes.usage(
+                grain="day", since=since, until=None, item_id=None, location=None, category=None, group_by=None),
+            "daily_series_by_location": lambda: routes.usage(
+                grain="day", since=since, until=None, item_id=None, location=None, category=None, group_by="location"),
+            "hourly_series_one_lounge": lambda: routes.usage(
+                grain="hour", since=None, until=None, item_id=None, location="lounge-000", category=None, group_by=None),
+            "item_daily_series": lambda: routes.usage(
+                grain="day", since=since, until=None, item_id=1, location=None, category=None, group_by=None),
+            "top_items_7d": lambda: routes.top_items(
+                metric="units_consumed", since=None, until=None, location=None, category=None, limit=10),
+        }
+        timings = {name: await _time(call, runs) for name, call in queries.items()}
+
+        async def raw(sql):
+            async with pool.read() as db:
+                await db.execute_fetchall(sql, (since,))
+        raw_timings = {
+            "orders_per_day": await _time(lambda: raw(RAW_DAILY_SQL), max(1, runs // 10)),
+            "consumption_by_category": await _time(lambda: raw(RAW_CONSUMPTION_SQL), max(1, runs // 10)),
+        }
+        totals = (await queries["summary"]())["totals"]
+        async with pool.read() as db:
+            [orders] = await (await db.execute(
+                "SELECT COUNT(*) FROM restock_orders WHERE triggered_at >= ?", (since,)
+            )).fetchone()
+            rows = {}
+            for table in ("usage_item_hourly", "usage_item_daily", "usage_category_hourly", "usage_category_daily"):
+                [rows[table]] = await (await db.execute(f"SELECT COUNT(*) FROM {table}")).fetchone()
+        return {
+            "backfill": backfill,
+            "rollup_rows": rows,
+            # Rollups count whole days at the start of the range, the raw scan doesn't
+            "orders_in_range": {"raw": orders, "rollup": totals["orders_raised"]},
+            "rollup_queries": timings,
+            "raw_scans": raw_timings,
+        }
+    finally:
+        await pool.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lounges", type=int, default=100)
+    parser.add_argument("--skus", type=int, default=100)
+    parser.add_argument("--orders", type=int, default=1_000_000)
+    parser.add_argument("--movements", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=90, help="query range")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-rollups-"), "inventory.db")
+    os.environ["DB_PATH"] = path
+    from bench.datagen import populate
+    with contextlib.redirect_stdout(sys.stderr):
+        data = populate(path, args.lounges, args.skus, orders=args.orders, movements=args.movements)
+        result = asyncio.run(_run(args.runs, args.days))
+    print(json.dumps({**data, **result}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Threshold simulator throughput: items x scenarios x hours of the reorder
+rule for the live setting, on synthetic demand.
+
+    python -m bench.what_if --lounges 100 --skus 100 --scenarios 1000 --days 7 --budget-s 60
+
+Populates lounges x skus items with bench.datagen, then times
+services.simulator.simulate on its own (input preparation is reported
+separately). Exits 1 if the simulation takes longer than --budget-s.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+async def _items():
+    from database import pool
+    from services import simulator
+    await pool.open()
+    try:
+        return await simulator.load_items()
+    finally:
+        await pool.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lounges", type=int, default=100)
+    parser.add_argument("--skus", type=int, default=100)
+    parser.add_argument("--scenarios", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--budget-s", type=float, help="fail if the simulation takes longer")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-whatif-"), "inventory.db")
+    os.environ["DB_PATH"] = path
+    from bench.datagen import populate
+    from services import simulator
+    with contextlib.redirect_stdout(sys.stderr):
+        data = populate(path, args.lounges, args.skus)
+        items = asyncio.run(_items())
+
+    hours = args.days * 24
+    started = time.perf_counter()
+    rates, intensity = simulator.scenario_inputs(items, hours, recorded=False)
+    simulator._poisson_table()
+    prepare_s = time.perf_counter() - started
+    started = time.perf_counter()
+    [result] = simulator.simulate(items, rates, intensity, [simulator.current_setting()], args.scenarios)
+    elapsed = time.perf_counter() - started
+
+    cells = data["items"] * args.scenarios * hours
+    report = {
+        "items": data["items"],
+        "scenarios": args.scenarios,
+        "hours": hours,
+        "prepare_s": round(prepare_s, 2),
+        "simulate_s": round(elapsed, 2),
+        "item_scenario_hours_per_s": round(cells / elapsed),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "mean_stockout_probability": round(float(result["stockout_probability"].mean()), 4),
+        "orders_per_day": round(float(result["orders"].sum()) / args.days, 1),
+    }
+    if args.budget_s is not None and elapsed > args.budget_s:
+        report["over_budget"] = f"simulate {report['simulate_s']} s > {args.budget_s} s"
+    print(json.dumps(report, indent=2))
+    if "over_budget" in report:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
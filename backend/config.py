@@ -1,11 +1,68 @@
 import os
 from dotenv import load_dotenv
-load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Every setting is read here, once per process: the environment first, then
+# backend/.env, then the repository's top-level .env
+for _env in (os.path.join(BASE_DIR, ".env"), os.path.join(os.path.dirname(BASE_DIR), ".env")):
+    if os.path.exists(_env):
+        load_dotenv(_env)
 
 EMAIL_SENDER = os.getenv("EMAIL_SENDER")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 WAREHOUSE_EMAIL = os.getenv("WAREHOUSE_EMAIL")
-DB_PATH = "inventory.db"
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "465"))
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "1") == "1"
+TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
+TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+WHATSAPP_TO = os.getenv("WHATSAPP_TO")
+TWILIO_WHATSAPP_FROM = os.getenv("TWILIO_WHATSAPP_FROM", "whatsapp:+14155238886")
+# Resolved against the backend folder so every module (and seed.py) hits the
+# same file no matter which directory uvicorn was started from.
+DB_PATH = os.getenv("DB_PATH", os.path.join(BASE_DIR, "inventory.db"))
+DB_READERS = int(os.getenv("DB_READERS", "4"))
+# Stock writes trigger reorders immediately; this full sweep only reconciles
+RECONCILE_INTERVAL_SECONDS = int(os.getenv("RECONCILE_INTERVAL_SECONDS", "600"))
+# With several app processes, one holds this lease (renewed every third of
+# it) and runs the scheduled sweeps; a dead leader is replaced after it lapses
+LEADER_LEASE_SECONDS = int(os.getenv("LEADER_LEASE_SECONDS", "30"))
+# How often each process picks up inventory writes made by the others
+INVENTORY_SYNC_SECONDS = float(os.getenv("INVENTORY_SYNC_SECONDS", "1"))
+# Shared inventory change log kept for this long; a process further behind reloads
+INVENTORY_CHANGES_RETENTION_HOURS = int(os.getenv("INVENTORY_CHANGES_RETENTION_HOURS", "24"))
+# Auto order lines wait this long for others from the same supplier before
+# going out as one purchase order
+PO_HOLD_SECONDS = int(os.getenv("PO_HOLD_SECONDS", "120"))
+# Per-item hourly usage rollups older than this are dropped (daily ones are kept)
+USAGE_HOURLY_RETENTION_DAYS = int(os.getenv("USAGE_HOURLY_RETENTION_DAYS", "35"))
+# Location of items and orders created without one (the schema's default)
+DEFAULT_LOUNGE = "main"
+# CSV/JSON flight schedule (lounge, timezone, weekday, departure, pax); without
+# it the fixed PEAK_WINDOWS apply
+PEAK_SCHEDULE_PATH = os.getenv("PEAK_SCHEDULE_PATH", os.path.join(BASE_DIR, "flight_schedule.csv"))
+# Full sweeps split into one partition per location group across this many
+# worker processes; 1 keeps the sweep on the app's writer connection
+SWEEP_PROCESSES = int(os.getenv("SWEEP_PROCESSES", "1"))
+# Keep sampled stacks of full sweeps slower than this (0 disables profiling)
+PROFILE_SLOW_SWEEP_MS = float(os.getenv("PROFILE_SLOW_SWEEP_MS", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+SECRET_KEY = os.getenv("SECRET_KEY", "fallback_hackathon123")
+ACCESS_TOKEN_DAYS = int(os.getenv("ACCESS_TOKEN_DAYS", "7"))
+# bcrypt runs off the event loop on this many threads (it releases the GIL);
+# logins beyond AUTH_MAX_QUEUE waiting get a 429
+AUTH_HASH_WORKERS = int(os.getenv("AUTH_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+AUTH_MAX_QUEUE = int(os.getenv("AUTH_MAX_QUEUE", "64"))
+# Verified tokens kept so repeat requests skip the signature check
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
\ No newline at end of file
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+# Point at a local stand-in (bench/fake_llm_server.py) to run without network
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")
+CHAT_MAX_CONCURRENCY = int(os.getenv("CHAT_MAX_CONCURRENCY", "8"))
+CHAT_MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", "32"))
+CHAT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("CHAT_QUEUE_TIMEOUT_SECONDS", "15"))
+# Rough cap on the chat system prompt (~4 chars per token)
+CHAT_PROMPT_TOKEN_BUDGET = int(os.getenv("CHAT_PROMPT_TOKEN_BUDGET", "3000"))
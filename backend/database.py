@@ -1,13 +1,193 @@
+import asyncio
+import sqlite3
+import time
+from contextlib import asynccontextmanager
 import aiosqlite
-from config import DB_PATH
+from config import DB_PATH, DB_READERS
+from services import metrics
+
+# Applied to every pooled connection. WAL lets the readers run while the
+# writer commits; NORMAL sync is durable across app crashes under WAL.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",      # ~16 MB page cache per connection
+    "PRAGMA mmap_size=268435456",    # 256 MB memory-mapped reads
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# sqlite3 keeps this many prepared statements per connection, so the fixed
+# SQL strings used by routes/services are compiled once per connection.
+STATEMENT_CACHE_SIZE = 256
+
+
+class TimedConnection(aiosqlite.Connection):
+    """
+    aiosqlite connection that records every call it hands to its worker
+    thread (statements, fetches, commits) in db_statement_duration_seconds,
+    labelled by SQL verb. _execute is aiosqlite's single dispatch point.
+    """
+
+    async def _execute(self, fn, *args, **kwargs):
+        if args and isinstance(args[0], str):
+            op = args[0].split(None, 1)[0].upper()
+        else:
+            op = fn.__name__.lstrip("_")
+        started = time.perf_counter()
+        try:
+            return await super()._execute(fn, *args, **kwargs)
+        finally:
+            metrics.sql_statement_seconds.observe(time.perf_counter() - started, op)
+
+
+async def connect(path: str = DB_PATH, readonly: bool = False) -> aiosqlite.Connection:
+    db = await TimedConnection(
+        lambda: sqlite3.connect(path, cached_statements=STATEMENT_CACHE_SIZE), iter_chunk_size=64
+    )
+    db.row_factory = aiosqlite.Row
+    for pragma in PRAGMAS:
+        await db.execute(pragma)
+    if readonly:
+        await db.execute("PRAGMA query_only=ON")
+    return db
+
+
+class ConnectionPool:
+    """
+    App-lifetime SQLite connections: one writer serialized behind a lock
+    and a fixed set of readers handed out through a queue.
+    """
+
+    def __init__(self, path: str, readers: int = 4):
+        self.path = path
+        self.size = max(1, readers)
+        self._writer = None
+        self._write_lock = None
+        self._read_slots = None
+        self._readers = None
+        self._all_readers = []
+
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+
+    async def open(self):
+        if self.is_open:
+            return
+        self._writer = await connect(self.path)
+        self._write_lock = asyncio.Lock()
+        # A semaphore hands readers out first come, first served; an
+        # asyncio.Queue lets newcomers overtake tasks already waiting
+        self._read_slots = asyncio.Semaphore(self.size)
+        self._readers = []
+        for _ in range(self.size):
+            reader = await connect(self.path, readonly=True)
+            self._all_readers.append(reader)
+            self._readers.append(reader)
+
+    async def close(self):
+        if not self.is_open:
+            return
+        for reader in self._all_readers:
+            await reader.close()
+        self._all_readers = []
+        self._readers = None
+        await self._writer.close()
+        self._writer = None
+
+    @asynccontextmanager
+    async def read(self):
+        if not self.is_open:
+            raise RuntimeError("Connection pool is not open")
+        async with self._read_slots:
+            db = self._readers.pop()
+            try:
+                yield db
+            finally:
+                self._readers.append(db)
+
+    @asynccontextmanager
+    async def write(self):
+        """Exclusive writer; commits on success and rolls back on error."""
+        if not self.is_open:
+            raise RuntimeError("Connection pool is not open")
+        async with self._write_lock:
+            try:
+                # Take SQLite's write lock up front: sweep workers write from
+                # other processes, so a read-then-write must not go stale
+                if not self._writer.in_transaction:
+                    await self._writer.execute("BEGIN IMMEDIATE")
+                yield self._writer
+                await self._writer.commit()
+            except BaseException:
+                await self._writer.rollback()
+                raise
+
+
+pool = ConnectionPool(DB_PATH, DB_READERS)
+
 
 async def get_db():
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+    async with pool.read() as db:
         yield db
 
-async def init_db():
-    async with aiosqlite.connect(DB_PATH) as db:
+DEMO_ITEMS = [
+    ("Johnnie Walker Black", "liquor", 15, 20, 100, "bottles"),
+    ("Hendricks Gin", "liquor", 8, 15, 60, "bottles"),
+    ("Moet Champagne", "liquor", 4, 10, 50, "bottles"),
+    ("Absolut Vodka", "liquor", 6, 12, 80, "bottles"),
+    ("Jack Daniels", "liquor", 18, 20, 90, "bottles"),
+    ("Orange Juice", "beverage", 30, 40, 150, "cartons"),
+    ("Mineral Water", "beverage", 55, 60, 200, "bottles"),
+    ("Coca Cola", "beverage", 20, 30, 120, "cans"),
+    ("Tonic Water", "beverage", 10, 20, 80, "cans"),
+    ("Red Bull", "beverage", 5, 15, 60, "cans"),
+    ("Mixed Nuts", "food", 12, 25, 100, "units"),
+    ("Croissants", "food", 8, 20, 60, "units"),
+    ("Cheese Platter", "food", 3, 10, 30, "units"),
+    ("Fruit Basket", "food", 5, 10, 40, "units"),
+    ("Sandwich Platter", "food", 6, 15, 50, "units"),
+]
+
+# current_stock is the sum of an item's ledger rows; open the ledger for
+# items that predate it (or were seeded/imported around it)
+OPENING_BALANCE_SQL = """
+    INSERT INTO stock_movements (item_id, kind, delta, stock_after, source)
+    SELECT i.id, 'opening', i.current_stock - COALESCE(m.total, 0), i.current_stock, 'migration'
+    FROM inventory_items i
+    LEFT JOIN (
+        SELECT item_id, SUM(delta) AS total FROM stock_movements GROUP BY item_id
+    ) m ON m.item_id = i.id
+    WHERE i.current_stock != COALESCE(m.total, 0)
+"""
+
+# Counters shared by the usage_* rollup tables (services/analytics.py)
+USAGE_METRICS = (
+    "units_consumed", "units_restocked", "orders_raised", "peak_orders",
+    "orders_fulfilled", "fulfil_seconds",
+)
+
+# Hourly and daily buckets, per item and per (location, category)
+USAGE_TABLES = {
+    "usage_item_hourly": "item_id INTEGER NOT NULL, PRIMARY KEY (item_id, bucket)",
+    "usage_item_daily": "item_id INTEGER NOT NULL, PRIMARY KEY (bucket, item_id)",
+    "usage_category_hourly": "location TEXT NOT NULL, category TEXT NOT NULL, PRIMARY KEY (bucket, location, category)",
+    "usage_category_daily": "location TEXT NOT NULL, category TEXT NOT NULL, PRIMARY KEY (bucket, location, category)",
+}
+
+async def _add_column(db, table: str, column: str, definition: str):
+    """ALTER TABLE for databases created before `column` existed."""
+    columns = {r[1] for r in await db.execute_fetchall(f"PRAGMA table_info({table})")}
+    if column not in columns:
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        return True
+    return False
+
+async def init_db(path: str = DB_PATH):
+    async with aiosqlite.connect(path) as db:
+        # journal_mode is persistent, switch the file over before the pool opens
+        await db.execute("PRAGMA journal_mode=WAL")
         await db.execute("""
             CREATE TABLE IF NOT EXISTS inventory_items (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -18,6 +198,7 @@ async def init_db():
                 max_capacity INTEGER NOT NULL,
                 unit TEXT NOT NULL,
                 status TEXT DEFAULT 'ok',
+                location TEXT NOT NULL DEFAULT 'main',
                 last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
@@ -31,9 +212,169 @@ async def init_db():
                 is_peak_hour INTEGER DEFAULT 0,
                 email_sent INTEGER DEFAULT 0,
                 status TEXT DEFAULT 'pending',
-                triggered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                triggered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                location TEXT NOT NULL DEFAULT 'main'
+            )
+        """)
+        # Lounge the item is stocked in; orders copy it from their item
+        await _add_column(db, "inventory_items", "location", "TEXT NOT NULL DEFAULT 'main'")
+        await _add_column(db, "restock_orders", "location", "TEXT NOT NULL DEFAULT 'main'")
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_items_location ON inventory_items (location)"
+        )
+        # Purchasing: items without a supplier are grouped by category
+        await _add_column(db, "inventory_items", "supplier", "TEXT")
+        await _add_column(db, "inventory_items", "case_pack", "INTEGER NOT NULL DEFAULT 1")
+        await _add_column(db, "inventory_items", "min_order_qty", "INTEGER NOT NULL DEFAULT 0")
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS suppliers (
+                name TEXT PRIMARY KEY,
+                lead_time_hours INTEGER NOT NULL,
+                contact_email TEXT
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS purchase_orders (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                supplier TEXT NOT NULL,
+                status TEXT DEFAULT 'open',
+                is_peak_hour BOOLEAN DEFAULT 0,
+                line_count INTEGER NOT NULL,
+                total_units INTEGER NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # Order lines wait with a NULL purchase order until consolidated
+        if await _add_column(db, "restock_orders", "purchase_order_id", "INTEGER REFERENCES purchase_orders (id)"):
+            # 0 = raised before consolidation existed and already notified
+            await db.execute("UPDATE restock_orders SET purchase_order_id = 0 WHERE status = 'pending'")
+        await db.execute(
+            """CREATE INDEX IF NOT EXISTS idx_orders_unconsolidated
+               ON restock_orders (triggered_at) WHERE purchase_order_id IS NULL AND status = 'pending'"""
+        )
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_orders_purchase_order ON restock_orders (purchase_order_id)"
+        )
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_orders_location_triggered ON restock_orders (location, triggered_at, id)"
+        )
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS notification_outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                last_error TEXT,
+                next_attempt_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                sent_at TIMESTAMP
             )
         """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_outbox_due ON notification_outbox (status, next_attempt_at)"
+        )
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS stock_movements (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                delta INTEGER NOT NULL,
+                stock_after INTEGER NOT NULL,
+                source TEXT DEFAULT 'api',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_movements_kind_time ON stock_movements (kind, created_at)"
+        )
+        # Incremental sweeps pick up rows changed since their last run
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_items_last_updated ON inventory_items (last_updated)"
+        )
+        # When the order was fulfilled (with milliseconds), for time-to-fulfil
+        await _add_column(db, "restock_orders", "fulfilled_at", "TIMESTAMP")
+        metrics = ", ".join(f"{m} INTEGER NOT NULL DEFAULT 0" for m in USAGE_METRICS)
+        for table, keys in USAGE_TABLES.items():
+            await db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (bucket TEXT NOT NULL, {metrics}, {keys}) WITHOUT ROWID"
+            )
+        # Daily rows are keyed by day first for ranking items over a period;
+        # one item's series reads this instead
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_usage_item_daily_item ON usage_item_daily (item_id, bucket)")
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS rollup_backfills (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                finished_at TIMESTAMP,
+                movements_through INTEGER NOT NULL,
+                orders_through INTEGER NOT NULL
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS scheduler_lease (
+                name TEXT PRIMARY KEY,
+                holder TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                email TEXT NOT NULL,
+                password_hash TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # Login lookups, and one account per address
+        await db.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users (email)"
+        )
+        # Pending-order lookups (sweep anti-join, create_order) and item filters
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_orders_item_status ON restock_orders (item_id, status)"
+        )
+        await db.execute(OPENING_BALANCE_SQL)
+        # At most one pending auto order per item. Older databases may hold
+        # duplicates from overlapping sweeps; keep the first of each.
+        await db.execute("""
+            UPDATE restock_orders SET status = 'cancelled'
+            WHERE triggered_by = 'auto' AND status = 'pending' AND id NOT IN (
+                SELECT MIN(id) FROM restock_orders
+                WHERE triggered_by = 'auto' AND status = 'pending'
+                GROUP BY item_id
+            )
+        """)
+        await db.execute(
+            """CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_one_pending_auto
+               ON restock_orders (item_id) WHERE status = 'pending' AND triggered_by = 'auto'"""
+        )
+        # Order history: newest-first keyset pagination, optionally by status
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_orders_triggered ON restock_orders (triggered_at, id)"
+        )
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_orders_status_triggered ON restock_orders (status, triggered_at, id)"
+        )
+        # ...and one item's history (idx_orders_item_status can't give its order)
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS idx_orders_item_triggered ON restock_orders (item_id, triggered_at, id)"
+        )
+        # Shared change feed for the per-process inventory caches: every write
+        # to inventory_items, from any process, logs the item id here
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS inventory_changes (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                item_id INTEGER NOT NULL,
+                changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        for event, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            await db.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_inventory_changes_{event.lower()}
+                AFTER {event} ON inventory_items
+                BEGIN INSERT INTO inventory_changes (item_id) VALUES ({row}.id); END
+            """)
         await db.commit()
 
         row = await (await db.execute("SELECT COUNT(*) FROM inventory_items")).fetchone()
@@ -41,62 +382,14 @@ async def init_db():
             print(f"DB already has {row[0]} items, skipping seed.")
             return
 
-        items = [
-            ("Johnnie Walker Black", "liquor", 15, 20, 100, "bottles"),
-            ("Hendricks Gin", "liquor", 8, 15, 60, "bottles"),
-            ("Moet Champagne", "liquor", 4, 10, 50, "bottles"),
-            ("Absolut Vodka", "liquor", 6, 12, 80, "bottles"),
-            ("Jack Daniels", "liquor", 18, 20, 90, "bottles"),
-            ("Orange Juice", "beverage", 30, 40, 150, "cartons"),
-            ("Mineral Water", "beverage", 55, 60, 200, "bottles"),
-            ("Coca Cola", "beverage", 20, 30, 120, "cans"),
-            ("Tonic Water", "beverage", 10, 20, 80, "cans"),
-            ("Red Bull", "beverage", 5, 15, 60, "cans"),
-            ("Mixed Nuts", "food", 12, 25, 100, "units"),
-            ("Croissants", "food", 8, 20, 60, "units"),
-            ("Cheese Platter", "food", 3, 10, 30, "units"),
-            ("Fruit Basket", "food", 5, 10, 40, "units"),
-            ("Sandwich Platter", "food", 6, 15, 50, "units"),
-        ]
-
+        # Demo catalogue for a fresh install; seed.py / bench.datagen
+        # generate larger synthetic data sets
         await db.executemany(
             """INSERT INTO inventory_items
                (name, category, current_stock, base_threshold, max_capacity, unit)
                VALUES (?,?,?,?,?,?)""",
-            items
-        )
-        await db.commit()
-        print(f"✅ Seeded {len(items)} items successfully.")
-    async with aiosqlite.connect(DB_PATH) as db:
-        # Only seed if table is empty — won't duplicate on restart
-        row = await (await db.execute("SELECT COUNT(*) FROM inventory_items")).fetchone()
-        if row[0] > 0:
-            print("DB already seeded, skipping.")
-            return
-
-        items = [
-            ("Johnnie Walker Black", "liquor", 15, 20, 100, "bottles"),
-            ("Hendricks Gin", "liquor", 8, 15, 60, "bottles"),
-            ("Moet Champagne", "liquor", 4, 10, 50, "bottles"),
-            ("Absolut Vodka", "liquor", 6, 12, 80, "bottles"),
-            ("Jack Daniels", "liquor", 18, 20, 90, "bottles"),
-            ("Orange Juice", "beverage", 30, 40, 150, "cartons"),
-            ("Mineral Water", "beverage", 55, 60, 200, "bottles"),
-            ("Coca Cola", "beverage", 20, 30, 120, "cans"),
-            ("Tonic Water", "beverage", 10, 20, 80, "cans"),
-            ("Red Bull", "beverage", 5, 15, 60, "cans"),
-            ("Mixed Nuts", "food", 12, 25, 100, "units"),
-            ("Croissants", "food", 8, 20, 60, "units"),
-            ("Cheese Platter", "food", 3, 10, 30, "units"),
-            ("Fruit Basket", "food", 5, 10, 40, "units"),
-            ("Sandwich Platter", "food", 6, 15, 50, "units"),
-        ]
-
-        await db.executemany(
-            """INSERT INTO inventory_items 
-               (name, category, current_stock, base_threshold, max_capacity, unit) 
-               VALUES (?,?,?,?,?,?)""",
-            items
+            DEMO_ITEMS
         )
+        await db.execute(OPENING_BALANCE_SQL)
         await db.commit()
-        print(f"Seeded {len(items)} items.")
+        print(f"✅ Seeded {len(DEMO_ITEMS)} items successfully.")
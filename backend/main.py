@@ -1,27 +1,94 @@
-from fastapi import FastAPI
+import time
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from database import init_db
+from database import init_db, pool
+from services import analytics, auth_service, forecast, inventory_cache, metrics, peak_calendar, providers, purchase_orders, stream, sweep_coordinator, sweep_shards
 from routes import inventory, orders, chat, auth
+from routes import analytics as analytics_routes, metrics as metrics_routes, stream as stream_routes
 from scheduler import start_scheduler
+from services.inventory_service import start_reorder_worker, stop_reorder_worker
+from services.notification_service import start_dispatcher, stop_dispatcher
 
 app = FastAPI(title="Inventory Replenishment Agent")
 
+class RequestMetricsMiddleware:
+    """Request latency by method, route template and status; plain ASGI so streamed bodies are timed to the end."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Templates, not raw paths, keep the label set bounded
+            route = scope.get("route")
+            metrics.http_request_seconds.observe(
+                time.perf_counter() - started,
+                scope["method"], route.path if route is not None else "unmatched", status,
+            )
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=False,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
+# Added last so it wraps CORS too
+app.add_middleware(RequestMetricsMiddleware)
 
 @app.on_event("startup")
 async def startup():
     await init_db()
+    await pool.open()
+    await inventory_cache.load()
+    inventory_cache.start()
+    await forecast.load()
+    await peak_calendar.reload_if_changed()
+    forecast.start_observer()
+    stream.start()
+    await start_dispatcher()
+    purchase_orders.start()
+    start_reorder_worker()
+    # Leading also starts the usage rollup backfill (see renew_lease)
+    await sweep_coordinator.renew_lease()
     start_scheduler()
 
-app.include_router(inventory.router, prefix="/inventory")
-app.include_router(orders.router, prefix="/orders")
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_reorder_worker()
+    await inventory_cache.stop()
+    await analytics.stop()
+    await forecast.stop_observer()
+    await stream.stop()
+    await purchase_orders.stop()
+    await stop_dispatcher()
+    await sweep_coordinator.release_lease()
+    sweep_shards.shutdown()
+    await providers.close()
+    auth_service.shutdown()
+    await pool.close()
+
+app.include_router(auth.router, prefix="/auth")
+app.include_router(inventory.router, prefix="/inventory", dependencies=[Depends(auth.current_user)])
+app.include_router(orders.router, prefix="/orders", dependencies=[Depends(auth.current_user)])
+app.include_router(analytics_routes.router, prefix="/analytics", dependencies=[Depends(auth.current_user)])
 app.include_router(chat.router, prefix="/chat")
+app.include_router(metrics_routes.router, prefix="/metrics")
+app.include_router(stream_routes.router, prefix="/stream", dependencies=[Depends(auth.current_user_from_query)])
 
 @app.get("/")
 def root():
@@ -0,0 +1,51 @@
+from dataclasses import dataclass, fields
+from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from config import DEFAULT_LOUNGE
+
+# Rows are slotted dataclasses rather than dicts: about a third of the
+# memory in inventory_cache, and orjson encodes them natively, so list
+# responses go from row to JSON bytes without an intermediate dict.
+
+@dataclass(slots=True)
+class InventoryItem:
+    id: int
+    name: str
+    category: str
+    current_stock: int
+    base_threshold: int
+    max_capacity: int
+    unit: str
+    status: Optional[str]
+    location: str
+    last_updated: Optional[str]
+    supplier: Optional[str]
+    case_pack: int
+    min_order_qty: int
+
+    @classmethod
+    def from_row(cls, row) -> "InventoryItem":
+        """From a sqlite Row or dict with at least these columns, in any order."""
+        return cls(*(row[column] for column in ITEM_COLUMNS))
+
+ITEM_COLUMNS = tuple(f.name for f in fields(InventoryItem))
+# SELECT list whose rows build an item positionally: InventoryItem(*row)
+ITEM_SELECT = ", ".join(ITEM_COLUMNS)
+
+class ItemCreate(BaseModel):
+    name: str = Field(min_length=1)
+    category: str
+    current_stock: int = Field(ge=0)
+    base_threshold: int = Field(ge=0)
+    max_capacity: int = Field(gt=0)
+    unit: str
+    location: str = DEFAULT_LOUNGE
+    supplier: Optional[str] = None
+    case_pack: int = Field(1, ge=1)
+    min_order_qty: int = Field(0, ge=0)
+
+    @model_validator(mode="after")
+    def _threshold_fits(self):
+        if self.base_threshold > self.max_capacity:
+            raise ValueError("base_threshold can't exceed max_capacity")
+        return self
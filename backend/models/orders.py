@@ -0,0 +1,21 @@
+from dataclasses import dataclass, fields
+from typing import Optional
+
+@dataclass(slots=True)
+class RestockOrder:
+    id: int
+    item_id: int
+    item_name: str
+    quantity_ordered: int
+    triggered_by: str
+    is_peak_hour: int
+    email_sent: int
+    status: str
+    triggered_at: str
+    location: str
+    purchase_order_id: Optional[int]
+    fulfilled_at: Optional[str]
+
+ORDER_COLUMNS = tuple(f.name for f in fields(RestockOrder))
+# SELECT list whose rows build an order positionally: RestockOrder(*row)
+ORDER_SELECT = ", ".join(ORDER_COLUMNS)
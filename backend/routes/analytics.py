@@ -0,0 +1,226 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Response
+from database import USAGE_METRICS, pool
+from services import analytics
+from services.export_service import db_timestamp
+
+router = APIRouter()
+
+# Ranges and totals come from the usage_* rollups (services/analytics.py),
+# never from restock_orders or stock_movements directly.
+GRAINS = ("hour", "day")
+GROUPS = ("location", "category")
+DEFAULT_SPAN = {"hour": timedelta(days=2), "day": timedelta(days=90)}
+MAX_TOP = 100
+
+SUMS = ", ".join(f"SUM({m}) AS {m}" for m in USAGE_METRICS)
+
+def _totals(row) -> dict:
+    totals = {m: row[m] or 0 for m in USAGE_METRICS}
+    totals["offpeak_orders"] = totals["orders_raised"] - totals["peak_orders"]
+    totals["avg_fulfil_seconds"] = (
+        round(totals["fulfil_seconds"] / totals["orders_fulfilled"], 1) if totals["orders_fulfilled"] else None
+    )
+    return totals
+
+def _range(since: Optional[str], until: Optional[str], span: timedelta = None):
+    """
+    (since, until) as datetimes; until defaults to now, since to `span`
+    before it, or to the start of until's day without a span.
+    """
+    if until:
+        until_at = datetime.fromisoformat(db_timestamp(until, "until"))
+    else:
+        until_at = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    if since:
+        since_at = datetime.fromisoformat(db_timestamp(since, "since"))
+    elif span is None:
+        since_at = until_at.replace(hour=0, minute=0, second=0)
+    else:
+        since_at = until_at - span
+    if since_at >= until_at:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    return since_at, until_at
+
+def _hour(at: datetime) -> str:
+    return at.strftime("%Y-%m-%d %H:00:00")
+
+def _bucket_range(grain: str, since: datetime, until: datetime) -> tuple:
+    """
+    Bucket keys bounding [since, until) half-open on bucket start: from the
+    bucket holding `since` up to, not including, the first one starting at
+    or after `until`. An `until` of exactly midnight leaves that day out.
+    """
+    if grain == "hour":
+        fmt, step, floor = "%Y-%m-%d %H:00:00", timedelta(hours=1), {"minute": 0}
+    else:
+        fmt, step, floor = "%Y-%m-%d", timedelta(days=1), {"hour": 0, "minute": 0}
+    start = since.replace(**floor, second=0, microsecond=0)
+    end = until.replace(**floor, second=0, microsecond=0)
+    if end < until:
+        end += step
+    return start.strftime(fmt), end.strftime(fmt)
+
+def _segments(since: datetime, until: datetime) -> list:
+    """
+    Cover [since, until) with as few rollup rows as possible: daily buckets
+    for the whole days in the middle, hourly ones for the partial days at
+    either end. Returns (table suffix, first bucket, bucket bound) triples.
+    """
+    since = since.replace(minute=0, second=0, microsecond=0)
+    first_day = since.replace(hour=0)
+    if first_day < since:
+        first_day += timedelta(days=1)
+    last_day = until.replace(hour=0, minute=0, second=0, microsecond=0)
+    if first_day >= last_day:
+        return [("hourly", _hour(since), str(until))]
+    return [
+        ("hourly", _hour(since), _hour(first_day)),
+        ("daily", first_day.strftime("%Y-%m-%d"), last_day.strftime("%Y-%m-%d")),
+        ("hourly", _hour(last_day), str(until)),
+    ]
+
+def _filters(item_id=None, location=None, category=None):
+    clauses, params = [], []
+    if item_id is not None:
+        clauses.append("item_id = ?")
+        params.append(item_id)
+    if location is not None:
+        clauses.append("location = ?")
+        params.append(location)
+    if category is not None:
+        clauses.append("category = ?")
+        params.append(category)
+    return clauses, params
+
+def _check(value, allowed, name):
+    if value is not None and value not in allowed:
+        raise HTTPException(status_code=400, detail=f"{name} must be one of {', '.join(allowed)}")
+
+@router.get("/usage")
+async def usage(
+    grain: str = "day",
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    item_id: Optional[int] = None,
+    location: Optional[str] = None,
+    category: Optional[str] = None,
+    group_by: Optional[str] = None,
+):
+    """
+    Consumption and order activity per hour or day over [since, until),
+    for one item, or summed over lounges/categories (optionally split by
+    location or category).
+    """
+    _check(grain, GRAINS, "grain")
+    _check(group_by, GROUPS, "group_by")
+    if item_id is not None and (location or category or group_by):
+        raise HTTPException(status_code=400, detail="item_id can't be combined with location, category or group_by")
+    since_at, until_at = _range(since, until, DEFAULT_SPAN[grain])
+    scope = "item" if item_id is not None else "category"
+    suffix = "hourly" if grain == "hour" else "daily"
+
+    clauses, params = _filters(item_id, location, category)
+    clauses[:0] = ["bucket >= ?", "bucket < ?"]
+    params[:0] = list(_bucket_range(grain, since_at, until_at))
+    keys = f"bucket, {group_by}" if group_by else "bucket"
+    async with pool.read() as db:
+        rows = await db.execute_fetchall(
+            f"""SELECT {keys}, {SUMS} FROM usage_{scope}_{suffix}
+                WHERE {' AND '.join(clauses)} GROUP BY {keys} ORDER BY {keys}""",
+            params,
+        )
+    return {
+        "grain": grain,
+        "since": str(since_at),
+        "until": str(until_at),
+        "series": [
+            {"bucket": r["bucket"], **({group_by: r[group_by]} if group_by else {}), **_totals(r)}
+            for r in rows
+        ],
+    }
+
+@router.get("/summary")
+async def summary(
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    location: Optional[str] = None,
+    category: Optional[str] = None,
+    group_by: Optional[str] = None,
+):
+    """
+    Totals over [since, until), today (UTC) by default, from whole-day
+    buckets plus hourly ones for the partial days at the ends.
+    """
+    _check(group_by, GROUPS, "group_by")
+    since_at, until_at = _range(since, until)
+    clauses, params = _filters(location=location, category=category)
+    columns = ", ".join(([group_by] if group_by else []) + list(USAGE_METRICS))
+    parts, part_params = [], []
+    for suffix, lo, hi in _segments(since_at, until_at):
+        parts.append(
+            f"SELECT {columns} FROM usage_category_{suffix} WHERE "
+            + " AND ".join(["bucket >= ?", "bucket < ?", *clauses])
+        )
+        part_params.extend([lo, hi, *params])
+    grouping = f"GROUP BY {group_by} ORDER BY {group_by}" if group_by else ""
+    async with pool.read() as db:
+        rows = await db.execute_fetchall(
+            f"SELECT {group_by + ', ' if group_by else ''}{SUMS} FROM ({' UNION ALL '.join(parts)}) {grouping}",
+            part_params,
+        )
+    result = {"since": str(since_at), "until": str(until_at), "backfilling": analytics.backfilling()}
+    if group_by:
+        result["groups"] = [{group_by: r[group_by], **_totals(r)} for r in rows]
+    else:
+        result["totals"] = _totals(rows[0])
+    return result
+
+@router.get("/top")
+async def top_items(
+    metric: str = "units_consumed",
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    location: Optional[str] = None,
+    category: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=MAX_TOP),
+):
+    """Items ranked by one metric over the days covering [since, until) (default: the last 7)."""
+    _check(metric, USAGE_METRICS, "metric")
+    since_at, until_at = _range(since, until, timedelta(days=7))
+    clauses, params = _filters(location=location, category=category)
+    clauses = [f"i.{c}" for c in clauses]
+    clauses[:0] = ["u.bucket >= ?", "u.bucket < ?"]
+    params[:0] = list(_bucket_range("day", since_at, until_at))
+    async with pool.read() as db:
+        rows = await db.execute_fetchall(
+            f"""SELECT u.item_id, i.name, i.location, i.category,
+                       {", ".join(f"SUM(u.{m}) AS {m}" for m in USAGE_METRICS)}
+                FROM usage_item_daily u
+                JOIN inventory_items i ON i.id = u.item_id
+                WHERE {' AND '.join(clauses)}
+                GROUP BY u.item_id
+                ORDER BY {metric} DESC
+                LIMIT ?""",
+            (*params, limit),
+        )
+    return [
+        {"item_id": r["item_id"], "name": r["name"], "location": r["location"], "category": r["category"], **_totals(r)}
+        for r in rows
+    ]
+
+@router.get("/backfill")
+async def backfill_status():
+    """The latest rollup backfill, and whether one is running in this process."""
+    async with pool.read() as db:
+        row = await (await db.execute("SELECT * FROM rollup_backfills ORDER BY id DESC LIMIT 1")).fetchone()
+    return {"running": analytics.backfilling(), "last": dict(row) if row else None}
+
+@router.post("/backfill", status_code=202)
+async def backfill(response: Response):
+    """Rebuild every rollup from the order and stock history, in the background."""
+    if not analytics.start_backfill():
+        raise HTTPException(status_code=409, detail="A backfill is already running")
+    response.headers["Location"] = "/analytics/backfill"
+    return {"message": "Backfill started"}
@@ -1,17 +1,10 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
-import bcrypt
-import jwt
-import datetime
-import os
-import aiosqlite
-from database import get_db
-from config import DB_PATH
+from database import pool
+from services.auth_service import AuthBusy, InvalidToken, create_access_token, decode_token, hash_password, verify_password
 
 router = APIRouter()
-SECRET_KEY = os.getenv("SECRET_KEY", "fallback_hackathon123")
-ALGORITHM = "HS256"
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
@@ -19,50 +12,68 @@ class UserCreate(BaseModel):
     email: str
     password: str
 
-def verify_password(plain_password, hashed_password):
-    return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+def _credentials_error():
+    return HTTPException(
+        status_code=401, detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
-def get_password_hash(password):
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+def _claims(token: str) -> dict:
+    try:
+        return decode_token(token)
+    except InvalidToken:
+        raise _credentials_error()
 
-def create_access_token(data: dict):
-    to_encode = data.copy()
-    expire = datetime.datetime.utcnow() + datetime.timedelta(days=7)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+async def current_user(token: str = Depends(oauth2_scheme)) -> dict:
+    """Dependency for protected routes; returns the token's claims."""
+    return _claims(token)
+
+async def current_user_from_query(access_token: str = Query(None)) -> dict:
+    """Same check for EventSource, which can't send an Authorization header."""
+    if not access_token:
+        raise _credentials_error()
+    return _claims(access_token)
+
+def _busy():
+    return HTTPException(status_code=429, detail="Too many sign-ins right now, please retry", headers={"Retry-After": "1"})
 
 @router.post("/signup")
 async def signup(user: UserCreate):
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        existing_user = await (await db.execute("SELECT id FROM users WHERE email=?", (user.email,))).fetchone()
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Email already registered")
-        
-        hashed_password = get_password_hash(user.password)
-        await db.execute(
-            "INSERT INTO users (email, password_hash) VALUES (?, ?)",
+    if len(user.password.encode("utf-8")) > 72:
+        raise HTTPException(status_code=400, detail="Password is too long")
+    # Hash before taking the writer so other writes aren't held up by bcrypt
+    try:
+        hashed_password = await hash_password(user.password)
+    except AuthBusy:
+        raise _busy()
+    async with pool.write() as db:
+        inserted = await (await db.execute(
+            "INSERT INTO users (email, password_hash) VALUES (?, ?) ON CONFLICT (email) DO NOTHING RETURNING id",
             (user.email, hashed_password)
-        )
-        await db.commit()
+        )).fetchone()
+    if not inserted:
+        raise HTTPException(status_code=400, detail="Email already registered")
     return {"message": "User created successfully"}
 
 @router.post("/login")
 async def login(form_data: OAuth2PasswordRequestForm = Depends()):
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        user = await (await db.execute("SELECT * FROM users WHERE email=?", (form_data.username,))).fetchone()
-        
-        if not user or not verify_password(form_data.password, user["password_hash"]):
-            raise HTTPException(status_code=400, detail="Incorrect email or password")
-            
-        access_token = create_access_token(data={"sub": user["email"]})
-        return {
-            "access_token": access_token,
-            "token_type": "bearer",
-            "user": {
-                "id": user["id"],
-                "email": user["email"]
-            }
+    async with pool.read() as db:
+        user = await (await db.execute(
+            "SELECT id, email, password_hash FROM users WHERE email=?", (form_data.username,)
+        )).fetchone()
+    # The reader goes back before the slow hash check
+    try:
+        ok = await verify_password(form_data.password, user["password_hash"] if user else None)
+    except AuthBusy:
+        raise _busy()
+    if not ok:
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+
+    return {
+        "access_token": create_access_token(user["email"]),
+        "token_type": "bearer",
+        "user": {
+            "id": user["id"],
+            "email": user["email"]
         }
+    }
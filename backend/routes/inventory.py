@@ -1,65 +1,160 @@
-from fastapi import APIRouter, HTTPException, Body
-import aiosqlite
-import os
+import json
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Body, Request, Response
+from database import pool
+from models.inventory import ItemCreate
+from services import events, inventory_cache
+from services.export_service import db_timestamp, export_response
+from services.stock_ledger import apply_movements, apply_updates, movement_kind, record_movements
 from datetime import datetime
 
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "inventory.db")
-
 router = APIRouter()
 
+MAX_BULK_UPDATES = 10_000
+INGEST_BATCH = 1000
+# Rejected lines reported back by /ingest; the rest are only counted
+MAX_INGEST_ERRORS = 100
+
 @router.get("/")
-async def get_all():
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        rows = await db.execute_fetchall("SELECT * FROM inventory_items ORDER BY status DESC")
-        return [dict(r) for r in rows]
+async def get_all(request: Request, location: Optional[str] = None):
+    # Served from the in-memory snapshot, caught up with other processes'
+    # writes first; unchanged polls get a bodiless 304
+    await inventory_cache.sync()
+    etag = inventory_cache.etag()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=inventory_cache.body(location), media_type="application/json", headers=headers)
+
+@router.get("/export")
+async def export_inventory(
+    format: str = "ndjson",
+    gzip: bool = False,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    location: Optional[str] = None,
+):
+    """Stream inventory rows (optionally by last_updated range) as NDJSON or CSV."""
+    clauses, params = [], []
+    if location is not None:
+        clauses.append("location = ?")
+        params.append(location)
+    if since is not None:
+        clauses.append("last_updated >= ?")
+        params.append(db_timestamp(since, "since"))
+    if until is not None:
+        clauses.append("last_updated < ?")
+        params.append(db_timestamp(until, "until"))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return export_response(
+        f"SELECT * FROM inventory_items {where} ORDER BY id", params,
+        format, gzip, "inventory_items",
+    )
 
 @router.post("/")
-async def add_item(item: dict):
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "INSERT INTO inventory_items (name,category,current_stock,base_threshold,max_capacity,unit) VALUES (?,?,?,?,?,?)",
-            (item["name"], item["category"], item["current_stock"], item["base_threshold"], item["max_capacity"], item["unit"])
-        )
-        await db.commit()
+async def add_item(item: ItemCreate):
+    async with pool.write() as db:
+        row = await (await db.execute(
+            """INSERT INTO inventory_items
+               (name,category,current_stock,base_threshold,max_capacity,unit,location,supplier,case_pack,min_order_qty)
+               VALUES (?,?,?,?,?,?,?,?,?,?) RETURNING *""",
+            (item.name, item.category, item.current_stock, item.base_threshold, item.max_capacity, item.unit,
+             item.location, item.supplier, item.case_pack, item.min_order_qty)
+        )).fetchone()
+        await record_movements(db, [(row["id"], "adjustment", row["current_stock"], row["current_stock"], "api")])
+    inventory_cache.apply([row])
+    events.publish("item", [row["id"]], op="insert", deltas={row["id"]: row["current_stock"]})
     return {"message": "Item added"}
 
-@router.put("/{item_id}")
-async def update_stock(item_id: int, current_stock: int = Body(..., embed=True)):
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+def _publish_stock(rows: list, deltas: dict):
+    # One event per batch, so the reorder worker evaluates the batch once
+    if rows:
+        inventory_cache.apply(rows)
+        events.publish("item", sorted(deltas), deltas=deltas)
+
+@router.post("/bulk")
+async def bulk_update(updates: list = Body(...), source: str = "bulk"):
+    """
+    Apply a JSON array of {"item_id", "current_stock"} (absolute) or
+    {"item_id", "delta"[, "kind"]} updates in one transaction.
+    """
+    if len(updates) > MAX_BULK_UPDATES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_UPDATES} updates per request")
+    async with pool.write() as db:
+        rows, results, deltas = await apply_updates(db, updates, source)
+    _publish_stock(rows, deltas)
+    applied = sum(r["result"] == "applied" for r in results)
+    return {"applied": applied, "rejected": len(results) - applied, "results": results}
+
+@router.post("/ingest")
+async def ingest(request: Request, source: str = "pos"):
+    """
+    Streamed NDJSON, one bulk-style update per line, applied INGEST_BATCH
+    lines per transaction. Responds with applied/rejected counts and the
+    first MAX_INGEST_ERRORS rejected lines (1-based line numbers).
+    """
+    batch, errors = [], []
+    counts = {"applied": 0, "rejected": 0}
 
+    async def flush():
+        async with pool.write() as db:
+            rows, batch_results, deltas = await apply_updates(db, batch, source)
+        _publish_stock(rows, deltas)
+        for result in batch_results:
+            if result["result"] == "applied":
+                counts["applied"] += 1
+                continue
+            counts["rejected"] += 1
+            if len(errors) < MAX_INGEST_ERRORS:
+                errors.append({"line": counts["applied"] + counts["rejected"], **result})
+        batch.clear()
+
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                batch.append(json.loads(line))
+            except ValueError:
+                # Keeps its place in the results as an invalid update
+                batch.append(None)
+            if len(batch) >= INGEST_BATCH:
+                await flush()
+    if buffer.strip():
+        try:
+            batch.append(json.loads(buffer))
+        except ValueError:
+            batch.append(None)
+    if batch:
+        await flush()
+
+    return {**counts, "errors": errors}
+
+@router.put("/{item_id}")
+async def update_stock(item_id: int, current_stock: int = Body(..., embed=True, ge=0)):
+    async with pool.write() as db:
         item = await (await db.execute(
-            "SELECT * FROM inventory_items WHERE id=?", (item_id,)
+            "SELECT current_stock FROM inventory_items WHERE id=?", (item_id,)
         )).fetchone()
 
         if not item:
             raise HTTPException(status_code=404, detail="Item not found")
 
-        base = item["base_threshold"]
-
-        if current_stock <= base // 2:
-            new_status = "critical"
-        elif current_stock <= base:
-            new_status = "low"
-        else:
-            new_status = "ok"
-
-        await db.execute(
-            """UPDATE inventory_items 
-               SET current_stock = ?,
-                   status = ?,
-                   last_updated = CURRENT_TIMESTAMP
-               WHERE id = ?""",
-            (current_stock, new_status, item_id)
-        )
-        await db.commit()
+        # The write transaction already holds the lock, so the delta can't go stale
+        delta = current_stock - item["current_stock"]
+        [updated] = await apply_movements(db, [(item_id, movement_kind(delta), delta, "api")])
 
-    return {"message": "Stock updated", "new_status": new_status}
+    inventory_cache.apply([updated])
+    events.publish("item", [item_id], deltas={item_id: delta})
+    return {"message": "Stock updated", "new_status": updated["status"]}
 
 @router.delete("/{item_id}")
 async def delete_item(item_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with pool.write() as db:
         await db.execute("DELETE FROM inventory_items WHERE id=?", (item_id,))
-        await db.commit()
+    inventory_cache.remove(item_id)
+    events.publish("item", [item_id], op="delete")
     return {"message": "Deleted"}
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, Response
+from routes.auth import current_user
+from services import metrics, profiler
+
+router = APIRouter()
+
+@router.get("")
+async def scrape():
+    return Response(await metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Stack samples show code paths and arguments, so unlike the scrape
+# endpoint they need a signed-in user
+@router.get("/profiles", dependencies=[Depends(current_user)])
+def slow_tick_profiles():
+    """Folded stack samples of the last few sweeps that overran PROFILE_SLOW_SWEEP_MS."""
+    return list(profiler.captures)
@@ -1,19 +1,138 @@
-from fastapi import APIRouter, HTTPException
-import aiosqlite
-import os
-
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "inventory.db")
+import base64
+from typing import Optional
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Response
+from database import pool
+from models.orders import ORDER_SELECT, RestockOrder
+from services import analytics, events, inventory_cache
+from services.export_service import db_timestamp, export_response
+from services.stock_ledger import apply_movements
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 1000
+# Keyset pagination: continue strictly after the last row returned
+CURSOR_CLAUSE = "(triggered_at, id) < (?, ?)"
+
+def _encode_cursor(row) -> str:
+    raw = f"{row['triggered_at']}|{row['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        triggered_at, order_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return triggered_at, int(order_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _order_filters(status=None, item_id=None, triggered_by=None, is_peak_hour=None,
+                   since=None, until=None, location=None):
+    """WHERE clause + params shared by the order list and export endpoints."""
+    clauses, params = [], []
+    if status is not None:
+        clauses.append("status = ?")
+        params.append(status)
+    if item_id is not None:
+        clauses.append("item_id = ?")
+        params.append(item_id)
+    if triggered_by is not None:
+        clauses.append("triggered_by = ?")
+        params.append(triggered_by)
+    if is_peak_hour is not None:
+        clauses.append("is_peak_hour = ?")
+        params.append(int(is_peak_hour))
+    if location is not None:
+        clauses.append("location = ?")
+        params.append(location)
+    if since is not None:
+        clauses.append("triggered_at >= ?")
+        params.append(db_timestamp(since, "since"))
+    if until is not None:
+        clauses.append("triggered_at < ?")
+        params.append(db_timestamp(until, "until"))
+    return clauses, params
+
+def _page_sql(clauses: list) -> str:
+    """
+    Newest-first page of orders. Unfiltered and status, location and item_id
+    filtered pages are each read in order from an index on
+    (..., triggered_at, id), so no page sorts.
+    """
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"SELECT {ORDER_SELECT} FROM restock_orders {where} ORDER BY triggered_at DESC, id DESC LIMIT ?"
+
 @router.get("/")
-async def get_orders():
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
+async def get_orders(
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    item_id: Optional[int] = None,
+    triggered_by: Optional[str] = None,
+    is_peak_hour: Optional[bool] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    location: Optional[str] = None,
+):
+    """
+    Newest orders first, one page at a time. When more rows exist the
+    X-Next-Cursor header carries the cursor for the following page.
+    """
+    clauses, params = _order_filters(status, item_id, triggered_by, is_peak_hour, since, until, location)
+    if cursor:
+        clauses.append(CURSOR_CLAUSE)
+        params.extend(_decode_cursor(cursor))
+
+    async with pool.read() as db:
+        rows = await db.execute_fetchall(_page_sql(clauses), (*params, limit + 1))
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1])
+    # Rows go straight to JSON bytes, without dicts or jsonable_encoder
+    return Response(
+        content=orjson.dumps([RestockOrder(*r) for r in rows]), media_type="application/json", headers=headers,
+    )
+
+@router.get("/export")
+async def export_orders(
+    format: str = "ndjson",
+    gzip: bool = False,
+    status: Optional[str] = None,
+    item_id: Optional[int] = None,
+    triggered_by: Optional[str] = None,
+    is_peak_hour: Optional[bool] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    location: Optional[str] = None,
+):
+    """Stream the full (filtered) order history as NDJSON or CSV."""
+    clauses, params = _order_filters(status, item_id, triggered_by, is_peak_hour, since, until, location)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return export_response(
+        f"SELECT * FROM restock_orders {where} ORDER BY id", params,
+        format, gzip, "restock_orders",
+    )
+
+@router.get("/purchase-orders")
+async def get_purchase_orders(
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    status: Optional[str] = None,
+    supplier: Optional[str] = None,
+):
+    """Consolidated supplier orders, newest first; lines are the restock orders with that purchase_order_id."""
+    clauses, params = [], []
+    if status is not None:
+        clauses.append("status = ?")
+        params.append(status)
+    if supplier is not None:
+        clauses.append("supplier = ?")
+        params.append(supplier)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    async with pool.read() as db:
         rows = await db.execute_fetchall(
-            "SELECT * FROM restock_orders ORDER BY triggered_at DESC"
+            f"SELECT * FROM purchase_orders {where} ORDER BY id DESC LIMIT ?", (*params, limit),
         )
-        return [dict(r) for r in rows]
+    return [dict(r) for r in rows]
 
 @router.post("/manual/{item_id}")
 async def manual_order(item_id: int):
@@ -23,55 +142,39 @@ async def manual_order(item_id: int):
 
 @router.put("/{order_id}/fulfill")
 async def fulfill_order(order_id: int):
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        
-        # Get the order details first
+    async with pool.write() as db:
         order = await (await db.execute(
-            "SELECT * FROM restock_orders WHERE id=?", (order_id,)
+            """UPDATE restock_orders SET status='fulfilled', fulfilled_at=strftime('%Y-%m-%d %H:%M:%f', 'now')
+               WHERE id=? AND status = 'pending'
+               RETURNING *""",
+            (order_id,)
         )).fetchone()
-        
+
         if not order:
-            raise HTTPException(status_code=404, detail="Order not found")
-        
-        if order["status"] == "fulfilled":
-            raise HTTPException(status_code=400, detail="Order already fulfilled")
-        
-        # Mark order as fulfilled
-        await db.execute(
-            "UPDATE restock_orders SET status='fulfilled' WHERE id=?",
-            (order_id,)
-        )
-        
-        # Add the ordered quantity back to inventory
-        await db.execute(
-            """UPDATE inventory_items 
-               SET current_stock = current_stock + ?,
-                   last_updated = CURRENT_TIMESTAMP
-               WHERE id = ?""",
-            (order["quantity_ordered"], order["item_id"])
+            # Fulfilled and cancelled orders can't (re)deliver stock
+            existing = await (await db.execute(
+                "SELECT status FROM restock_orders WHERE id=?", (order_id,)
+            )).fetchone()
+            if not existing:
+                raise HTTPException(status_code=404, detail="Order not found")
+            raise HTTPException(status_code=400, detail=f"Order is {existing['status']}, only pending orders can be fulfilled")
+
+        await analytics.rollup_fulfilments(db, order_id, order_id)
+        # Add the ordered quantity back to inventory, status included
+        updated = await apply_movements(
+            db, [(order["item_id"], "restock", order["quantity_ordered"], "order")]
         )
-        
-        # Recalculate status after stock update
-        item = await (await db.execute(
-            "SELECT * FROM inventory_items WHERE id=?", (order["item_id"],)
-        )).fetchone()
-        
-        if item:
-            stock = item["current_stock"]
-            base = item["base_threshold"]
-            if stock <= base // 2:
-                new_status = "critical"
-            elif stock <= base:
-                new_status = "low"
-            else:
-                new_status = "ok"
-            
+        # The purchase order is received once its last line is
+        if order["purchase_order_id"]:
             await db.execute(
-                "UPDATE inventory_items SET status=? WHERE id=?",
-                (new_status, item["id"])
+                """UPDATE purchase_orders SET status='received'
+                   WHERE id=? AND NOT EXISTS (
+                       SELECT 1 FROM restock_orders WHERE purchase_order_id=? AND status='pending'
+                   )""",
+                (order["purchase_order_id"], order["purchase_order_id"]),
             )
-        
-        await db.commit()
-    
+
+    inventory_cache.apply(updated)
+    events.publish("order", [order_id], op="fulfill")
+    events.publish("item", [order["item_id"]], deltas={order["item_id"]: order["quantity_ordered"]})
     return {"message": "Order fulfilled and inventory updated"}
@@ -0,0 +1,23 @@
+from typing import Optional
+from fastapi import APIRouter, Header
+from fastapi.responses import StreamingResponse
+from routes.chat import SSE_HEADERS
+from services import stream
+
+router = APIRouter()
+
+@router.get("")
+async def change_stream(
+    location: Optional[str] = None,
+    since: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Server-Sent Events: a `snapshot` of items and recent orders, then a `diff`
+    with the changed rows after every write. Reconnects send Last-Event-ID
+    (or ?since=) and get only what they missed when it is still buffered.
+    """
+    return StreamingResponse(
+        stream.subscribe(location, last_event_id or since),
+        media_type="text/event-stream", headers=SSE_HEADERS,
+    )
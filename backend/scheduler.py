@@ -1,16 +1,78 @@
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from services.inventory_service import check_and_trigger_reorders
+from config import LEADER_LEASE_SECONDS, RECONCILE_INTERVAL_SECONDS
+from services import analytics, forecast, inventory_cache, metrics, peak_calendar, stock_ledger, sweep_coordinator
+
+def _count_skipped(event):
+    kind = "missed" if event.code == EVENT_JOB_MISSED else "max_instances"
+    metrics.scheduler_events.inc(event.job_id, kind)
+
+async def _compact_if_leader():
+    # Database-wide, so once per deployment rather than once per worker.
+    # A rollup backfill reads ledger rows compaction would fold away.
+    if sweep_coordinator.is_leader and not analytics.backfilling():
+        await stock_ledger.compact()
+        await analytics.prune()
+        await inventory_cache.prune()
 
 def start_scheduler():
     scheduler = AsyncIOScheduler()
     scheduler.add_job(
-        check_and_trigger_reorders,
+        sweep_coordinator.renew_lease,
         "interval",
-        seconds=60,
+        seconds=max(LEADER_LEASE_SECONDS // 3, 1),
+        id="leader_lease",
+        replace_existing=True,
+    )
+    # Stock changes are handled by the reorder worker as they happen; this
+    # low-frequency sweep only reconciles anything it missed. The
+    # coordinator skips it on non-leaders and folds overlapping runs.
+    scheduler.add_job(
+        sweep_coordinator.run_sweep,
+        "interval",
+        seconds=RECONCILE_INTERVAL_SECONDS,
         id="inventory_check",
         replace_existing=True,
-        max_instances=3,          # ← allow overlap instead of skipping
+        max_instances=1,
+        coalesce=True,
         misfire_grace_time=30     # ← if it misses by <30s, still run it
     )
+    # Peak intensity changes on 15-minute bucket boundaries — re-sweep right
+    # after so the raised thresholds apply immediately.
+    scheduler.add_job(
+        sweep_coordinator.run_sweep,
+        "cron",
+        minute="0,15,30,45",
+        second=5,
+        id="peak_boundary_check",
+        replace_existing=True,
+        coalesce=True,
+    )
+    # Picks up edits to the flight schedule file
+    scheduler.add_job(
+        peak_calendar.reload_if_changed,
+        "interval",
+        seconds=60,
+        id="peak_calendar_reload",
+        replace_existing=True,
+    )
+    # Full refit folds in anything the incremental updates missed
+    scheduler.add_job(
+        forecast.load,
+        "cron",
+        hour=3,
+        id="forecast_refit",
+        replace_existing=True,
+    )
+    # Rolls old ledger rows up once the forecast refit is done with them, and
+    # drops expired per-item hourly usage rollups and inventory change log rows
+    scheduler.add_job(
+        _compact_if_leader,
+        "cron",
+        hour=4,
+        id="ledger_compaction",
+        replace_existing=True,
+    )
+    scheduler.add_listener(_count_skipped, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
     scheduler.start()
-    print("Scheduler started — checking every 60 seconds")
\ No newline at end of file
+    print(f"Scheduler started — reconciling every {RECONCILE_INTERVAL_SECONDS} seconds")
@@ -1,21 +1,39 @@
-import asyncio, aiosqlite
+"""
+Fill the database with synthetic lounges, items and order history.
 
-items = [
-    ("Johnnie Walker Black", "liquor", 15, 20, 100, "bottles"),
-    ("Hendricks Gin", "liquor", 8, 15, 60, "bottles"),
-    ("Champagne Moet", "liquor", 5, 10, 50, "bottles"),
-    ("Orange Juice", "beverage", 30, 40, 150, "cartons"),
-    ("Mineral Water", "beverage", 50, 60, 200, "bottles"),
-    ("Mixed Nuts", "food", 20, 25, 100, "units"),
-    # ... add more
-]
+    python seed.py --lounges 10 --skus 1000 --orders 100000 [--replace]
 
-async def seed():
-    async with aiosqlite.connect("inventory.db") as db:
-        await db.executemany(
-            "INSERT INTO inventory_items (name, category, current_stock, base_threshold, max_capacity, unit) VALUES (?,?,?,?,?,?)",
-            items
-        )
-        await db.commit()
+The app seeds a small demo catalogue on first start; use this to try the
+dashboard and the API at realistic sizes. Existing data is only replaced
+with --replace.
+"""
+import argparse
+import json
+import os
+import sqlite3
+from config import DB_PATH
+from bench.datagen import populate
 
-asyncio.run(seed())
\ No newline at end of file
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lounges", type=int, default=3)
+    parser.add_argument("--skus", type=int, default=200)
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--low", type=float, default=0.2)
+    parser.add_argument("--replace", action="store_true", help="wipe existing items and orders")
+    args = parser.parse_args()
+
+    if os.path.exists(DB_PATH) and not args.replace:
+        conn = sqlite3.connect(DB_PATH)
+        try:
+            count = conn.execute("SELECT COUNT(*) FROM inventory_items").fetchone()[0]
+        except sqlite3.OperationalError:
+            count = 0
+        finally:
+            conn.close()
+        if count:
+            raise SystemExit(f"{DB_PATH} already has {count} items; pass --replace to overwrite them.")
+    print(json.dumps(populate(DB_PATH, args.lounges, args.skus, args.low, args.orders), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from config import USAGE_HOURLY_RETENTION_DAYS
+from database import USAGE_METRICS, USAGE_TABLES, pool
+
+# Pre-aggregated usage for charts and the /analytics routes. Whatever writes
+# stock_movements or restock_orders folds the rows it wrote into the usage_*
+# tables in the same transaction: they are summed per (item, hour) into
+# temp.usage_delta, which is then added onto the hourly and daily buckets,
+# per item and per (location, category). backfill() rebuilds the tables
+# from history with the same statements, one id chunk at a time.
+BACKFILL_BATCH = 10_000     # source ids per backfill transaction (~0.3 s of write lock)
+
+DELTA_TABLE_SQL = f"""
+    CREATE TEMP TABLE IF NOT EXISTS usage_delta (
+        bucket TEXT, item_id INTEGER, location TEXT, category TEXT,
+        {", ".join(f"{m} INTEGER NOT NULL DEFAULT 0" for m in USAGE_METRICS)}
+    )
+"""
+
+# Ledger rows in an id range; 'consumption' deltas are negative. The unary +
+# keeps the planner on the id range rather than idx_movements_kind_time,
+# which would walk every consumption row in the ledger.
+MOVEMENTS_DELTA_SQL = """
+    INSERT INTO temp.usage_delta (bucket, item_id, location, category, units_consumed, units_restocked)
+    SELECT strftime('%Y-%m-%d %H:00:00', m.created_at), m.item_id,
+           COALESCE(i.location, 'main'), COALESCE(i.category, 'deleted'),
+           SUM(CASE WHEN m.kind = 'consumption' THEN -m.delta ELSE 0 END),
+           SUM(CASE WHEN m.kind = 'restock' THEN m.delta ELSE 0 END)
+    FROM stock_movements m
+    LEFT JOIN inventory_items i ON i.id = m.item_id
+    WHERE m.id BETWEEN :lo AND :hi AND +m.kind IN ('consumption', 'restock')
+    GROUP BY 1, 2
+"""
+
+# Orders in an id range, in the hour they were raised
+ORDERS_DELTA_SQL = """
+    INSERT INTO temp.usage_delta (bucket, item_id, location, category, orders_raised, peak_orders)
+    SELECT strftime('%Y-%m-%d %H:00:00', o.triggered_at), o.item_id,
+           o.location, COALESCE(i.category, 'deleted'),
+           COUNT(*), SUM(o.is_peak_hour)
+    FROM restock_orders o
+    LEFT JOIN inventory_items i ON i.id = o.item_id
+    WHERE o.id BETWEEN :lo AND :hi
+    GROUP BY 1, 2
+"""
+
+# Fulfilled orders in an id range, in the hour they were fulfilled. Orders
+# fulfilled before fulfilled_at existed have no time and are left out.
+FULFILMENTS_DELTA_SQL = """
+    INSERT INTO temp.usage_delta (bucket, item_id, location, category, orders_fulfilled, fulfil_seconds)
+    SELECT strftime('%Y-%m-%d %H:00:00', o.fulfilled_at), o.item_id,
+           o.location, COALESCE(i.category, 'deleted'),
+           COUNT(*), SUM(MAX(unixepoch(o.fulfilled_at) - unixepoch(o.triggered_at), 0))
+    FROM restock_orders o
+    LEFT JOIN inventory_items i ON i.id = o.item_id
+    WHERE o.id BETWEEN :lo AND :hi AND o.fulfilled_at < :before
+    GROUP BY 1, 2
+"""
+
+def _fold_sql(table: str, keys: str, bucket: str, where: str = "", grouped: bool = True) -> str:
+    updates = ", ".join(f"{m} = {m} + excluded.{m}" for m in USAGE_METRICS)
+    metrics = ", ".join(f"SUM({m})" if grouped else m for m in USAGE_METRICS)
+    return f"""
+        INSERT INTO {table} (bucket, {keys}, {", ".join(USAGE_METRICS)})
+        SELECT {bucket}, {keys}, {metrics}
+        FROM temp.usage_delta WHERE {where or "true"}
+        {f"GROUP BY 1, {keys}" if grouped else ""}
+        ON CONFLICT (bucket, {keys}) DO UPDATE SET {updates}
+    """
+
+FOLD_SQL = (
+    # usage_delta already holds one row per (item, hour)
+    _fold_sql("usage_item_hourly", "item_id", "bucket", "item_id IS NOT NULL AND bucket >= :hourly_from", grouped=False),
+    _fold_sql("usage_item_daily", "item_id", "substr(bucket, 1, 10)", "item_id IS NOT NULL"),
+    _fold_sql("usage_category_hourly", "location, category", "bucket"),
+    _fold_sql("usage_category_daily", "location, category", "substr(bucket, 1, 10)"),
+)
+
+_backfill_task = None
+
+async def _fold(db, delta_sql: str, params: dict):
+    params = {"hourly_from": "", **params}
+    await db.execute(DELTA_TABLE_SQL)
+    await db.execute(delta_sql, params)
+    for sql in FOLD_SQL:
+        await db.execute(sql, params)
+    await db.execute("DELETE FROM temp.usage_delta")
+
+async def rollup_movements(db, lo: int, hi: int):
+    """Fold ledger rows lo..hi into the rollups; call in the transaction that wrote them."""
+    await _fold(db, MOVEMENTS_DELTA_SQL, {"lo": lo, "hi": hi})
+
+async def rollup_orders(db, lo: int, hi: int):
+    """Fold newly raised orders lo..hi into the rollups; call in the transaction that wrote them."""
+    await _fold(db, ORDERS_DELTA_SQL, {"lo": lo, "hi": hi})
+
+async def rollup_fulfilments(db, lo: int, hi: int, before: str = "9999-12-31 23:59:59"):
+    """Fold fulfilled orders lo..hi (fulfilled before `before`) into the rollups."""
+    await _fold(db, FULFILMENTS_DELTA_SQL, {"lo": lo, "hi": hi, "before": before})
+
+def _hourly_cutoff(now: datetime = None) -> str:
+    now = now or datetime.now(timezone.utc)
+    return (now - timedelta(days=USAGE_HOURLY_RETENTION_DAYS)).strftime("%Y-%m-%d %H:00:00")
+
+async def backfill(batch: int = BACKFILL_BATCH) -> dict:
+    """
+    Rebuild every rollup from stock_movements and restock_orders. Rows
+    written after it starts are folded in by their writers as usual, so the
+    app keeps running; each chunk is its own short write transaction.
+    Usage the ledger no longer holds in detail (folded into opening rows
+    after stock_ledger.RETENTION_DAYS) is not recovered.
+    """
+    started = time.perf_counter()
+    async with pool.write() as db:
+        for table in USAGE_TABLES:
+            await db.execute(f"DELETE FROM {table}")
+        movements = await (await db.execute("SELECT MIN(id), MAX(id) FROM stock_movements")).fetchone()
+        orders = await (await db.execute("SELECT MIN(id), MAX(id) FROM restock_orders")).fetchone()
+        run = await (await db.execute(
+            """INSERT INTO rollup_backfills (started_at, movements_through, orders_through)
+               VALUES (strftime('%Y-%m-%d %H:%M:%f', 'now'), ?, ?)
+               RETURNING id, started_at""",
+            (movements[1] or 0, orders[1] or 0),
+        )).fetchone()
+
+    chunks, hourly_from = 0, _hourly_cutoff()
+    for delta_sql, (lo, hi) in (
+        (MOVEMENTS_DELTA_SQL, movements), (ORDERS_DELTA_SQL, orders), (FULFILMENTS_DELTA_SQL, orders),
+    ):
+        if lo is None:
+            continue
+        for start in range(lo, hi + 1, batch):
+            # Fulfilments after the start are folded in by the fulfil route;
+            # both sides stamp milliseconds so the cutoff splits them cleanly
+            async with pool.write() as db:
+                await _fold(db, delta_sql, {
+                    "lo": start, "hi": min(start + batch - 1, hi), "before": run["started_at"],
+                    # Per-item hourly rows prune() would drop right away aren't written
+                    "hourly_from": hourly_from,
+                })
+            chunks += 1
+
+    async with pool.write() as db:
+        await db.execute("UPDATE rollup_backfills SET finished_at = CURRENT_TIMESTAMP WHERE id = ?", (run["id"],))
+    report = {"chunks": chunks, "total_ms": round((time.perf_counter() - started) * 1000, 2)}
+    print(f"Usage rollup backfill — {chunks} chunks in {report['total_ms']} ms")
+    return report
+
+def backfilling() -> bool:
+    return _backfill_task is not None and not _backfill_task.done()
+
+def start_backfill() -> bool:
+    """Run backfill() in the background; False if one is already running."""
+    global _backfill_task
+    if backfilling():
+        return False
+    _backfill_task = asyncio.create_task(backfill())
+    return True
+
+async def start():
+    """Backfill once for databases whose history predates the rollups."""
+    async with pool.read() as db:
+        done = await (await db.execute(
+            "SELECT 1 FROM rollup_backfills WHERE finished_at IS NOT NULL LIMIT 1"
+        )).fetchone()
+    if not done:
+        start_backfill()
+
+async def stop():
+    global _backfill_task
+    if _backfill_task is None:
+        return
+    # An unfinished backfill is started over on the next start()
+    _backfill_task.cancel()
+    try:
+        await _backfill_task
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        print(f"Usage rollup backfill error: {e}")
+    _backfill_task = None
+
+async def prune(now: datetime = None) -> int:
+    """Drop per-item hourly rollups past USAGE_HOURLY_RETENTION_DAYS."""
+    async with pool.write() as db:
+        cursor = await db.execute("DELETE FROM usage_item_hourly WHERE bucket < ?", (_hourly_cutoff(now),))
+        return cursor.rowcount
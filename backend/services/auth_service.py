@@ -0,0 +1,153 @@
+import asyncio
+import functools
+import heapq
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from services import metrics
+from config import (
+    SECRET_KEY, ACCESS_TOKEN_DAYS,
+    AUTH_HASH_WORKERS, AUTH_MAX_QUEUE, TOKEN_CACHE_SIZE,
+)
+
+ALGORITHM = "HS256"
+
+# bcrypt costs ~100+ ms of CPU per call. It runs on a small thread pool so
+# the event loop keeps serving other requests during a login burst.
+_executor = None
+_slots = None
+_waiting = 0
+
+class AuthBusy(Exception):
+    """More than AUTH_MAX_QUEUE hash requests are already waiting."""
+
+class InvalidToken(Exception):
+    """The token is malformed, expired, or wasn't signed with SECRET_KEY."""
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _slots
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=AUTH_HASH_WORKERS, thread_name_prefix="bcrypt")
+        _slots = asyncio.Semaphore(AUTH_HASH_WORKERS)
+    return _executor
+
+@asynccontextmanager
+async def _hash_slot():
+    global _waiting
+    executor = _get_executor()
+    if _waiting >= AUTH_MAX_QUEUE:
+        raise AuthBusy()
+    _waiting += 1
+    try:
+        await _slots.acquire()
+    finally:
+        _waiting -= 1
+    try:
+        yield executor
+    finally:
+        _slots.release()
+
+# bcrypt and jwt are imported on first use, not at startup
+def _hash(password: str) -> str:
+    import bcrypt
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+@functools.cache
+def _dummy_hash() -> str:
+    return _hash("not-a-password")
+
+def _check(password: str, hashed: str = None) -> bool:
+    # Unknown emails are checked against a dummy hash, so a miss costs the same as a wrong password
+    hashed = hashed or _dummy_hash()
+    # bcrypt only takes 72 bytes, and signup refuses anything longer
+    if len(password.encode("utf-8")) > 72:
+        return False
+    import bcrypt
+    return bcrypt.checkpw(password.encode("utf-8"), hashed.encode("utf-8"))
+
+async def hash_password(password: str) -> str:
+    async with _hash_slot() as executor:
+        return await asyncio.get_running_loop().run_in_executor(executor, _hash, password)
+
+async def verify_password(password: str, hashed: str = None) -> bool:
+    async with _hash_slot() as executor:
+        ok = await asyncio.get_running_loop().run_in_executor(executor, _check, password, hashed)
+    return ok and hashed is not None
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+def create_access_token(subject: str) -> str:
+    import jwt
+    expire = int(time.time()) + ACCESS_TOKEN_DAYS * 86400
+    return jwt.encode({"sub": subject, "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
+
+class TokenCache:
+    """
+    LRU of verified token -> claims. Entries leave at their `exp` (checked on
+    every hit, and swept from a heap on insert) or when they are the least
+    recently used at capacity, whichever comes first.
+    """
+
+    def __init__(self, maxsize: int = TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()   # token -> claims
+        self._expiries = []             # (exp, token) min-heap
+        self.hits = self.misses = 0
+
+    def get(self, token: str, now: float = None):
+        claims = self._entries.get(token)
+        if claims is None:
+            self.misses += 1
+            return None
+        if claims["exp"] <= (now or time.time()):
+            del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return claims
+
+    def put(self, token: str, claims: dict, now: float = None):
+        now = now or time.time()
+        while self._expiries and self._expiries[0][0] <= now:
+            _, expired = heapq.heappop(self._expiries)
+            claims_then = self._entries.get(expired)
+            if claims_then is not None and claims_then["exp"] <= now:
+                del self._entries[expired]
+        self._entries[token] = claims
+        self._entries.move_to_end(token)
+        heapq.heappush(self._expiries, (claims["exp"], token))
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        # Heap entries for LRU-evicted tokens would otherwise pile up
+        if len(self._expiries) > 2 * self.maxsize:
+            self._expiries = [(claims["exp"], t) for t, claims in self._entries.items()]
+            heapq.heapify(self._expiries)
+
+    def clear(self):
+        self._entries.clear()
+        self._expiries.clear()
+
+token_cache = TokenCache()
+
+metrics.Gauge(
+    "auth_token_cache_lookups", "Token cache lookups since start by result", ("result",),
+    lambda: {("hit",): token_cache.hits, ("miss",): token_cache.misses},
+)
+
+def decode_token(token: str) -> dict:
+    """Claims of a valid token; raises InvalidToken otherwise."""
+    claims = token_cache.get(token)
+    if claims is None:
+        import jwt
+        try:
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM], options={"require": ["exp", "sub"]})
+        except jwt.InvalidTokenError as e:
+            raise InvalidToken(str(e)) from e
+        token_cache.put(token, claims)
+    return claims
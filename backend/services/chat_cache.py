@@ -0,0 +1,112 @@
+import re
+import time
+from collections import OrderedDict
+
+# Answers to repeated chat questions, replayed without calling the LLM.
+# Entries are only valid for the data version they were generated against;
+# the first lookup after a stock/order change drops the whole cache.
+CACHE_TTL_SECONDS = 300
+CACHE_MAX_ENTRIES = 256
+SIMILARITY_THRESHOLD = 0.8
+
+FILLER_WORDS = {"a", "an", "the", "please", "pls", "me", "any", "right", "now", "currently", "us", "hey", "hi"}
+# The word after one of these names a specific item or lounge ("item 12",
+# "lounge A"); it is never dropped as filler and must match exactly
+ENTITY_WORDS = {"item", "lounge", "location", "sku"}
+# Words that flip or narrow a question ("not running low", "off peak",
+# "yesterday") must match exactly too, however similar the rest reads
+QUALIFIER_WORDS = {
+    "not", "no", "non", "off", "without", "never", "none", "isnt", "arent", "dont", "doesnt", "wasnt", "werent",
+    "low", "critical", "ok",
+    "today", "yesterday", "tomorrow", "this", "last", "next",
+}
+
+stats = {"hits": 0, "near_hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+
+_entries = OrderedDict()
+_version = None
+
+def normalize(question: str) -> str:
+    """'What's CRITICAL right now?' → 'whats critical'"""
+    text = question.lower().replace("'", "")
+    words = re.sub(r"[^a-z0-9]+", " ", text).split()
+    return " ".join(
+        w for i, w in enumerate(words)
+        if w not in FILLER_WORDS or (i and words[i - 1] in ENTITY_WORDS)
+    )
+
+def _entities(key: str) -> frozenset:
+    """
+    Numbers, qualifier words and the words naming an item or lounge in a
+    normalized question: near-duplicates must agree on all of them.
+    """
+    words = key.split()
+    return frozenset(
+        w for i, w in enumerate(words)
+        if any(c.isdigit() for c in w) or w in QUALIFIER_WORDS or (i and words[i - 1] in ENTITY_WORDS)
+    )
+
+def _trigrams(text: str) -> frozenset:
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def _similarity(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def _sync_version(version):
+    global _version
+    if version != _version:
+        if _entries:
+            stats["invalidations"] += 1
+        _entries.clear()
+        _version = version
+
+def lookup(question: str, version):
+    """Cached token list for this (or a near-identical) question, else None."""
+    _sync_version(version)
+    now = time.monotonic()
+    key = normalize(question)
+
+    entry = _entries.get(key)
+    if entry is not None and now - entry["created"] <= CACHE_TTL_SECONDS:
+        _entries.move_to_end(key)
+        stats["hits"] += 1
+        return entry["tokens"]
+
+    # Near-identical wording only counts when it asks about the same things
+    grams, entities = _trigrams(key), _entities(key)
+    best_key, best_score = None, SIMILARITY_THRESHOLD
+    for other_key, other in _entries.items():
+        if now - other["created"] > CACHE_TTL_SECONDS or other["entities"] != entities:
+            continue
+        score = _similarity(grams, other["grams"])
+        if score >= best_score:
+            best_key, best_score = other_key, score
+    if best_key is not None:
+        _entries.move_to_end(best_key)
+        stats["near_hits"] += 1
+        return _entries[best_key]["tokens"]
+
+    stats["misses"] += 1
+    return None
+
+def store(question: str, version, tokens: list):
+    """
+    Keep an answer generated against `version`. Skipped once the data has
+    moved on (a later lookup saw a newer version): the answer is stale, and
+    syncing back to its version would drop the newer entries.
+    """
+    if version != _version:
+        return
+    key = normalize(question)
+    if not key or not tokens:
+        return
+    _entries[key] = {
+        "tokens": list(tokens), "grams": _trigrams(key), "entities": _entities(key), "created": time.monotonic(),
+    }
+    _entries.move_to_end(key)
+    while len(_entries) > CACHE_MAX_ENTRIES:
+        _entries.popitem(last=False)
+    stats["stores"] += 1
@@ -1,25 +1,93 @@
-import os
+import asyncio
+from email.mime.text import MIMEText
+from config import EMAIL_SENDER, EMAIL_PASSWORD, WAREHOUSE_EMAIL, SMTP_HOST, SMTP_PORT, SMTP_USE_TLS
 
-EMAIL_SENDER = os.getenv("EMAIL_SENDER")
-EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
-WAREHOUSE_EMAIL = os.getenv("WAREHOUSE_EMAIL")
+def _where(line: dict) -> str:
+    location = line.get("location")
+    return f" [{location}]" if location and location != "main" else ""
 
-async def send_restock_email(item_name: str, quantity: int, is_peak: bool) -> bool:
-    if not EMAIL_SENDER or not WAREHOUSE_EMAIL:
-        print(f"[EMAIL SKIPPED] Restock: {item_name} x{quantity} {'PEAK' if is_peak else ''}")
-        return
-    try:
+def _purchase_order(line: dict) -> str:
+    if "purchase_order_id" not in line:
+        return ""
+    return f" PO #{line['purchase_order_id']} ({line['supplier']})"
+
+def format_restock_email(lines: list, is_peak: bool, sender: str = EMAIL_SENDER,
+                         recipient: str = WAREHOUSE_EMAIL) -> MIMEText:
+    """One digest mail per purchase order (or for every order raised together)."""
+    peak_tag = " PEAK HOURS - URGENT" if is_peak else ""
+    po = _purchase_order(lines[0])
+    if len(lines) == 1:
+        subject = f"Restock{po}: {lines[0]['item_name']}{peak_tag}"
+    else:
+        subject = f"Restock{po}: {len(lines)} items{peak_tag}"
+    rows = "\n".join(f"- {l['item_name']}{_where(l)}: {l['quantity']}" for l in lines)
+    body = f"Restock Order{po}{peak_tag}\n\nPriority: {'HIGH' if is_peak else 'Normal'}\n\nItems:\n{rows}"
+    msg = MIMEText(body)
+    msg["Subject"] = subject
+    msg["From"] = sender
+    msg["To"] = recipient
+    return msg
+
+class EmailTransport:
+    """
+    Keeps one authenticated SMTP session open and reuses it for every digest.
+    Server and addresses default to config's and are fixed at construction,
+    so tests can point one at a local SMTP server.
+    """
+
+    def __init__(self, hostname: str = SMTP_HOST, port: int = SMTP_PORT, use_tls: bool = SMTP_USE_TLS,
+                 username: str = EMAIL_SENDER, password: str = EMAIL_PASSWORD,
+                 sender: str = EMAIL_SENDER, recipient: str = WAREHOUSE_EMAIL):
+        self.hostname = hostname
+        self.port = port
+        self.use_tls = use_tls
+        self.username = username
+        self.password = password
+        self.sender = sender
+        self.recipient = recipient
+        self._client = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.sender and self.recipient)
+
+    async def _connect(self):
         import aiosmtplib
-        from email.mime.text import MIMEText
-        peak_tag = " PEAK HOURS - URGENT" if is_peak else ""
-        body = f"Restock Order{peak_tag}\n\nItem: {item_name}\nQuantity: {quantity}\nPriority: {'HIGH' if is_peak else 'Normal'}"
-        msg = MIMEText(body)
-        msg["Subject"] = f"Restock: {item_name}{peak_tag}"
-        msg["From"] = EMAIL_SENDER
-        msg["To"] = WAREHOUSE_EMAIL
-        await aiosmtplib.send(msg, hostname="smtp.gmail.com", port=465,
-                              username=EMAIL_SENDER, password=EMAIL_PASSWORD, use_tls=True)
-        print(f"Email sent for {item_name}")
-        return True
-    except Exception as e:
-        print(f"Email failed: {e}")
+        client = aiosmtplib.SMTP(hostname=self.hostname, port=self.port, use_tls=self.use_tls)
+        await client.connect()
+        if self.username and self.password:
+            await client.login(self.username, self.password)
+        self._client = client
+
+    async def send(self, lines: list, is_peak: bool):
+        msg = format_restock_email(lines, is_peak, self.sender, self.recipient)
+        async with self._lock:
+            # One reconnect attempt covers servers dropping idle sessions
+            for attempt in (1, 2):
+                if self._client is None or not self._client.is_connected:
+                    await self._connect()
+                try:
+                    await self._client.send_message(msg)
+                    return
+                except Exception:
+                    await self._drop()
+                    if attempt == 2:
+                        raise
+
+    async def _drop(self):
+        client, self._client = self._client, None
+        if client is not None:
+            try:
+                client.close()
+            except Exception:
+                pass
+
+    async def close(self):
+        async with self._lock:
+            if self._client is not None and self._client.is_connected:
+                try:
+                    await self._client.quit()
+                except Exception:
+                    pass
+            await self._drop()
@@ -0,0 +1,24 @@
+import asyncio
+
+# In-process change feed. Writers publish after their transaction commits;
+# every subscriber gets its own unbounded queue of event dicts:
+#   {"seq", "kind": "item"|"order", "op", "ids", "source", ...extra}
+_subscribers: list[asyncio.Queue] = []
+seq = 0
+
+def subscribe() -> asyncio.Queue:
+    queue = asyncio.Queue()
+    _subscribers.append(queue)
+    return queue
+
+def unsubscribe(queue: asyncio.Queue):
+    if queue in _subscribers:
+        _subscribers.remove(queue)
+
+def publish(kind: str, ids, op: str = "update", source: str = "api", **extra) -> dict:
+    global seq
+    seq += 1
+    event = {"seq": seq, "kind": kind, "op": op, "ids": list(ids), "source": source, **extra}
+    for queue in list(_subscribers):
+        queue.put_nowait(event)
+    return event
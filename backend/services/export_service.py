@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from database import connect
+
+EXPORT_BATCH = 500
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def db_timestamp(value: Optional[str], name: str) -> Optional[str]:
+    """
+    Normalize an ISO date/datetime to SQLite's CURRENT_TIMESTAMP format,
+    which is UTC; values with an offset are converted, naive ones are UTC.
+    """
+    if value is None:
+        return None
+    try:
+        ts = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} timestamp")
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc)
+    return ts.strftime("%Y-%m-%d %H:%M:%S")
+
+async def _row_batches(sql: str, params):
+    # Own read-only connection: a long export must not tie up a pool reader
+    db = await connect(readonly=True)
+    try:
+        cursor = await db.execute(sql, params)
+        while True:
+            rows = await cursor.fetchmany(EXPORT_BATCH)
+            if not rows:
+                break
+            yield rows
+        await cursor.close()
+    finally:
+        await db.close()
+
+async def _encode(batches, fmt: str):
+    header_sent = False
+    async for rows in batches:
+        if fmt == "ndjson":
+            yield "".join(json.dumps(dict(r), ensure_ascii=False) + "\n" for r in rows).encode("utf-8")
+            continue
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        if not header_sent:
+            writer.writerow(rows[0].keys())
+            header_sent = True
+        writer.writerows(tuple(r) for r in rows)
+        yield buf.getvalue().encode("utf-8")
+
+async def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 → gzip container
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_response(sql: str, params, fmt: str, gzip: bool, filename: str) -> StreamingResponse:
+    """
+    Stream a query as NDJSON or CSV, EXPORT_BATCH rows at a time, so memory
+    stays flat regardless of table size.
+    """
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    body = _encode(_row_batches(sql, params), fmt)
+    filename = f"{filename}.{fmt}"
+    media_type = FORMATS[fmt]
+    if gzip:
+        # Downloaded as a .gz file rather than transparently decoded
+        body = _gzip(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(body, media_type=media_type, headers=headers)
@@ -0,0 +1,265 @@
+import asyncio
+import time
+from datetime import datetime
+import numpy as np
+from database import pool
+from services import events
+
+# Per-item, per-hour-of-week consumption rates learned from stock_movements.
+# rates[i, h] is an exponentially smoothed estimate of units consumed by item
+# i during hour-of-week h (0 = Monday 00:00 UTC), one observation per week.
+HOURS_PER_WEEK = 168
+HISTORY_DAYS = 90
+ALPHA = 0.3                 # weight of the most recent week
+LEAD_TIME_HOURS = 4         # demand to cover before a delivery lands
+COVER_HOURS = 24            # demand an order should cover once it lands
+SAFETY_FACTOR = 0.25
+# Hours with consumption an item needs before its forecast replaces the base
+# threshold; a single event leaves every rate at zero
+MIN_HISTORY_HOURS = 3
+FIT_BATCH = 50_000
+
+# Unix epoch was a Thursday; shift so hour-of-week 0 is Monday 00:00
+_EPOCH_HOUR_OFFSET = 3 * 24
+
+def hour_of_week(abs_hours):
+    return (np.asarray(abs_hours) + _EPOCH_HOUR_OFFSET) % HOURS_PER_WEEK
+
+class DemandForecast:
+    def __init__(self, alpha: float = ALPHA):
+        self.alpha = alpha
+        self.item_ids = np.zeros(0, dtype=np.int64)
+        self.rates = np.zeros((0, HOURS_PER_WEEK), dtype=np.float32)
+        self.has_history = np.zeros(0, dtype=bool)
+        self.history_hours = np.zeros(0, dtype=np.int64)   # closed hours with consumption
+        self._acc = np.zeros(0, dtype=np.float32)         # units in the open hour
+        self._open_hour = None
+        self._lookup = np.full(1024, -1, dtype=np.int64)   # item_id -> row
+
+    def _rows_for(self, item_ids) -> np.ndarray:
+        """Row numbers for item ids, growing the arrays for unseen items."""
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        if item_ids.size == 0:
+            return item_ids
+        # Item ids are SQLite rowids, so a dense id -> row table stays small
+        top = int(item_ids.max())
+        if top >= len(self._lookup):
+            grown = np.full(max(top + 1, 2 * len(self._lookup)), -1, dtype=np.int64)
+            grown[:len(self._lookup)] = self._lookup
+            self._lookup = grown
+        rows = self._lookup[item_ids]
+        missing = rows < 0
+        if missing.any():
+            new = np.unique(item_ids[missing])
+            start = len(self.item_ids)
+            self._lookup[new] = np.arange(start, start + len(new))
+            self.item_ids = np.concatenate([self.item_ids, new])
+            self.rates = np.vstack([self.rates, np.zeros((len(new), HOURS_PER_WEEK), dtype=np.float32)])
+            self.has_history = np.concatenate([self.has_history, np.zeros(len(new), dtype=bool)])
+            self.history_hours = np.concatenate([self.history_hours, np.zeros(len(new), dtype=np.int64)])
+            self._acc = np.concatenate([self._acc, np.zeros(len(new), dtype=np.float32)])
+            rows = self._lookup[item_ids]
+        return rows
+
+    def row(self, item_id: int) -> int:
+        """Row number for a known item id, -1 otherwise."""
+        return int(self._lookup[item_id]) if 0 <= item_id < len(self._lookup) else -1
+
+    def known_rows(self, item_ids) -> np.ndarray:
+        """row() for an array of ids, without growing anything."""
+        item_ids = np.asarray(item_ids, dtype=np.int64)
+        rows = np.full(item_ids.shape, -1, dtype=np.int64)
+        inside = (item_ids >= 0) & (item_ids < len(self._lookup))
+        rows[inside] = self._lookup[item_ids[inside]]
+        return rows
+
+    def fit(self, batches, now_hour: int, history_hours: int = HISTORY_DAYS * 24):
+        """
+        Rebuild rates from hourly consumption batches of
+        (item_ids, abs_hours, units) arrays, where abs_hours = unix_ts // 3600.
+
+        Smoothing across weeks is a weighted sum: an observation w weeks
+        before now_hour's week weighs alpha * (1 - alpha) ** w. Each item is
+        normalized by the total weight of the weeks since its first recorded
+        consumption, so hours without consumption count as zero-demand
+        observations but weeks before the item existed don't.
+        """
+        first_hour = now_hour - history_hours
+        week_weights = self.alpha * (1 - self.alpha) ** np.arange(history_hours // HOURS_PER_WEEK + 2)
+        sums = np.zeros(self.rates.size, dtype=np.float64)
+        oldest_week = np.zeros(len(self.item_ids), dtype=np.int64)
+        self.history_hours[:] = 0
+        for item_ids, abs_hours, units in batches:
+            item_ids = np.asarray(item_ids, dtype=np.int64)
+            abs_hours = np.asarray(abs_hours, dtype=np.int64)
+            units = np.asarray(units, dtype=np.float64)
+            keep = (abs_hours >= first_hour) & (abs_hours < now_hour)
+            if not keep.all():
+                item_ids, abs_hours, units = item_ids[keep], abs_hours[keep], units[keep]
+            if not item_ids.size:
+                continue
+            rows = self._rows_for(item_ids)
+            if sums.size != self.rates.size:
+                sums = np.concatenate([sums, np.zeros(self.rates.size - sums.size)])
+                oldest_week = np.concatenate([oldest_week, np.zeros(len(self.item_ids) - len(oldest_week), dtype=np.int64)])
+            weeks_ago = (now_hour - 1 - abs_hours) // HOURS_PER_WEEK
+            flat = rows * HOURS_PER_WEEK + hour_of_week(abs_hours)
+            sums += np.bincount(flat, weights=units * week_weights[weeks_ago], minlength=sums.size)
+            np.maximum.at(oldest_week, rows, weeks_ago)
+            # Batches hold one entry per item and hour
+            self.history_hours += np.bincount(rows, minlength=len(self.item_ids))
+
+        # Sum of alpha * (1 - alpha) ** w for w = 0..oldest_week
+        norm = 1 - (1 - self.alpha) ** (oldest_week + 1)
+        self.rates = (sums.reshape(self.rates.shape) / norm[:, None]).astype(np.float32)
+        self.has_history = self.history_hours >= MIN_HISTORY_HOURS
+        self._acc[:] = 0
+        self._open_hour = now_hour
+
+    def observe(self, item_id: int, units: float, abs_hour: int):
+        """
+        Fold in consumption as it happens; closed hours update rates in place
+        and count towards MIN_HISTORY_HOURS.
+        """
+        self.observe_many([item_id], [units], abs_hour)
+
+    def observe_many(self, item_ids, units, abs_hour: int):
+        """observe() for a whole batch, growing the arrays at most once."""
+        rows = self._rows_for(item_ids)
+        if rows.size == 0:
+            return
+        self._advance(abs_hour)
+        np.add.at(self._acc, rows, np.asarray(units, dtype=np.float32))
+
+    def _advance(self, abs_hour: int):
+        if self._open_hour is None:
+            self._open_hour = abs_hour
+        # Close every hour between the open one and now, at most one week's worth
+        closing = range(self._open_hour, abs_hour)[-HOURS_PER_WEEK:]
+        for hour in closing:
+            slot = int(hour_of_week(hour))
+            self.history_hours += self._acc > 0
+            self.rates[:, slot] = self.alpha * self._acc + (1 - self.alpha) * self.rates[:, slot]
+            self._acc[:] = 0
+        if closing:
+            self.has_history = self.history_hours >= MIN_HISTORY_HOURS
+        self._open_hour = max(self._open_hour, abs_hour)
+
+    def demand(self, rows: np.ndarray, start_hour: int, hours: int) -> np.ndarray:
+        """Expected units consumed by each row over [start_hour, start_hour + hours)."""
+        slots = hour_of_week(np.arange(start_hour, start_hour + hours))
+        return self.rates[rows][:, slots].sum(axis=1)
+
+    def plan(self, now_hour: int, item_ids=None):
+        """
+        (item_ids, thresholds, targets) for items with consumption history
+        (MIN_HISTORY_HOURS closed hours of it).
+        threshold = demand over the lead time plus safety stock;
+        target    = threshold plus demand over the cover window, i.e. the
+                    stock level an order should bring the item up to.
+        """
+        rows = np.flatnonzero(self.has_history)
+        if item_ids is not None:
+            wanted = self.known_rows(np.fromiter(item_ids, dtype=np.int64))
+            rows = wanted[wanted >= 0]
+            rows = rows[self.has_history[rows]]
+        if rows.size == 0:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        lead = self.demand(rows, now_hour, LEAD_TIME_HOURS)
+        cover = self.demand(rows, now_hour + LEAD_TIME_HOURS, COVER_HOURS)
+        thresholds = np.ceil(lead * (1 + SAFETY_FACTOR)).astype(np.int64)
+        targets = thresholds + np.ceil(cover).astype(np.int64)
+        return self.item_ids[rows], thresholds, targets
+
+forecaster = DemandForecast()
+_observer_task = None
+
+def current_hour() -> int:
+    return int(time.time()) // 3600
+
+async def _history_batches(now_hour: int):
+    first_hour = now_hour - HISTORY_DAYS * 24
+    async with pool.read() as db:
+        cursor = await db.execute(
+            """SELECT item_id,
+                      CAST(strftime('%s', created_at) AS INTEGER) / 3600 AS hour,
+                      -SUM(delta) AS units
+               FROM stock_movements
+               WHERE kind = 'consumption' AND created_at >= datetime(?, 'unixepoch')
+               GROUP BY item_id, hour""",
+            (first_hour * 3600,),
+        )
+        batches = []
+        while True:
+            rows = await cursor.fetchmany(FIT_BATCH)
+            if not rows:
+                break
+            arr = np.asarray([tuple(r) for r in rows], dtype=np.float64)
+            batches.append((arr[:, 0].astype(np.int64), arr[:, 1].astype(np.int64), arr[:, 2]))
+        await cursor.close()
+    return batches
+
+async def load():
+    """Fit from the last HISTORY_DAYS of recorded consumption."""
+    now_hour = current_hour()
+    batches = await _history_batches(now_hour)
+    fresh = DemandForecast()
+    await asyncio.to_thread(fresh.fit, batches, now_hour)
+    global forecaster
+    forecaster = fresh
+    print(f"Demand forecast fitted for {int(fresh.has_history.sum())} items")
+
+async def _observer():
+    queue = events.subscribe()
+    try:
+        while True:
+            event = await queue.get()
+            if event["kind"] != "item" or not event.get("deltas"):
+                continue
+            consumed = [(item_id, -delta) for item_id, delta in event["deltas"].items() if delta < 0]
+            if consumed:
+                item_ids, units = zip(*consumed)
+                forecaster.observe_many(item_ids, units, current_hour())
+    finally:
+        events.unsubscribe(queue)
+
+def start_observer():
+    global _observer_task
+    if _observer_task is None:
+        _observer_task = asyncio.create_task(_observer())
+
+async def stop_observer():
+    global _observer_task
+    if _observer_task is None:
+        return
+    _observer_task.cancel()
+    try:
+        await _observer_task
+    except asyncio.CancelledError:
+        pass
+    _observer_task = None
+
+def demand_over(item_ids, hours, start_hour: int = None) -> np.ndarray:
+    """
+    Expected units each item consumes over its own number of hours from
+    start_hour (default: the current hour); 0 for items without history.
+    """
+    start_hour = current_hour() if start_hour is None else start_hour
+    hours = np.minimum(np.asarray(hours, dtype=np.int64), HOURS_PER_WEEK)
+    rows = forecaster.known_rows(item_ids)
+    out = np.zeros(len(rows), dtype=np.float64)
+    valid = rows >= 0
+    valid[valid] = forecaster.has_history[rows[valid]]
+    valid &= hours > 0
+    # Few distinct lead times in practice, so one vectorized pass per value
+    for h in np.unique(hours[valid]):
+        selected = valid & (hours == h)
+        out[selected] = forecaster.demand(rows[selected], start_hour, int(h))
+    return out
+
+def thresholds_for(item_ids=None, now: datetime = None):
+    """Rows for the sweep's forecast table: (item_id, threshold, target)."""
+    now_hour = int(now.timestamp()) // 3600 if now else current_hour()
+    ids, thresholds, targets = forecaster.plan(now_hour, item_ids)
+    return list(zip(ids.tolist(), thresholds.tolist(), targets.tolist()))
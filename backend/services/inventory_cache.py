@@ -0,0 +1,177 @@
+import asyncio
+import json
+from collections import Counter
+import orjson
+from config import INVENTORY_CHANGES_RETENTION_HOURS, INVENTORY_SYNC_SECONDS
+from database import pool
+from models.inventory import ITEM_SELECT, InventoryItem
+from services import events, metrics
+
+# In-memory copy of inventory_items (as InventoryItem) for GET /inventory/
+# and the dashboard. Every write path applies its rows here after
+# committing, and each change bumps `version`. Writes from other processes
+# arrive through the inventory_changes log (filled by triggers): sync()
+# re-reads the items logged since `seen`, the last log entry this copy
+# reflects. `seen` is the same in every process, so it is the ETag.
+_rows: dict = {}
+_bodies: dict = {}    # location (None = all) -> serialized JSON
+_body_version = -1
+version = 0
+seen = 0
+_sync_lock = None
+_task = None
+
+LATEST_CHANGE_SQL = """
+    SELECT (SELECT MAX(seq) FROM inventory_changes), (SELECT MIN(seq) FROM inventory_changes)
+"""
+
+def _status_counts() -> dict:
+    return {(status,): n for status, n in Counter(r.status for r in _rows.values()).items()}
+
+metrics.Gauge("inventory_items", "Items by stock status", ("status",), _status_counts)
+
+async def load():
+    global version, seen
+    async with pool.read() as db:
+        # Read the log position first: the rows are at least that new
+        [latest, _] = await (await db.execute(LATEST_CHANGE_SQL)).fetchone()
+        rows = await db.execute_fetchall(f"SELECT {ITEM_SELECT} FROM inventory_items")
+    _rows.clear()
+    _rows.update((r[0], InventoryItem(*r)) for r in rows)
+    seen = latest or 0
+    version += 1
+
+def apply(rows) -> list:
+    """Upsert rows (sqlite Rows or dicts) that were just written; returns the ids that changed."""
+    global version
+    changed = []
+    for row in rows:
+        row = InventoryItem.from_row(row)
+        if _rows.get(row.id) != row:
+            _rows[row.id] = row
+            changed.append(row.id)
+    if changed:
+        version += 1
+    return changed
+
+def remove(item_id: int) -> bool:
+    global version
+    if _rows.pop(item_id, None) is None:
+        return False
+    version += 1
+    return True
+
+async def refresh(item_ids) -> list:
+    """Re-read the given items after a write that didn't return its rows; returns the ids that changed."""
+    item_ids = list(item_ids)
+    if not item_ids:
+        return []
+    async with pool.read() as db:
+        rows = await db.execute_fetchall(
+            f"SELECT {ITEM_SELECT} FROM inventory_items WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(item_ids),),
+        )
+    changed = apply(rows)
+    changed += [m for m in set(item_ids) - {r["id"] for r in rows} if remove(m)]
+    return changed
+
+def _lock() -> asyncio.Lock:
+    global _sync_lock
+    if _sync_lock is None:
+        _sync_lock = asyncio.Lock()
+    return _sync_lock
+
+async def sync():
+    """
+    Catch up with inventory writes logged since `seen`, including other
+    processes'. Items this process wrote itself are re-read but unchanged;
+    the rest go out as item events with source "peer".
+    """
+    global seen
+    async with _lock():
+        async with pool.read() as db:
+            [latest, oldest] = await (await db.execute(LATEST_CHANGE_SQL)).fetchone()
+            if latest is None or latest == seen:
+                return
+            item_ids = None
+            if oldest <= seen + 1:
+                item_ids = [r[0] for r in await db.execute_fetchall(
+                    "SELECT DISTINCT item_id FROM inventory_changes WHERE seq > ? AND seq <= ?",
+                    (seen, latest),
+                )]
+        if item_ids is None:
+            # Pruned past this copy's position
+            await load()
+            events.publish("item", list(_rows), source="peer")
+            return
+        changed = await refresh(item_ids)
+        seen = latest
+    if changed:
+        events.publish("item", sorted(changed), source="peer")
+
+async def prune():
+    """Drop change log entries past retention, always keeping the newest."""
+    async with pool.write() as db:
+        await db.execute(
+            """DELETE FROM inventory_changes
+               WHERE changed_at < datetime('now', ?)
+                 AND seq < (SELECT MAX(seq) FROM inventory_changes)""",
+            (f"-{INVENTORY_CHANGES_RETENTION_HOURS} hours",),
+        )
+
+async def _syncer():
+    while True:
+        await asyncio.sleep(INVENTORY_SYNC_SECONDS)
+        try:
+            await sync()
+        except Exception as e:
+            print(f"Inventory cache sync error: {e}")
+
+def start():
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_syncer())
+
+async def stop():
+    global _task, _sync_lock
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = _sync_lock = None
+
+def get(item_id: int):
+    return _rows.get(item_id)
+
+def items(location: str = None) -> list:
+    """Rows in the order GET /inventory/ has always used (status DESC)."""
+    rows = _rows.values()
+    if location is not None:
+        rows = [r for r in rows if r.location == location]
+    return sorted(rows, key=lambda r: (r.status or "", -r.id), reverse=True)
+
+def locations() -> list:
+    return sorted({r.location for r in _rows.values()})
+
+def location_sizes() -> dict:
+    """Item count per location, for balancing sweep partitions."""
+    sizes = {}
+    for r in _rows.values():
+        sizes[r.location] = sizes.get(r.location, 0) + 1
+    return sizes
+
+def etag() -> str:
+    return f'W/"{seen}"'
+
+def body(location: str = None) -> bytes:
+    """JSON for the current snapshot (or one lounge of it), serialized once per version."""
+    global _body_version
+    if _body_version != version:
+        _bodies.clear()
+        _body_version = version
+    if location not in _bodies:
+        _bodies[location] = orjson.dumps(items(location))
+    return _bodies[location]
@@ -1,30 +1,298 @@
-import aiosqlite
-import os
-from services.peak_hours import get_effective_threshold
-from services.order_service import create_order
-
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "inventory.db")
-
-async def check_and_trigger_reorders():
-    print("Scheduler tick — checking inventory...")
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        items = await db.execute_fetchall("SELECT * FROM inventory_items")
-
-    for item in items:
-        effective = get_effective_threshold(item["base_threshold"])
-        stock = item["current_stock"]
-
-        if stock <= item["base_threshold"] // 2:
-            new_status = "critical"
-        elif stock <= effective:
-            new_status = "low"
-        else:
-            new_status = "ok"
-
-        async with aiosqlite.connect(DB_PATH) as db:
-            await db.execute("UPDATE inventory_items SET status=? WHERE id=?", (new_status, item["id"]))
-            await db.commit()
-
-        if stock <= effective:
-            await create_order(item["id"], triggered_by="auto")
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from config import PROFILE_SLOW_SWEEP_MS, SWEEP_PROCESSES
+from database import pool
+from services import analytics, events, forecast, inventory_cache, metrics, profiler
+from services.peak_hours import get_peak_multiplier, is_peak_hour
+
+FORECAST_TABLE_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS forecast_plan (
+        item_id INTEGER PRIMARY KEY,
+        threshold INTEGER NOT NULL,
+        target INTEGER NOT NULL
+    )
+"""
+
+# Peak state per lounge at the sweep's timestamp
+LOCATION_PEAK_TABLE_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS location_peak (
+        location TEXT PRIMARY KEY,
+        multiplier REAL NOT NULL,
+        peak INTEGER NOT NULL
+    )
+"""
+
+def _effective_threshold(t: str) -> str:
+    """
+    Reorder point for rows of table/alias t: the forecast threshold (never
+    below the critical line) for items with consumption history, otherwise
+    the base threshold with its lounge's peak multiplier. CAST truncates
+    like int().
+    """
+    return f"""COALESCE(
+        (SELECT MAX(f.threshold, {t}.base_threshold / 2) FROM temp.forecast_plan f WHERE f.item_id = {t}.id),
+        CAST({t}.base_threshold * COALESCE(
+            (SELECT p.multiplier FROM temp.location_peak p WHERE p.location = {t}.location), 1.0
+        ) AS INTEGER)
+    )"""
+
+STATUS_SQL = f"""CASE
+    WHEN current_stock <= base_threshold / 2 THEN 'critical'
+    WHEN current_stock <= {_effective_threshold("inventory_items")} THEN 'low'
+    ELSE 'ok'
+END"""
+
+# Appended to restrict a sweep to the items named in :ids (a JSON array)
+ITEM_FILTER_SQL = " AND id IN (SELECT value FROM json_each(:ids))"
+# ...or to the lounges named in :locations
+LOCATION_FILTER_SQL = " AND location IN (SELECT value FROM json_each(:locations))"
+
+# Phase one of a sweep reads: rows whose status is stale, and items at/below
+# their effective threshold with no pending order yet. The quantity tops the
+# item up to its forecast target (or max capacity). Both carry the stock
+# they were computed from.
+STALE_STATUS_SQL = f"""
+    SELECT id, current_stock, {STATUS_SQL} AS status
+    FROM inventory_items
+    WHERE status IS NOT {STATUS_SQL}
+"""
+
+REORDER_CANDIDATES_SQL = f"""
+    SELECT i.id, i.current_stock,
+           MAX(COALESCE(
+               (SELECT MIN(MAX(f.target, i.base_threshold), i.max_capacity)
+                FROM temp.forecast_plan f WHERE f.item_id = i.id),
+               i.max_capacity
+           ) - i.current_stock, 1) AS quantity,
+           COALESCE((SELECT p.peak FROM temp.location_peak p WHERE p.location = i.location), 0) AS peak
+    FROM inventory_items i
+    WHERE i.current_stock <= {_effective_threshold("i")}
+      AND NOT EXISTS (
+          SELECT 1 FROM restock_orders o
+          WHERE o.item_id = i.id AND o.status = 'pending'
+      )
+"""
+
+# Phase two writes both in one statement each, skipping any item whose
+# stock moved since it was read (the next sweep picks those up).
+APPLY_STATUS_SQL = """
+    UPDATE inventory_items SET status = c.value ->> 2
+    FROM json_each(:changes) c
+    WHERE inventory_items.id = c.value ->> 0
+      AND inventory_items.current_stock = c.value ->> 1
+    RETURNING *
+"""
+
+INSERT_ORDERS_SQL = """
+    INSERT INTO restock_orders (item_id, item_name, quantity_ordered, triggered_by, is_peak_hour, location)
+    SELECT i.id, i.name, c.value ->> 2, 'auto', c.value ->> 3, i.location
+    FROM json_each(:candidates) c
+    JOIN inventory_items i ON i.id = c.value ->> 0
+    WHERE i.current_stock = c.value ->> 1
+      AND NOT EXISTS (
+          SELECT 1 FROM restock_orders o
+          WHERE o.item_id = i.id AND o.status = 'pending'
+      )
+    ORDER BY c.key
+    ON CONFLICT DO NOTHING
+    RETURNING id, item_name, quantity_ordered, is_peak_hour, location
+"""
+
+_worker_task = None
+_sweeps_running = 0
+
+def _ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+def sweep_inputs(now: datetime, item_ids=None, locations=None) -> dict:
+    """
+    Everything a sweep needs from this process, as plain data so it can be
+    shipped to a worker process: the forecast plan and each lounge's peak
+    state at `now`.
+    """
+    plan = forecast.thresholds_for(item_ids, now)
+    if locations is None:
+        locations = inventory_cache.locations()
+    elif item_ids is None:
+        # Only ship the plan rows for this partition's items
+        wanted = set(locations)
+        plan = [p for p in plan if getattr(inventory_cache.get(p[0]), "location", None) in wanted]
+    return {
+        "plan": plan,
+        "peaks": [
+            (location, get_peak_multiplier(now, location), int(is_peak_hour(now, location)))
+            for location in locations
+        ],
+    }
+
+async def evaluate_sweep(db, inputs: dict, item_ids=None, locations=None) -> dict:
+    """
+    Read phase of a sweep: which statuses change and which items need an
+    order. Only writes temp tables, so worker processes can run it side by
+    side on their own connections.
+    """
+    params = {}
+    status_sql, candidates_sql = STALE_STATUS_SQL, REORDER_CANDIDATES_SQL
+    if item_ids is not None:
+        params["ids"] = json.dumps(list(item_ids))
+        status_sql += ITEM_FILTER_SQL
+        candidates_sql += ITEM_FILTER_SQL.replace(" id ", " i.id ")
+    if locations is not None:
+        params["locations"] = json.dumps(list(locations))
+        status_sql += LOCATION_FILTER_SQL
+        candidates_sql += LOCATION_FILTER_SQL.replace(" location ", " i.location ")
+    timings = {}
+
+    t = time.perf_counter()
+    await db.execute(FORECAST_TABLE_SQL)
+    await db.execute(LOCATION_PEAK_TABLE_SQL)
+    await db.execute("DELETE FROM temp.forecast_plan")
+    await db.execute("DELETE FROM temp.location_peak")
+    await db.executemany(
+        "INSERT INTO temp.forecast_plan (item_id, threshold, target) VALUES (?, ?, ?)",
+        inputs["plan"],
+    )
+    await db.executemany(
+        "INSERT INTO temp.location_peak (location, multiplier, peak) VALUES (?, ?, ?)",
+        inputs["peaks"],
+    )
+    timings["forecast_ms"] = _ms(t)
+
+    t = time.perf_counter()
+    changes = [tuple(r) for r in await db.execute_fetchall(status_sql, params)]
+    timings["status_ms"] = _ms(t)
+
+    t = time.perf_counter()
+    candidates = [tuple(r) for r in await db.execute_fetchall(candidates_sql, params)]
+    timings["candidates_ms"] = _ms(t)
+    return {"changes": changes, "candidates": candidates, "timings_ms": timings}
+
+async def apply_sweep(db, evaluated: dict) -> dict:
+    """
+    Write phase: status updates and order lines in the caller's transaction.
+    Returns the updated rows (as dicts) and order ids.
+    """
+    t = time.perf_counter()
+    changed, orders = [], []
+    if evaluated["changes"]:
+        changed = [dict(r) for r in await db.execute_fetchall(
+            APPLY_STATUS_SQL, {"changes": json.dumps(evaluated["changes"])}
+        )]
+    if evaluated["candidates"]:
+        # Notified once services.purchase_orders has batched them per supplier
+        orders = await db.execute_fetchall(
+            INSERT_ORDERS_SQL, {"candidates": json.dumps(evaluated["candidates"])}
+        )
+        if orders:
+            await analytics.rollup_orders(db, min(o["id"] for o in orders), max(o["id"] for o in orders))
+    timings = dict(evaluated["timings_ms"], insert_ms=_ms(t))
+    return {"changed": changed, "order_ids": sorted(o["id"] for o in orders), "timings_ms": timings}
+
+def publish_sweep(changed: list, order_ids: list):
+    """Hand a committed sweep's results to the cache and event subscribers."""
+    if changed:
+        inventory_cache.apply(changed)
+        events.publish("item", [r["id"] for r in changed], op="status", source="sweep")
+    if order_ids:
+        events.publish("order", order_ids, op="insert", source="sweep")
+
+async def check_and_trigger_reorders(item_ids=None, now: datetime = None) -> dict:
+    """
+    One reorder sweep in a single write transaction:
+    set-based status update, anti-joined candidate query, bulk order insert.
+    The new lines wait for services.purchase_orders, which consolidates them
+    per supplier and queues one notification per purchase order.
+    item_ids limits the sweep to those items; None sweeps everything, split
+    across SWEEP_PROCESSES worker processes when that is above 1.
+    """
+    global _sweeps_running
+    scope = "full" if item_ids is None else "items"
+    if _sweeps_running:
+        metrics.sweep_overlaps.inc()
+    _sweeps_running += 1
+    try:
+        with profiler.sample_if_slow("reorder sweep", PROFILE_SLOW_SWEEP_MS if item_ids is None else 0):
+            report = await _sweep(item_ids, now)
+    except Exception:
+        metrics.sweep_runs.inc(scope, "error")
+        raise
+    finally:
+        _sweeps_running -= 1
+    metrics.sweep_runs.inc(scope, "ok")
+    metrics.sweep_phase_seconds.observe(report["total_ms"] / 1000, scope, "total")
+    for shard in report.get("shards", [report]):
+        for phase, ms in shard.get("timings_ms", {}).items():
+            if phase != "total_ms":
+                metrics.sweep_phase_seconds.observe(ms / 1000, scope, phase.removesuffix("_ms"))
+    return report
+
+async def _sweep(item_ids, now: datetime) -> dict:
+    started = time.perf_counter()
+    # One timestamp for the whole sweep, so it can't straddle a peak boundary
+    now = now or datetime.now(timezone.utc)
+    if item_ids is None and SWEEP_PROCESSES > 1:
+        from services import sweep_shards
+        return await sweep_shards.run(now, SWEEP_PROCESSES)
+
+    inputs = sweep_inputs(now, item_ids)
+    async with pool.write() as db:
+        # Holding the writer throughout, so nothing moves between the phases
+        result = await apply_sweep(db, await evaluate_sweep(db, inputs, item_ids))
+    publish_sweep(result["changed"], result["order_ids"])
+
+    report = {
+        "status_updates": len(result["changed"]),
+        "orders_created": len(result["order_ids"]),
+        "peak": is_peak_hour(now),
+        "timings_ms": result["timings_ms"],
+        "total_ms": _ms(started),
+    }
+    if item_ids is None or report["orders_created"] or report["status_updates"]:
+        print(
+            f"Reorder sweep — {report['status_updates']} status changes, "
+            f"{report['orders_created']} orders raised in {report['total_ms']} ms"
+        )
+    return report
+
+async def _reorder_worker():
+    queue = events.subscribe()
+    try:
+        while True:
+            event = await queue.get()
+            item_ids = set()
+            # Coalesce everything that queued up while the last sweep ran.
+            # Another process' writes were evaluated by that process.
+            while True:
+                if event["kind"] == "item" and event["source"] not in ("sweep", "peer") and event["op"] != "delete":
+                    item_ids.update(event["ids"])
+                try:
+                    event = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+            if not item_ids:
+                continue
+            try:
+                await check_and_trigger_reorders(sorted(item_ids))
+            except Exception as e:
+                print(f"Reorder worker failed for items {sorted(item_ids)}: {e}")
+    finally:
+        events.unsubscribe(queue)
+
+def start_reorder_worker():
+    """Evaluate items as soon as their stock changes instead of waiting for the scheduler."""
+    global _worker_task
+    if _worker_task is None:
+        _worker_task = asyncio.create_task(_reorder_worker())
+
+async def stop_reorder_worker():
+    global _worker_task
+    if _worker_task is None:
+        return
+    _worker_task.cancel()
+    try:
+        await _worker_task
+    except asyncio.CancelledError:
+        pass
+    _worker_task = None
@@ -0,0 +1,93 @@
+import asyncio
+from contextlib import asynccontextmanager
+from config import (
+    GROQ_API_KEY, GROQ_BASE_URL,
+    CHAT_MAX_CONCURRENCY, CHAT_MAX_QUEUE, CHAT_QUEUE_TIMEOUT_SECONDS,
+)
+from services import providers
+
+CHAT_MODEL = "llama-3.3-70b-versatile"
+
+# One AsyncGroq client (and so one keep-alive HTTP connection pool) for the
+# app's lifetime, held by services.providers as "llm", plus a semaphore
+# capping concurrent completions.
+_semaphore = None
+_waiting = 0
+
+class ChatBusy(Exception):
+    """No completion slot freed up within CHAT_QUEUE_TIMEOUT_SECONDS."""
+
+class ChatNotConfigured(Exception):
+    """Neither GROQ_API_KEY nor GROQ_BASE_URL is set."""
+
+def make_client():
+    import httpx
+    from groq import AsyncGroq
+    http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=CHAT_MAX_CONCURRENCY * 2,
+            max_keepalive_connections=CHAT_MAX_CONCURRENCY,
+            keepalive_expiry=120,
+        ),
+        timeout=httpx.Timeout(60.0, connect=5.0),
+    )
+    return AsyncGroq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, http_client=http_client)
+
+def get_client():
+    client = providers.get("llm")
+    if client is None:
+        raise ChatNotConfigured("The assistant isn't configured (set GROQ_API_KEY)")
+    return client
+
+def set_client(client):
+    """Swap in another AsyncGroq-compatible client, e.g. one wired to a local stand-in."""
+    providers.override("llm", client)
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(CHAT_MAX_CONCURRENCY)
+    return _semaphore
+
+def overloaded() -> bool:
+    """True when the wait queue is already full and new chats should get a 429."""
+    return _waiting >= CHAT_MAX_QUEUE
+
+@asynccontextmanager
+async def completion_slot():
+    global _waiting
+    semaphore = _get_semaphore()
+    _waiting += 1
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout=CHAT_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise ChatBusy()
+    finally:
+        _waiting -= 1
+    try:
+        yield
+    finally:
+        semaphore.release()
+
+async def stream_completion(messages: list, max_tokens: int = 500, temperature: float = 0.4):
+    """
+    Yield content deltas. Closing/cancelling this generator (e.g. the HTTP
+    client went away) closes the upstream stream as well.
+    """
+    async with completion_slot():
+        stream = await get_client().chat.completions.create(
+            model=CHAT_MODEL,
+            messages=messages,
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+        )
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        finally:
+            await stream.close()
@@ -0,0 +1,131 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Minimal Prometheus-style metrics: counters and histograms live in process
+# memory and cost a dict lookup plus a bisect per observation; gauges are
+# callbacks evaluated only when /metrics is scraped.
+
+# Seconds; spans sub-millisecond SQL up to multi-second sweeps and chats
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+_registry = []
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{str(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, *labels, value: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}     # labels -> [per-bucket counts..., +Inf count, sum]
+        _registry.append(self)
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+class Gauge:
+    """Value(s) computed at scrape time by `collect`, sync or async, returning {labels tuple: value}."""
+
+    def __init__(self, name: str, help: str, labelnames: tuple, collect):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.collect = collect
+        _registry.append(self)
+
+    async def render(self) -> list:
+        values = self.collect()
+        if hasattr(values, "__await__"):
+            values = await values
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+async def render() -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines = []
+    for metric in _registry:
+        rendered = metric.render()
+        if hasattr(rendered, "__await__"):
+            rendered = await rendered
+        lines.extend(rendered)
+    return "\n".join(lines) + "\n"
+
+http_request_seconds = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+sql_statement_seconds = Histogram(
+    "db_statement_duration_seconds", "SQLite call latency (queue wait + execution) by statement type",
+    ("op",),
+)
+sweep_phase_seconds = Histogram(
+    "reorder_sweep_phase_seconds", "Reorder sweep time per phase ('total' for the whole sweep)",
+    ("scope", "phase"),
+)
+sweep_runs = Counter(
+    "reorder_sweep_runs_total", "Reorder sweeps by scope and result", ("scope", "result"),
+)
+sweep_overlaps = Counter(
+    "reorder_sweep_overlaps_total", "Sweeps that started while another was still running",
+)
+scheduler_events = Counter(
+    "scheduler_job_events_total", "Scheduled jobs missed or skipped because a run was still active",
+    ("job", "event"),
+)
+notification_send_seconds = Histogram(
+    "notification_send_duration_seconds", "Notification delivery latency by channel and outcome",
+    ("channel", "outcome"),
+)
+notifications = Counter(
+    "notifications_total", "Notification delivery attempts by channel and outcome", ("channel", "outcome"),
+)
+stream_coalesced = Counter(
+    "stream_coalesced_total", "Slow /stream clients whose backlog was merged ('merge') or replaced by a snapshot ('resync')",
+    ("action",),
+)
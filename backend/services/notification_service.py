@@ -0,0 +1,157 @@
+import asyncio
+import json
+import time
+from database import pool
+from services import metrics, providers
+
+# Restock notifications are written to notification_outbox in the same
+# transaction as the orders they describe, then delivered by a background
+# dispatcher. Order creation never waits on SMTP or Twilio. Channels come
+# from services.providers, so a transport's SDK loads on its first send.
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 900
+DISPATCH_WORKERS = 4
+DISPATCH_BATCH = 50
+POLL_SECONDS = 5
+
+_wakeup = None
+_dispatcher_task = None
+
+async def _outbox_depth() -> dict:
+    async with pool.read() as db:
+        rows = await db.execute_fetchall(
+            "SELECT status, COUNT(*) FROM notification_outbox WHERE status IN ('pending', 'sending', 'failed') GROUP BY status"
+        )
+    return {(status,): n for status, n in rows}
+
+metrics.Gauge("notification_outbox_rows", "Undelivered outbox rows by status", ("status",), _outbox_depth)
+
+def set_transport(channel: str, transport):
+    """Swap a channel's transport, e.g. for a local SMTP server or fake Twilio client."""
+    providers.override(channel, transport)
+
+async def enqueue_restock(db, lines: list, is_peak: bool):
+    """
+    Queue one digest per channel for the given order lines
+    ({"order_id", "item_name", "quantity"}, optionally "location"). Must be called on the writer
+    connection inside the transaction that created the orders.
+    """
+    if not lines:
+        return
+    payload = json.dumps({"peak": bool(is_peak), "lines": lines})
+    await db.executemany(
+        "INSERT INTO notification_outbox (channel, payload) VALUES (?, ?)",
+        [(channel, payload) for channel in providers.NOTIFICATION_CHANNELS],
+    )
+    wake()
+
+def wake():
+    """Nudge the dispatcher, e.g. after another process queued notifications."""
+    if _wakeup is not None:
+        _wakeup.set()
+
+def _backoff(attempts: int) -> int:
+    return min(BACKOFF_BASE_SECONDS * 2 ** (attempts - 1), BACKOFF_MAX_SECONDS)
+
+async def _deliver(row, semaphore: asyncio.Semaphore):
+    channel = row["channel"]
+    payload = json.loads(row["payload"])
+    transport = providers.get(channel)
+    if transport is None or not transport.configured:
+        items = ", ".join(f"{l['item_name']} x{l['quantity']}" for l in payload["lines"])
+        print(f"[{channel.upper()} SKIPPED] Restock: {items} {'PEAK' if payload['peak'] else ''}")
+        metrics.notifications.inc(channel, "skipped")
+        return row, "skipped", None
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            await transport.send(payload["lines"], payload["peak"])
+            outcome, error = "sent", None
+        except Exception as e:
+            print(f"{channel} notification #{row['id']} failed (attempt {row['attempts']}): {e}")
+            outcome, error = "error", str(e)
+        metrics.notification_send_seconds.observe(time.perf_counter() - started, channel, outcome)
+        metrics.notifications.inc(channel, outcome)
+        return row, outcome, error
+
+async def dispatch_once() -> int:
+    """Claim due outbox rows, deliver them concurrently and record the outcome."""
+    async with pool.write() as db:
+        rows = await db.execute_fetchall(
+            """UPDATE notification_outbox
+               SET status = 'sending', attempts = attempts + 1
+               WHERE id IN (
+                   SELECT id FROM notification_outbox
+                   WHERE status = 'pending' AND next_attempt_at <= CURRENT_TIMESTAMP
+                   ORDER BY id LIMIT ?
+               )
+               RETURNING *""",
+            (DISPATCH_BATCH,),
+        )
+    if not rows:
+        return 0
+
+    semaphore = asyncio.Semaphore(DISPATCH_WORKERS)
+    results = await asyncio.gather(*(_deliver(r, semaphore) for r in rows))
+
+    async with pool.write() as db:
+        for row, outcome, error in results:
+            if outcome in ("sent", "skipped"):
+                await db.execute(
+                    "UPDATE notification_outbox SET status=?, sent_at=CURRENT_TIMESTAMP, last_error=NULL WHERE id=?",
+                    (outcome, row["id"]),
+                )
+                if outcome == "sent" and row["channel"] == "email":
+                    order_ids = [l["order_id"] for l in json.loads(row["payload"])["lines"]]
+                    await db.executemany(
+                        "UPDATE restock_orders SET email_sent=1 WHERE id=?",
+                        [(order_id,) for order_id in order_ids],
+                    )
+            elif row["attempts"] >= MAX_ATTEMPTS:
+                await db.execute(
+                    "UPDATE notification_outbox SET status='failed', last_error=? WHERE id=?",
+                    (error, row["id"]),
+                )
+            else:
+                await db.execute(
+                    """UPDATE notification_outbox
+                       SET status='pending', last_error=?,
+                           next_attempt_at=datetime('now', ?)
+                       WHERE id=?""",
+                    (error, f"+{_backoff(row['attempts'])} seconds", row["id"]),
+                )
+    return len(rows)
+
+async def _dispatcher():
+    while True:
+        _wakeup.clear()
+        try:
+            if await dispatch_once():
+                continue
+        except Exception as e:
+            print(f"Notification dispatcher error: {e}")
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+async def start_dispatcher():
+    global _wakeup, _dispatcher_task
+    if _dispatcher_task is not None:
+        return
+    # Anything claimed by a process that died mid-send goes back in the queue
+    async with pool.write() as db:
+        await db.execute("UPDATE notification_outbox SET status='pending' WHERE status='sending'")
+    _wakeup = asyncio.Event()
+    _dispatcher_task = asyncio.create_task(_dispatcher())
+
+async def stop_dispatcher():
+    global _dispatcher_task
+    if _dispatcher_task is not None:
+        _dispatcher_task.cancel()
+        try:
+            await _dispatcher_task
+        except asyncio.CancelledError:
+            pass
+        _dispatcher_task = None
@@ -1,35 +1,48 @@
-import aiosqlite
-import os
+from database import pool
+from services import analytics, events, metrics, purchase_orders
 from services.peak_hours import is_peak_hour
-from services.email_service import send_restock_email
-from services.whatsapp_service import send_whatsapp_alert
 
-DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "inventory.db")
+# Provisional quantity from the row at insert time; services.purchase_orders
+# recomputes it when the line is consolidated. Auto orders skip items that
+# already have a pending order; the partial unique index
+# idx_orders_one_pending_auto backs that up against concurrent sweeps.
+INSERT_ORDER_SQL = """
+    INSERT INTO restock_orders (item_id, item_name, quantity_ordered, triggered_by, is_peak_hour, location)
+    SELECT id, name, max_capacity - current_stock, :triggered_by, :peak, location
+    FROM inventory_items
+    WHERE id = :item_id
+      AND (:triggered_by != 'auto' OR NOT EXISTS (
+          SELECT 1 FROM restock_orders WHERE item_id = :item_id AND status = 'pending'
+      ))
+    ON CONFLICT DO NOTHING
+    RETURNING id, item_name, quantity_ordered, location
+"""
+
+async def _open_orders() -> dict:
+    async with pool.read() as db:
+        rows = await db.execute_fetchall(
+            "SELECT triggered_by, COUNT(*) FROM restock_orders WHERE status = 'pending' GROUP BY triggered_by"
+        )
+    return {(triggered_by,): n for triggered_by, n in rows}
+
+metrics.Gauge("restock_orders_pending", "Pending restock orders by trigger", ("triggered_by",), _open_orders)
 
 async def create_order(item_id: int, triggered_by: str = "auto"):
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        item = await (await db.execute("SELECT * FROM inventory_items WHERE id=?", (item_id,))).fetchone()
+    async with pool.write() as db:
+        item = await (await db.execute("SELECT location FROM inventory_items WHERE id=?", (item_id,))).fetchone()
         if not item:
             return None
 
-        existing = await (await db.execute(
-            "SELECT id FROM restock_orders WHERE item_id=? AND status='pending'", (item_id,)
-        )).fetchone()
-        if existing and triggered_by == "auto":
+        peak = is_peak_hour(lounge=item["location"])
+        order = await (await db.execute(INSERT_ORDER_SQL, {
+            "item_id": item_id, "triggered_by": triggered_by, "peak": int(peak),
+        })).fetchone()
+        if not order:
             return None
+        await analytics.rollup_orders(db, order["id"], order["id"])
 
-        quantity = item["max_capacity"] - item["current_stock"]
-        peak = is_peak_hour()
-
-        await send_restock_email(item["name"], quantity, peak)
-        send_whatsapp_alert(item["name"], quantity, peak)
-        email_sent = 1 if await send_restock_email(item["name"], quantity, peak) else 0
-        await db.execute("""
-            INSERT INTO restock_orders (item_id, item_name, quantity_ordered, triggered_by, is_peak_hour, email_sent)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (item_id, item["name"], quantity, triggered_by, int(peak), int(email_sent)))
-        await db.commit()
-
-        
-        return quantity
+    events.publish("order", [order["id"]], op="insert", source=triggered_by)
+    # Goes out with its supplier's next purchase order; manual ones don't wait
+    if triggered_by == "manual":
+        purchase_orders.wake()
+    return order["quantity_ordered"]
@@ -0,0 +1,125 @@
+import asyncio
+import csv
+import json
+import os
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+import numpy as np
+from config import DEFAULT_LOUNGE, PEAK_SCHEDULE_PATH
+
+# Per-lounge passenger intensity in 15-minute buckets across a week, built
+# from a flight schedule file. Lookups are an array index; reloads build a
+# new index off the event loop and swap it in with one assignment.
+BUCKET_MINUTES = 15
+BUCKETS_PER_DAY = 24 * 60 // BUCKET_MINUTES
+BUCKETS_PER_WEEK = 7 * BUCKETS_PER_DAY
+DWELL_BEFORE_MINUTES = 120     # passengers arrive this long before departure
+DWELL_AFTER_MINUTES = 15       # ...and leave this long before it
+PEAK_INTENSITY = 0.5           # intensity at/above which a bucket counts as peak
+
+class PeakIndex:
+    def __init__(self, lounges: dict, source: str, default: tuple):
+        self.lounges = lounges     # lounge -> (intensity array, ZoneInfo)
+        self.source = source
+        self.default = default     # for lounges the schedule doesn't mention
+
+    def _lookup(self, lounge: str):
+        return self.lounges.get(lounge) or self.default
+
+    def bucket(self, lounge: str, ts: datetime) -> int:
+        local = ts.astimezone(self._lookup(lounge)[1])
+        return local.weekday() * BUCKETS_PER_DAY + (local.hour * 60 + local.minute) // BUCKET_MINUTES
+
+    def intensity(self, lounge: str, ts: datetime) -> float:
+        """0..1 relative load of the lounge at ts; 1 is its busiest bucket."""
+        values, _ = self._lookup(lounge)
+        return float(values[self.bucket(lounge, ts)])
+
+def _local_zone():
+    try:
+        from tzlocal import get_localzone
+        return get_localzone()
+    except Exception:
+        return timezone.utc
+
+def _window_index(windows) -> np.ndarray:
+    """Daily (start_hour, end_hour) windows at full intensity."""
+    day = np.zeros(BUCKETS_PER_DAY, dtype=np.float32)
+    per_hour = 60 // BUCKET_MINUTES
+    for start, end in windows:
+        day[start * per_hour:end * per_hour] = 1.0
+    return np.tile(day, 7)
+
+def _read_schedule(path: str) -> list:
+    if path.endswith(".json"):
+        with open(path) as f:
+            return json.load(f)
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+def build_from_schedule(rows: list) -> dict:
+    """
+    rows: {"lounge", "timezone", "departure": "HH:MM", "pax", "weekday"}
+    where weekday is 0 (Mon)..6 or "*"/missing for every day.
+    """
+    loads, zones = {}, {}
+    before = DWELL_BEFORE_MINUTES // BUCKET_MINUTES
+    after = DWELL_AFTER_MINUTES // BUCKET_MINUTES
+    for row in rows:
+        lounge = row.get("lounge") or DEFAULT_LOUNGE
+        zones.setdefault(lounge, ZoneInfo(row["timezone"]) if row.get("timezone") else _local_zone())
+        load = loads.setdefault(lounge, np.zeros(BUCKETS_PER_WEEK, dtype=np.float64))
+        hour, minute = (int(p) for p in str(row["departure"]).split(":")[:2])
+        weekday = str(row.get("weekday", "*")).strip()
+        days = range(7) if weekday in ("", "*") else [int(weekday)]
+        pax = float(row.get("pax") or 1)
+        for day in days:
+            departure = day * BUCKETS_PER_DAY + (hour * 60 + minute) // BUCKET_MINUTES
+            # Wraps past Sunday midnight back to Monday
+            span = np.arange(departure - before, departure - after + 1) % BUCKETS_PER_WEEK
+            load[span] += pax
+    lounges = {}
+    for lounge, load in loads.items():
+        peak = load.max()
+        lounges[lounge] = ((load / peak if peak else load).astype(np.float32), zones[lounge])
+    return lounges
+
+def build_index(path: str = PEAK_SCHEDULE_PATH) -> PeakIndex:
+    from services.peak_hours import PEAK_WINDOWS
+    lounges = {}
+    source = "PEAK_WINDOWS"
+    if path and os.path.exists(path):
+        lounges = build_from_schedule(_read_schedule(path))
+        source = path
+    # Lounges missing from the schedule keep the fixed daily windows, even
+    # when it has entries for DEFAULT_LOUNGE
+    return PeakIndex(lounges, source, (_window_index(PEAK_WINDOWS), _local_zone()))
+
+_index = None
+_mtime = None
+
+def current() -> PeakIndex:
+    global _index
+    if _index is None:
+        _index = build_index()
+    return _index
+
+def intensity(lounge: str = DEFAULT_LOUNGE, ts: datetime = None) -> float:
+    return current().intensity(lounge, ts or datetime.now(timezone.utc))
+
+def is_peak(lounge: str = DEFAULT_LOUNGE, ts: datetime = None) -> bool:
+    return intensity(lounge, ts) >= PEAK_INTENSITY
+
+async def reload(path: str = PEAK_SCHEDULE_PATH):
+    """Rebuild in a worker thread, then swap; readers see the old or new index, never half of one."""
+    global _index
+    _index = await asyncio.to_thread(build_index, path)
+    print(f"Peak calendar loaded from {_index.source} ({len(_index.lounges)} lounges)")
+
+async def reload_if_changed(path: str = PEAK_SCHEDULE_PATH):
+    global _mtime
+    mtime = os.path.getmtime(path) if path and os.path.exists(path) else None
+    if mtime != _mtime:
+        await reload(path)
+        # Only once loaded: a file that failed to load is retried next time
+        _mtime = mtime
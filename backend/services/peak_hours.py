@@ -1,20 +1,27 @@
 from datetime import datetime
+from services import peak_calendar
 
-# Define peak flight windows (24hr format)
+# Define peak flight windows (24hr format). Used for any lounge that has no
+# entries in the flight schedule file (see services/peak_calendar.py).
 PEAK_WINDOWS = [
     (6, 9),    # Morning rush — early flights
     (11, 14),  # Midday peak
     (17, 21),  # Evening — most flights depart
 ]
 
-def is_peak_hour() -> bool:
-    hour = datetime.now().hour
-    return any(start <= hour < end for start, end in PEAK_WINDOWS)
+PEAK_MULTIPLIER = 1.5
 
-def get_effective_threshold(base_threshold: int) -> int:
+def is_peak_hour(now: datetime = None, lounge: str = peak_calendar.DEFAULT_LOUNGE) -> bool:
+    return peak_calendar.is_peak(lounge, now)
+
+def get_peak_multiplier(now: datetime = None, lounge: str = peak_calendar.DEFAULT_LOUNGE) -> float:
+    """1.0 when the lounge is quiet, rising to PEAK_MULTIPLIER at its busiest."""
+    return 1 + (PEAK_MULTIPLIER - 1) * peak_calendar.intensity(lounge, now)
+
+def get_effective_threshold(base_threshold: int, now: datetime = None) -> int:
     """
     During peak hours, reorder 50% earlier than normal.
     E.g. base_threshold=20 → effective=30 during peak.
     This means the agent catches low stock BEFORE the rush hits.
     """
-    return int(base_threshold * 1.5) if is_peak_hour() else base_threshold
+    return int(base_threshold * get_peak_multiplier(now))
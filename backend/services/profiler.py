@@ -0,0 +1,66 @@
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from config import PROFILE_INTERVAL_MS
+
+# Optional sampling profiler for slow ticks. While a profiled block runs, a
+# background thread snapshots the calling (event loop) thread's stack every
+# PROFILE_INTERVAL_MS. Blocks that overrun their threshold keep the samples
+# as folded stacks ("a;b;c count", for flamegraph.pl or speedscope) in
+# `captures`; faster ones are discarded. Nothing runs unless enabled.
+MAX_CAPTURES = 5
+MAX_DEPTH = 64
+
+captures = deque(maxlen=MAX_CAPTURES)
+
+def _fold(frame) -> str:
+    names = []
+    while frame is not None and len(names) < MAX_DEPTH:
+        code = frame.f_code
+        names.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+class _Sampler(threading.Thread):
+    def __init__(self, target_ident: int, interval_s: float):
+        super().__init__(name="slow-tick-sampler", daemon=True)
+        self.target_ident = target_ident
+        self.interval_s = interval_s
+        self.stacks = Counter()
+        self._finished = threading.Event()
+
+    def run(self):
+        while not self._finished.wait(self.interval_s):
+            frame = sys._current_frames().get(self.target_ident)
+            if frame is not None:
+                self.stacks[_fold(frame)] += 1
+
+    def stop(self):
+        self._finished.set()
+        self.join()
+
+@contextmanager
+def sample_if_slow(name: str, threshold_ms: float):
+    """Profile the block; keep the result only if it took longer than threshold_ms (0 = off)."""
+    if threshold_ms <= 0:
+        yield
+        return
+    sampler = _Sampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms > threshold_ms and sampler.stacks:
+            captures.append({
+                "name": name,
+                "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "elapsed_ms": round(elapsed_ms, 1),
+                "samples": sum(sampler.stacks.values()),
+                "folded": "\n".join(f"{stack} {n}" for stack, n in sampler.stacks.most_common()),
+            })
+            print(f"Slow {name} ({elapsed_ms:.0f} ms) — stack samples kept at /metrics/profiles")
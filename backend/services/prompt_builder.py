@@ -0,0 +1,175 @@
+import time
+from config import CHAT_PROMPT_TOKEN_BUDGET
+from database import USAGE_METRICS, pool
+from models.inventory import InventoryItem
+from models.orders import ORDER_SELECT, RestockOrder
+from services import events, inventory_cache
+
+# Builds the chat system prompt from the inventory snapshot plus two small
+# order queries, and reuses the rendered string until the data changes.
+CHARS_PER_TOKEN = 4
+SUMMARY_NAMES = 20
+STATUS_PRIORITY = {"critical": 0, "low": 1, "ok": 2}
+
+stats = {
+    "builds": 0,
+    "cache_hits": 0,
+    "last_build_ms": 0.0,
+    "last_prompt_chars": 0,
+    "last_prompt_tokens": 0,
+    "last_items_omitted": 0,
+}
+
+_cached_version = None
+_cached_prompt = None
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def data_version() -> int:
+    """Bumped by every stock/order change, so it keys anything derived from them."""
+    return events.seq
+
+def _item_line(item: InventoryItem) -> str:
+    return (
+        f"  - [{item.status.upper()}] {item.name} (Category: {item.category}) | "
+        f"Stock: {item.current_stock} {item.unit} | "
+        f"Threshold: {item.base_threshold} | "
+        f"Max Capacity: {item.max_capacity} | "
+        f"Last Updated: {item.last_updated or 'N/A'}"
+    )
+
+def _order_line(o: RestockOrder) -> str:
+    return (
+        f"  - Order #{o.id}: {o.item_name} | Qty: {o.quantity_ordered} | "
+        f"Status: {o.status} | Triggered by: {o.triggered_by} | "
+        f"Peak Hour: {'Yes' if o.is_peak_hour else 'No'} | Time: {o.triggered_at or 'N/A'}"
+    )
+
+def _names(names: list, empty: str) -> str:
+    if not names:
+        return empty
+    shown = ", ".join(names[:SUMMARY_NAMES])
+    if len(names) > SUMMARY_NAMES:
+        shown += f" (+{len(names) - SUMMARY_NAMES} more)"
+    return shown
+
+def _inventory_section(inventory: list, budget_chars: int):
+    """
+    Detail lines in priority order (critical, low, ok) until the budget runs
+    out; whatever doesn't fit is collapsed into per-status counts.
+    """
+    # Leave room for the "... N more" lines themselves
+    budget_chars -= 50 * len(STATUS_PRIORITY)
+    lines, used = [], 0
+    omitted = {}
+    for item in inventory:
+        line = _item_line(item)
+        if not omitted and used + len(line) + 1 <= budget_chars:
+            lines.append(line)
+            used += len(line) + 1
+        else:
+            omitted[item.status] = omitted.get(item.status, 0) + 1
+    for status, count in omitted.items():
+        lines.append(f"  - ... {count} more {status.upper()} items not listed")
+    return ("\n".join(lines) if lines else "  No inventory items found."), sum(omitted.values())
+
+def _activity_lines(activity: dict) -> str:
+    if not activity or not any(activity.values()):
+        return "- No consumption or orders recorded yet today"
+    peak = activity["peak_orders"] or 0
+    raised = activity["orders_raised"] or 0
+    line = (
+        f"- Units consumed: {activity['units_consumed'] or 0} | Units restocked: {activity['units_restocked'] or 0}\n"
+        f"- Orders raised: {raised} (peak: {peak}, off-peak: {raised - peak}) | Fulfilled: {activity['orders_fulfilled'] or 0}"
+    )
+    if activity["orders_fulfilled"]:
+        hours = activity["fulfil_seconds"] / activity["orders_fulfilled"] / 3600
+        line += f" | Avg time to fulfil: {hours:.1f} h"
+    return line
+
+def render_prompt(inventory: list, order_counts: dict, recent_orders: list, token_budget: int = CHAT_PROMPT_TOKEN_BUDGET,
+                  activity: dict = None):
+    inventory = sorted(inventory, key=lambda i: (STATUS_PRIORITY.get(i.status, 3), i.name))
+    critical = [i.name for i in inventory if i.status == 'critical']
+    low      = [i.name for i in inventory if i.status == 'low']
+    ok_items = [i.name for i in inventory if i.status == 'ok']
+
+    order_lines = [_order_line(o) for o in recent_orders]
+    orders_text = "\n".join(order_lines) if order_lines else "  No orders found."
+    pending = order_counts.get("pending", 0)
+    fulfilled = order_counts.get("fulfilled", 0)
+    total = sum(order_counts.values())
+
+    def fill(inventory_text):
+        return f"""You are an AI assistant for the Airport Lounge Inventory Management System — an automated restocking system for an airport lounge.
+Help staff get quick answers about inventory, orders, and system operations. Be concise, friendly, and precise.
+
+=== SYSTEM OVERVIEW ===
+- Monitors airport lounge inventory (food, beverages, amenities, etc.)
+- Automatically triggers restock orders when stock falls below thresholds
+- Peak hours trigger more aggressive restocking thresholds
+- Emails sent to warehouse when restocking is needed
+- Staff can also manually place orders
+
+=== LIVE INVENTORY DATA ===
+{inventory_text}
+
+=== STOCK SUMMARY ===
+- Critical (immediate action needed): {_names(critical, 'None ✅')} [{len(critical)}]
+- Low stock: {_names(low, 'None ✅')} [{len(low)}]
+- OK: {_names(ok_items, 'None')} [{len(ok_items)}]
+
+=== RECENT RESTOCK ORDERS (last 10) ===
+{orders_text}
+
+=== ORDER SUMMARY ===
+- Pending: {pending} | Fulfilled: {fulfilled} | Total: {total}
+
+=== TODAY'S ACTIVITY (UTC) ===
+{_activity_lines(activity)}
+
+Answer using live data above. Use bullet points for lists. Keep responses concise.
+"""
+
+    remaining = token_budget * CHARS_PER_TOKEN - len(fill(""))
+    inventory_text, omitted = _inventory_section(inventory, max(remaining, 0))
+    return fill(inventory_text), omitted
+
+async def get_system_prompt() -> str:
+    """Cached prompt for the current data version; rebuilt only after a change."""
+    global _cached_version, _cached_prompt
+    version = data_version()
+    if version == _cached_version and _cached_prompt is not None:
+        stats["cache_hits"] += 1
+        return _cached_prompt
+
+    started = time.perf_counter()
+    async with pool.read() as db:
+        counts = await db.execute_fetchall(
+            "SELECT status, COUNT(*) AS n FROM restock_orders GROUP BY status"
+        )
+        recent = await db.execute_fetchall(
+            f"SELECT {ORDER_SELECT} FROM restock_orders ORDER BY triggered_at DESC, id DESC LIMIT 10"
+        )
+        # From the hourly usage rollups rather than the order/ledger tables
+        activity = await (await db.execute(
+            f"""SELECT {", ".join(f"SUM({m}) AS {m}" for m in USAGE_METRICS)}
+                FROM usage_category_hourly WHERE bucket >= strftime('%Y-%m-%d 00:00:00', 'now')"""
+        )).fetchone()
+    prompt, omitted = render_prompt(
+        inventory_cache.items(),
+        {r["status"]: r["n"] for r in counts},
+        [RestockOrder(*r) for r in recent],
+        activity=dict(activity),
+    )
+
+    stats["builds"] += 1
+    stats["last_build_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    stats["last_prompt_chars"] = len(prompt)
+    stats["last_prompt_tokens"] = estimate_tokens(prompt)
+    stats["last_items_omitted"] = omitted
+    # Keyed by the version seen before reading, so a change that landed
+    # mid-build just forces another rebuild next time.
+    _cached_version, _cached_prompt = version, prompt
+    return prompt
@@ -0,0 +1,66 @@
+import importlib
+from config import (
+    EMAIL_SENDER, WAREHOUSE_EMAIL,
+    TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, WHATSAPP_TO,
+    GROQ_API_KEY, GROQ_BASE_URL,
+)
+
+# Outside integrations by name. Each is registered as an import path plus
+# whether its settings are present; the module (and the SDK behind it) is
+# only imported the first time a configured provider is asked for, so a
+# worker without Twilio or Groq credentials never loads those packages.
+
+class Provider:
+    __slots__ = ("target", "configured", "instance")
+
+    def __init__(self, target: str, configured: bool):
+        self.target = target            # "package.module:factory"
+        self.configured = configured
+        self.instance = None
+
+_providers = {}
+
+def register(name: str, target: str, configured: bool):
+    _providers[name] = Provider(target, configured)
+
+def configured(name: str) -> bool:
+    provider = _providers.get(name)
+    return provider is not None and (provider.configured or provider.instance is not None)
+
+def get(name: str):
+    """The provider's instance, created on first use; None if it isn't configured."""
+    provider = _providers.get(name)
+    if provider is None:
+        return None
+    if provider.instance is None:
+        if not provider.configured:
+            return None
+        module, factory = provider.target.split(":")
+        provider.instance = getattr(importlib.import_module(module), factory)()
+    return provider.instance
+
+def override(name: str, instance):
+    """Use `instance` for `name` regardless of settings, e.g. a local stand-in."""
+    if name not in _providers:
+        register(name, "", False)
+    _providers[name].instance = instance
+
+def loaded() -> list:
+    return [name for name, provider in _providers.items() if provider.instance is not None]
+
+async def close():
+    """Close whatever was created; providers start over lazily afterwards."""
+    for provider in _providers.values():
+        instance, provider.instance = provider.instance, None
+        if instance is not None and hasattr(instance, "close"):
+            await instance.close()
+
+# Notification channels; every restock digest goes to each of these
+NOTIFICATION_CHANNELS = ("email", "whatsapp")
+
+register("email", "services.email_service:EmailTransport", bool(EMAIL_SENDER and WAREHOUSE_EMAIL))
+register(
+    "whatsapp", "services.whatsapp_service:WhatsAppTransport",
+    bool(TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and WHATSAPP_TO),
+)
+register("llm", "services.llm_client:make_client", bool(GROQ_API_KEY or GROQ_BASE_URL))
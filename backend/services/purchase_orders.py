@@ -0,0 +1,220 @@
+import asyncio
+import json
+import time
+import numpy as np
+from config import PO_HOLD_SECONDS
+from database import pool
+from services import events, forecast
+from services.notification_service import enqueue_restock
+
+# Order lines raised by sweeps and create_order wait here (purchase_order_id
+# IS NULL) for up to PO_HOLD_SECONDS, so items from one supplier that cross
+# their thresholds together (e.g. when a peak window opens) go out as one
+# purchase order and one notification instead of a dozen. Manual lines
+# release their supplier's batch right away. Quantities are recomputed for
+# the whole batch at consolidation time from current stock plus what is
+# already on open purchase orders.
+POLL_SECONDS = max(1, PO_HOLD_SECONDS // 4)
+
+# Lines of every supplier with one older than the hold window, or a manual one
+DUE_LINES_SQL = """
+    SELECT o.id, o.item_id, COALESCE(i.supplier, i.category) AS supplier, o.is_peak_hour,
+           i.name AS item_name, i.location, i.current_stock, i.base_threshold, i.max_capacity,
+           i.case_pack, i.min_order_qty,
+           COALESCE(s.lead_time_hours, :default_lead) AS lead_time_hours,
+           COALESCE((
+               SELECT SUM(p.quantity_ordered) FROM restock_orders p
+               WHERE p.item_id = o.item_id AND p.status = 'pending' AND p.purchase_order_id IS NOT NULL
+           ), 0) AS on_order
+    FROM restock_orders o
+    JOIN inventory_items i ON i.id = o.item_id
+    LEFT JOIN suppliers s ON s.name = COALESCE(i.supplier, i.category)
+    WHERE o.purchase_order_id IS NULL AND o.status = 'pending'
+      AND COALESCE(i.supplier, i.category) IN (
+          SELECT COALESCE(wi.supplier, wi.category)
+          FROM restock_orders w
+          JOIN inventory_items wi ON wi.id = w.item_id
+          WHERE w.purchase_order_id IS NULL AND w.status = 'pending'
+          GROUP BY 1
+          HAVING MIN(w.triggered_at) <= datetime('now', :hold) OR MAX(w.triggered_by = 'manual')
+      )
+    ORDER BY supplier, o.id
+"""
+
+INSERT_POS_SQL = """
+    INSERT INTO purchase_orders (supplier, is_peak_hour, line_count, total_units)
+    SELECT p.value ->> 0, p.value ->> 1, p.value ->> 2, p.value ->> 3
+    FROM json_each(:orders) p
+    ORDER BY p.key
+    RETURNING id, supplier
+"""
+
+
+_wakeup = None
+_task = None
+
+def order_quantities(stock, target, capacity, case_pack, min_qty, lead_demand) -> np.ndarray:
+    """
+    Units to order per line: enough to be back at `target` after the extra
+    lead-time demand, at least the minimum order quantity, in whole cases.
+    Rounding up to a case is pulled back one case where it would overflow
+    capacity, as long as the minimum still holds. 0 when stock (with what
+    is on order) already covers the target.
+    """
+    stock = np.asarray(stock, dtype=np.int64)
+    lead = np.ceil(np.asarray(lead_demand, dtype=np.float64)).astype(np.int64)
+    pack = np.maximum(np.asarray(case_pack, dtype=np.int64), 1)
+    floor = np.maximum(np.asarray(min_qty, dtype=np.int64), 1)
+    shortfall = np.asarray(target, dtype=np.int64) + lead - stock
+    quantity = np.maximum(shortfall, floor)
+    quantity = -(-quantity // pack) * pack
+    overflow = (quantity > np.asarray(capacity, dtype=np.int64) + lead - stock) & (quantity - pack >= floor)
+    quantity = np.where(overflow, quantity - pack, quantity)
+    return np.where(shortfall > 0, quantity, 0)
+
+def plan_batch(lines: dict, now_hour: int = None) -> dict:
+    """
+    Quantities and purchase orders for a batch of due lines given as column
+    arrays (DUE_LINES_SQL's columns), sorted by supplier and not empty.
+    Returns per-line quantities and, per supplier, its slice of the lines
+    and how many of them order anything. An item tops up once per batch:
+    when it has several lines (say an auto and a manual one) the first
+    carries the quantity and the rest order 0.
+    """
+    item_ids = np.asarray(lines["item_id"], dtype=np.int64)
+    capacity = np.asarray(lines["max_capacity"], dtype=np.int64)
+    base = np.asarray(lines["base_threshold"], dtype=np.int64)
+
+    # Forecast targets already cover forecast.LEAD_TIME_HOURS of demand;
+    # slower suppliers need the rest of their lead time on top
+    target = capacity.copy()
+    lead = np.zeros(len(item_ids))
+    plan_ids, _, plan_targets = forecast.forecaster.plan(
+        forecast.current_hour() if now_hour is None else now_hour, item_ids
+    )
+    if len(plan_ids):
+        order = np.argsort(plan_ids)
+        found = np.searchsorted(plan_ids[order], item_ids).clip(0, len(plan_ids) - 1)
+        has_plan = plan_ids[order][found] == item_ids
+        planned = plan_targets[order][found]
+        target = np.where(has_plan, np.minimum(np.maximum(planned, base), capacity), capacity)
+        extra_hours = np.asarray(lines["lead_time_hours"], dtype=np.int64) - forecast.LEAD_TIME_HOURS
+        start = (forecast.current_hour() if now_hour is None else now_hour) + forecast.LEAD_TIME_HOURS
+        lead = forecast.demand_over(item_ids, np.where(has_plan, extra_hours, 0), start)
+
+    # Units already on open purchase orders count as stock
+    stock = np.asarray(lines["current_stock"], dtype=np.int64) + np.asarray(lines["on_order"], dtype=np.int64)
+    quantities = order_quantities(stock, target, capacity, lines["case_pack"], lines["min_order_qty"], lead)
+    _, first = np.unique(item_ids, return_index=True)
+    repeat = np.ones(len(item_ids), dtype=bool)
+    repeat[first] = False
+    quantities[repeat] = 0
+    suppliers = np.asarray(lines["supplier"], dtype=object)
+    starts = np.flatnonzero(np.r_[True, suppliers[1:] != suppliers[:-1]])
+    ends = np.r_[starts[1:], len(suppliers)]
+    totals = np.add.reduceat(quantities, starts)
+    counts = np.add.reduceat((quantities > 0).astype(np.int64), starts)
+    peaks = np.maximum.reduceat(np.asarray(lines["is_peak_hour"], dtype=np.int64), starts)
+    return {
+        "quantities": quantities,
+        "orders": [
+            (suppliers[s], int(peak), int(count), int(total), s, e)
+            for s, e, count, total, peak in zip(
+                starts.tolist(), ends.tolist(), counts.tolist(), totals.tolist(), peaks.tolist()
+            )
+        ],
+    }
+
+def _columns(rows) -> dict:
+    return dict(zip(rows[0].keys(), zip(*rows)))
+
+async def consolidate_once(hold_seconds: int = PO_HOLD_SECONDS) -> dict:
+    """Turn every due supplier batch into a purchase order; returns what was done."""
+    started = time.perf_counter()
+    async with pool.write() as db:
+        rows = await db.execute_fetchall(DUE_LINES_SQL, {
+            "hold": f"-{hold_seconds} seconds", "default_lead": forecast.LEAD_TIME_HOURS,
+        })
+        if not rows:
+            return {"purchase_orders": 0, "lines": 0}
+        t = time.perf_counter()
+        lines = _columns(rows)
+        batch = plan_batch(lines)
+        plan_ms = round((time.perf_counter() - t) * 1000, 2)
+
+        # A supplier whose lines are all covered gets no purchase order
+        orders = [o for o in batch["orders"] if o[2]]
+        created = {}
+        if orders:
+            created = {po["supplier"]: po["id"] for po in await db.execute_fetchall(INSERT_POS_SQL, {
+                "orders": json.dumps([list(o[:4]) for o in orders]),
+            })}
+        quantities = batch["quantities"].tolist()
+        assignments = []
+        for supplier, peak, count, total, s, e in orders:
+            po_id = created[supplier]
+            ordering = [i for i in range(s, e) if quantities[i]]
+            assignments.extend((po_id, quantities[i], lines["id"][i]) for i in ordering)
+            # One digest per supplier order
+            await enqueue_restock(db, [
+                {"order_id": lines["id"][i], "item_name": lines["item_name"][i], "quantity": quantities[i],
+                 "location": lines["location"][i], "supplier": supplier, "purchase_order_id": po_id}
+                for i in ordering
+            ], peak)
+        await db.executemany(
+            "UPDATE restock_orders SET purchase_order_id = ?, quantity_ordered = ? WHERE id = ?", assignments,
+        )
+        # Lines that order nothing (an item's repeat lines, or stock that
+        # recovered while they waited) are cancelled so they don't hold up
+        # the item's next order
+        cancelled = [lines["id"][i] for i, quantity in enumerate(quantities) if not quantity]
+        if cancelled:
+            await db.execute(
+                "UPDATE restock_orders SET status = 'cancelled' WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(cancelled),),
+            )
+
+    events.publish("order", lines["id"], source="consolidation")
+    report = {
+        "purchase_orders": len(created),
+        "lines": len(rows),
+        "cancelled": len(cancelled),
+        "plan_ms": plan_ms,
+        "total_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+    print(f"Consolidated {report['lines']} order lines into {report['purchase_orders']} purchase orders")
+    return report
+
+def wake():
+    """Check for due batches now, e.g. after a manual order."""
+    if _wakeup is not None:
+        _wakeup.set()
+
+async def _consolidator():
+    while True:
+        _wakeup.clear()
+        try:
+            await consolidate_once()
+        except Exception as e:
+            print(f"Purchase order consolidation error: {e}")
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+def start():
+    global _wakeup, _task
+    if _task is None:
+        _wakeup = asyncio.Event()
+        _task = asyncio.create_task(_consolidator())
+
+async def stop():
+    global _task
+    if _task is None:
+        return
+    _task.cancel()
+    try:
+        await _task
+    except asyncio.CancelledError:
+        pass
+    _task = None
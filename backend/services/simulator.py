@@ -0,0 +1,255 @@
+import functools
+import json
+import math
+from datetime import datetime, timedelta, timezone
+from statistics import NormalDist
+import numpy as np
+from config import PO_HOLD_SECONDS
+from database import pool
+from services import forecast, peak_calendar
+from services.peak_hours import PEAK_MULTIPLIER
+from services.purchase_orders import order_quantities
+
+# Offline what-if runs of the reorder rule for items without a forecast
+# plan: an item is ordered when its stock is at or below
+# int(base_threshold * peak multiplier) and it has no pending order. The
+# order is topped up to max_capacity in whole cases and lands after its
+# supplier's lead time. Each scenario is one draw of hourly demand for
+# every item. Scenarios x items are simulated as NumPy arrays one hour at a
+# time, in chunks of items sized to stay in cache. Every setting sees the
+# same draws, so differences between settings come from the policy.
+QUANTILE_LEVELS = 1024       # hourly demand is drawn as one of this many Poisson quantiles
+LAM_MIN = 0.01               # smallest nonzero hourly rate in the quantile table...
+LAM_MAX = 1000.0             # ...and the largest; rates are rounded to the nearest of
+LAM_RATIO = 1.04             # a geometric grid, so within 2%
+DEMAND_LEVELS = 8            # scenario demand levels (lognormal quantiles, mean 1)
+CHUNK_CELLS = 1_000_000      # scenarios x items per chunk
+SYNTHETIC_COVER_HOURS = 24   # without recorded demand an item uses its base threshold in this long...
+PEAK_SURGE = 1.0             # ...and (1 + PEAK_SURGE) times that rate at full peak intensity
+
+ITEMS_SQL = """
+    SELECT i.id, i.name, i.location, i.current_stock, i.base_threshold, i.max_capacity,
+           i.case_pack, i.min_order_qty,
+           COALESCE(s.lead_time_hours, :default_lead) AS lead_time_hours,
+           COALESCE((SELECT SUM(o.quantity_ordered) FROM restock_orders o
+                     WHERE o.item_id = i.id AND o.status = 'pending'), 0) AS pending_quantity
+    FROM inventory_items i
+    LEFT JOIN suppliers s ON s.name = COALESCE(i.supplier, i.category)
+"""
+
+@functools.cache
+def _poisson_table():
+    """(rates, quantiles): quantiles[r * QUANTILE_LEVELS + j] is the (j + 0.5) / QUANTILE_LEVELS quantile of Poisson(rates[r])."""
+    steps = math.ceil(math.log(LAM_MAX / LAM_MIN) / math.log(LAM_RATIO))
+    rates = np.r_[0.0, LAM_MIN * LAM_RATIO ** np.arange(steps + 1)]
+    k = np.arange(int(LAM_MAX + 10 * math.sqrt(LAM_MAX) + 10))
+    log_factorial = np.cumsum(np.log(np.maximum(k, 1)))
+    log_pmf = k * np.log(rates[1:, None]) - rates[1:, None] - log_factorial
+    cdf = np.cumsum(np.exp(log_pmf), axis=1)
+    levels = (np.arange(QUANTILE_LEVELS) + 0.5) / QUANTILE_LEVELS
+    quantiles = np.zeros((len(rates), QUANTILE_LEVELS), dtype=np.int16)
+    quantiles[1:] = [np.searchsorted(row, levels).clip(max=len(k) - 1) for row in cdf]
+    return rates, quantiles.ravel()
+
+def _table_offsets(lam: np.ndarray) -> np.ndarray:
+    """Offsets into the quantile table of the grid rates nearest to `lam`."""
+    rates, _ = _poisson_table()
+    with np.errstate(divide="ignore"):
+        rows = np.rint(np.log(np.maximum(lam, 0) / LAM_MIN) / math.log(LAM_RATIO)) + 1
+    rows = np.where(lam < LAM_MIN / 2, 0, np.clip(rows, 1, len(rates) - 1))
+    return (rows * QUANTILE_LEVELS).astype(np.int32)
+
+def demand_levels(sigma: float, levels: int = DEMAND_LEVELS) -> np.ndarray:
+    """Per-level demand multipliers: lognormal(sigma) quantile midpoints, mean 1."""
+    z = np.array([NormalDist().inv_cdf((j + 0.5) / levels) for j in range(levels)])
+    return np.exp(sigma * z - sigma ** 2 / 2)
+
+def hourly_intensity(locations, start: datetime, hours: int) -> np.ndarray:
+    """(len(locations), hours) peak intensity per hour; the busiest 15 minutes of each hour counts."""
+    index = peak_calendar.current()
+    per_hour = 60 // peak_calendar.BUCKET_MINUTES
+    steps = [start + timedelta(minutes=peak_calendar.BUCKET_MINUTES * b) for b in range(hours * per_hour)]
+    out = np.empty((len(locations), hours), dtype=np.float32)
+    for row, location in enumerate(locations):
+        values = np.fromiter((index.intensity(location, ts) for ts in steps), dtype=np.float32)
+        out[row] = values.reshape(hours, per_hour).max(axis=1)
+    return out
+
+async def load_items(locations=None) -> dict:
+    """Every item (or those in `locations`) as column arrays of ITEMS_SQL."""
+    sql, params = ITEMS_SQL, {"default_lead": forecast.LEAD_TIME_HOURS}
+    if locations:
+        sql += " WHERE i.location IN (SELECT value FROM json_each(:locations))"
+        params["locations"] = json.dumps(list(locations))
+    sql += " ORDER BY i.id"
+    async with pool.read() as db:
+        rows = await db.execute_fetchall(sql, params)
+    keys = ("id", "name", "location", "current_stock", "base_threshold", "max_capacity",
+            "case_pack", "min_order_qty", "lead_time_hours", "pending_quantity")
+    if not rows:
+        return {key: np.zeros(0, dtype=np.int64) for key in keys}
+    return {key: np.asarray(column) for key, column in zip(keys, zip(*rows))}
+
+def demand_rates(items: dict, intensity: np.ndarray, start_hour: int, recorded: bool = True) -> np.ndarray:
+    """
+    (items, hours) expected units per hour: the forecast's hour-of-week rates
+    for items with recorded consumption, otherwise the synthetic profile
+    (base_threshold per SYNTHETIC_COVER_HOURS, surging with peak intensity).
+    `intensity` is per item.
+    """
+    base = np.asarray(items["base_threshold"], dtype=np.float32) / SYNTHETIC_COVER_HOURS
+    rates = base[:, None] * (1 + PEAK_SURGE * intensity)
+    if recorded:
+        f = forecast.forecaster
+        rows = f.known_rows(items["id"])
+        known = rows >= 0
+        known[known] = f.has_history[rows[known]]
+        slots = forecast.hour_of_week(np.arange(start_hour, start_hour + intensity.shape[1]))
+        rates[known] = f.rates[rows[known]][:, slots]
+    return rates
+
+def scenario_inputs(items: dict, hours: int, recorded: bool = True, start: datetime = None) -> tuple:
+    """(rates, intensity), both (items, hours), from the top of the current hour (or `start`)."""
+    start = start or datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    locations, inverse = np.unique(np.asarray(items["location"], dtype=str), return_inverse=True)
+    intensity = hourly_intensity(locations.tolist(), start, hours)[inverse]
+    rates = demand_rates(items, intensity, int(start.timestamp()) // 3600, recorded)
+    return rates, intensity
+
+def _chunk(items: dict, sl: slice, rates, intensity, setting, levels, scenarios: int, seed: int, chunk: int):
+    threshold_scale, capacity_scale, multiplier = setting
+    _, table = _poisson_table()
+    hours = rates.shape[1]
+    width = sl.stop - sl.start
+    base = np.asarray(items["base_threshold"][sl], dtype=np.float64) * threshold_scale
+    # int() of the effective threshold, as in services.peak_hours
+    thresholds = (base[None, :] * (1 + (multiplier - 1) * intensity[sl].T)).astype(np.int32)
+    capacity = (np.asarray(items["max_capacity"][sl]) * capacity_scale).astype(np.int64)
+    case_pack = np.asarray(items["case_pack"][sl], dtype=np.int64)
+    min_qty = np.asarray(items["min_order_qty"][sl], dtype=np.int64)
+    # Lines wait out the purchase order hold before the supplier's lead time starts
+    lead = np.maximum(
+        np.ceil((np.asarray(items["lead_time_hours"][sl]) * 3600 + PO_HOLD_SECONDS) / 3600), 1,
+    ).astype(np.int64)
+    # (hours, levels, items) table offsets; scenarios are split evenly over the levels
+    offsets = _table_offsets(levels[None, :, None] * rates[sl].T[:, None, :])
+    blocks = np.array_split(np.arange(scenarios), len(levels))
+
+    stock = np.repeat(np.asarray(items["current_stock"][sl], dtype=np.int32)[None, :], scenarios, axis=0)
+    lowest = stock.copy()
+    pending = np.zeros((scenarios, width), dtype=bool)
+    on_hand = np.zeros(width, dtype=np.int64)
+    orders = np.zeros(width, dtype=np.int64)
+    flat = np.empty((scenarios, width), dtype=np.int32)
+    demand = np.empty((scenarios, width), dtype=np.int16)
+    due = np.zeros((scenarios, width), dtype=bool)
+    deliveries = [[] for _ in range(hours)]
+
+    # Orders already pending land after the lead time, in every scenario
+    open_quantity = np.asarray(items["pending_quantity"][sl], dtype=np.int64)
+    for col in np.flatnonzero(open_quantity):
+        cells = np.arange(scenarios) * width + col
+        pending.ravel()[cells] = True
+        if lead[col] < hours:
+            deliveries[lead[col]].append((cells, np.full(scenarios, open_quantity[col])))
+
+    rng = np.random.default_rng([seed, chunk])
+    for hour in range(hours):
+        for cells, quantity in deliveries[hour]:
+            stock.ravel()[cells] += quantity.astype(np.int32)
+            pending.ravel()[cells] = False
+        draws = rng.integers(0, QUANTILE_LEVELS, (scenarios, width), dtype=np.uint16)
+        for level, block in enumerate(blocks):
+            np.add(offsets[hour, level], draws[block[0]:block[-1] + 1], out=flat[block[0]:block[-1] + 1])
+        np.take(table, flat, out=demand)
+        # Below zero is demand that went unmet
+        np.subtract(stock, demand, out=stock)
+        np.minimum(lowest, stock, out=lowest)
+        np.maximum(stock, 0, out=stock)
+        on_hand += stock.sum(axis=0)
+
+        # The sweep: at/below the effective threshold and nothing pending
+        np.less_equal(stock, thresholds[hour], out=due)
+        np.greater(due, pending, out=due)
+        hit = np.flatnonzero(due)
+        if not hit.size:
+            continue
+        col = hit % width
+        quantity = order_quantities(stock.ravel()[hit], capacity[col], capacity[col], case_pack[col], min_qty[col], 0)
+        pending.ravel()[hit] = True
+        orders += np.bincount(col, minlength=width)
+        arrival = hour + lead[col]
+        for at in np.unique(arrival[arrival < hours]):
+            landing = arrival == at
+            deliveries[at].append((hit[landing], quantity[landing]))
+
+    return (lowest < 0).mean(axis=0), on_hand / (scenarios * hours), orders / scenarios
+
+def simulate(items: dict, rates: np.ndarray, intensity: np.ndarray, settings, scenarios: int = 1000,
+             sigma: float = 0.25, seed: int = 7) -> list:
+    """
+    Run every (threshold_scale, capacity_scale, peak_multiplier) setting over
+    the same `scenarios` demand draws. `rates` and `intensity` are per item
+    and hour. Returns per setting the per-item stockout probability (any
+    hour with unmet demand), average on-hand stock and orders placed.
+    """
+    count = len(items["id"])
+    width = max(1, CHUNK_CELLS // scenarios)
+    levels = demand_levels(sigma, min(DEMAND_LEVELS, scenarios))
+    results = []
+    for setting in settings:
+        stockout, on_hand, orders = (np.zeros(count) for _ in range(3))
+        for chunk, start in enumerate(range(0, count, width)):
+            sl = slice(start, min(start + width, count))
+            stockout[sl], on_hand[sl], orders[sl] = _chunk(
+                items, sl, rates, intensity, setting, levels, scenarios, seed, chunk,
+            )
+        results.append({
+            "threshold_scale": setting[0], "capacity_scale": setting[1], "peak_multiplier": setting[2],
+            "stockout_probability": stockout, "avg_on_hand": on_hand, "orders": orders,
+        })
+    return results
+
+def _best(results: list, target: float) -> np.ndarray:
+    """
+    Per item, the index into `results` with the least average stock among
+    those within `target` stockout probability (fewest orders on a tie), or
+    the least stockout probability when none is.
+    """
+    stockout = np.stack([r["stockout_probability"] for r in results])
+    on_hand = np.stack([r["avg_on_hand"] for r in results])
+    orders = np.stack([r["orders"] for r in results])
+    within = stockout <= target
+    cost = np.where(within, on_hand + orders * 1e-9, np.inf)
+    best = cost.argmin(axis=0)
+    missed = ~within.any(axis=0)
+    best[missed] = stockout[:, missed].argmin(axis=0)
+    return best
+
+def recommend(results: list, target: float = 0.05) -> dict:
+    """
+    PEAK_MULTIPLIER is global, so it is chosen first: the multiplier under
+    which the most items can meet `target` (least total stock on a tie).
+    Thresholds and capacities are then chosen per item under it.
+    """
+    by_multiplier = {}
+    for r in results:
+        by_multiplier.setdefault(r["peak_multiplier"], []).append(r)
+    scores = {}
+    for multiplier, group in by_multiplier.items():
+        best = _best(group, target)
+        picked = [group[b] for b in best]
+        within = sum(p["stockout_probability"][i] <= target for i, p in enumerate(picked))
+        stock = sum(p["avg_on_hand"][i] for i, p in enumerate(picked))
+        scores[multiplier] = (-within, stock)
+    multiplier = min(scores, key=scores.get)
+    group = by_multiplier[multiplier]
+    return {
+        "peak_multiplier": multiplier,
+        "settings": group,
+        "best": _best(group, target),
+    }
+
+def current_setting() -> tuple:
+    """(threshold_scale, capacity_scale, peak_multiplier) of the live configuration."""
+    return (1.0, 1.0, PEAK_MULTIPLIER)
@@ -0,0 +1,248 @@
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from database import pool
+from services import analytics
+
+# Append-only history of every stock change, kept in stock_movements.
+# inventory_items.current_stock is the running total of an item's rows: it
+# only changes through apply_movements, which appends the rows and moves the
+# stock and status in the same transaction. Demand forecasting learns
+# per-item consumption from the 'consumption' rows.
+
+# Consumption older than this is rolled up to one row per item and hour,
+# which is all the forecast reads...
+HOURLY_AFTER_DAYS = 2
+# ...and anything older than this (beyond the forecast's history window)
+# is folded into a single 'opening' balance row per item.
+RETENTION_DAYS = 180
+COMPACT_BATCH = 50_000      # ledger ids per compaction transaction
+
+def movement_kind(delta: int) -> str:
+    return "consumption" if delta < 0 else "adjustment"
+
+def status_for(stock: str) -> str:
+    """SQL for the base status of an inventory_items row holding `stock` units."""
+    return f"""CASE
+        WHEN {stock} <= base_threshold / 2 THEN 'critical'
+        WHEN {stock} <= base_threshold THEN 'low'
+        ELSE 'ok'
+    END"""
+
+APPLY_DELTAS_SQL = f"""
+    UPDATE inventory_items
+    SET current_stock = current_stock + d.value,
+        status = {status_for("current_stock + d.value")},
+        last_updated = CURRENT_TIMESTAMP
+    FROM json_each(:deltas) d
+    WHERE inventory_items.id = CAST(d.key AS INTEGER)
+    RETURNING *
+"""
+
+async def record_movements(db, movements):
+    """
+    Append (item_id, kind, delta, stock_after, source) rows and fold them
+    into the usage rollups. Call on the writer connection inside the
+    transaction that changed the stock.
+    """
+    movements = [m for m in movements if m[2] != 0]
+    if movements:
+        await db.executemany(
+            """INSERT INTO stock_movements (item_id, kind, delta, stock_after, source)
+               VALUES (?, ?, ?, ?, ?)""",
+            movements,
+        )
+        # The writer lock makes the new ids one consecutive run
+        [last] = await (await db.execute("SELECT last_insert_rowid()")).fetchone()
+        await analytics.rollup_movements(db, last - len(movements) + 1, last)
+
+async def apply_movements(db, movements) -> list:
+    """
+    Apply (item_id, kind, delta, source) movements on the writer connection:
+    one UPDATE ... RETURNING moves every touched item's stock and status,
+    then the ledger rows are appended with their running stock_after.
+    Returns the updated rows; movements for unknown items are dropped.
+    """
+    movements = list(movements)
+    deltas = {}
+    for item_id, _, delta, _ in movements:
+        deltas[item_id] = deltas.get(item_id, 0) + delta
+    if not deltas:
+        return []
+    rows = await db.execute_fetchall(APPLY_DELTAS_SQL, {"deltas": json.dumps(deltas)})
+
+    # Replay each item's movements forward from its stock before the batch
+    running = {r["id"]: r["current_stock"] - deltas[r["id"]] for r in rows}
+    ledger = []
+    for item_id, kind, delta, source in movements:
+        if item_id in running:
+            running[item_id] += delta
+            ledger.append((item_id, kind, delta, running[item_id], source))
+    await record_movements(db, ledger)
+    return rows
+
+KINDS = ("consumption", "restock", "adjustment")
+
+def parse_update(update) -> tuple:
+    """
+    Validate one bulk/ingest update: {"item_id", "current_stock"} sets the
+    stock, {"item_id", "delta"[, "kind"]} moves it. Returns
+    (item_id, absolute, value, kind); raises ValueError.
+    """
+    if not isinstance(update, dict):
+        raise ValueError("update must be an object")
+    item_id = update.get("item_id")
+    if not isinstance(item_id, int) or isinstance(item_id, bool):
+        raise ValueError("item_id must be an integer")
+    if ("current_stock" in update) == ("delta" in update):
+        raise ValueError("give exactly one of current_stock or delta")
+    absolute = "current_stock" in update
+    value = update["current_stock"] if absolute else update["delta"]
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError("current_stock/delta must be an integer")
+    if absolute and value < 0:
+        raise ValueError("current_stock must be >= 0")
+    kind = update.get("kind")
+    if kind is not None and kind not in KINDS:
+        raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+    return item_id, absolute, value, kind
+
+async def apply_updates(db, updates: list, source: str) -> tuple:
+    """
+    Apply a batch of bulk/ingest updates in the caller's write transaction:
+    one read of the stock the updates are relative to, then apply_movements.
+    A delta that would take an item below 0 is rejected as
+    "insufficient_stock" (earlier updates in the batch count). Returns
+    (rows, results, deltas) with one result per update, in order, and the
+    net delta per applied item.
+    """
+    results = [None] * len(updates)
+    parsed = []
+    for n, update in enumerate(updates):
+        try:
+            parsed.append((n, *parse_update(update)))
+        except ValueError as e:
+            item_id = update.get("item_id") if isinstance(update, dict) else None
+            results[n] = {"item_id": item_id, "result": "invalid", "detail": str(e)}
+
+    item_ids = sorted({p[1] for p in parsed})
+    current = {}
+    if item_ids:
+        current = {r[0]: r[1] for r in await db.execute_fetchall(
+            "SELECT id, current_stock FROM inventory_items WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(item_ids),),
+        )}
+
+    movements, moved = [], []
+    for n, item_id, absolute, value, kind in parsed:
+        if item_id not in current:
+            results[n] = {"item_id": item_id, "result": "not_found"}
+            continue
+        delta = value - current[item_id] if absolute else value
+        if current[item_id] + delta < 0:
+            results[n] = {"item_id": item_id, "result": "insufficient_stock", "current_stock": current[item_id]}
+            continue
+        current[item_id] += delta
+        movements.append((item_id, kind or movement_kind(delta), delta, source))
+        moved.append(n)
+
+    rows = await apply_movements(db, movements)
+    by_id = {r["id"]: r for r in rows}
+    deltas = {}
+    for n, (item_id, _, delta, _) in zip(moved, movements):
+        row = by_id.get(item_id)
+        if row is None:
+            results[n] = {"item_id": item_id, "result": "not_found"}
+            continue
+        deltas[item_id] = deltas.get(item_id, 0) + delta
+        results[n] = {
+            "item_id": item_id, "result": "applied",
+            "current_stock": row["current_stock"], "status": row["status"],
+        }
+    return rows, results, deltas
+
+# Roll each (item, hour) group of old consumption rows in the id range into
+# one row stamped at the start of the hour
+ROLLUP_HOURLY_SQL = """
+    INSERT INTO stock_movements (item_id, kind, delta, stock_after, source, created_at)
+    SELECT g.item_id, 'consumption', g.delta, last.stock_after, 'compacted', g.hour
+    FROM (
+        SELECT item_id, SUM(delta) AS delta, MAX(id) AS last_id,
+               strftime('%Y-%m-%d %H:00:00', created_at) AS hour
+        FROM stock_movements
+        WHERE id BETWEEN :lo AND :hi AND kind = 'consumption' AND created_at < :cutoff
+        GROUP BY item_id, hour
+        HAVING COUNT(*) > 1
+    ) g
+    JOIN stock_movements last ON last.id = g.last_id
+"""
+
+# Fold everything before the cutoff into one 'opening' row per item
+ROLLUP_OPENING_SQL = """
+    INSERT INTO stock_movements (item_id, kind, delta, stock_after, source, created_at)
+    SELECT g.item_id, 'opening', g.delta, last.stock_after, 'compacted', last.created_at
+    FROM (
+        SELECT item_id, SUM(delta) AS delta, MAX(id) AS last_id
+        FROM stock_movements
+        WHERE id BETWEEN :lo AND :hi AND created_at < :cutoff
+        GROUP BY item_id
+        HAVING COUNT(*) > 1
+    ) g
+    JOIN stock_movements last ON last.id = g.last_id
+"""
+
+async def _compact_tier(rollup_sql: str, delete_where: str, cutoff: str) -> int:
+    """Run one rollup over the ledger in id chunks, each its own transaction."""
+    async with pool.read() as db:
+        lo, hi = await (await db.execute("SELECT MIN(id), MAX(id) FROM stock_movements")).fetchone()
+    if lo is None:
+        return 0
+    removed = 0
+    # Rows the rollups append get ids above `hi`, so they aren't revisited
+    for start in range(lo, hi + 1, COMPACT_BATCH):
+        params = {"lo": start, "hi": min(start + COMPACT_BATCH - 1, hi), "cutoff": cutoff}
+        async with pool.write() as db:
+            before = db.total_changes
+            await db.execute(rollup_sql, params)
+            inserted = db.total_changes - before
+            if not inserted:
+                continue
+            # Only groups that were rolled up (HAVING COUNT(*) > 1) lose their rows
+            await db.execute(
+                f"""DELETE FROM stock_movements
+                    WHERE id BETWEEN :lo AND :hi AND created_at < :cutoff AND {delete_where}""",
+                params,
+            )
+            removed += db.total_changes - before - inserted
+    return removed
+
+async def compact(now: datetime = None) -> dict:
+    """Periodic ledger compaction; item balances are unchanged by it."""
+    started = time.perf_counter()
+    now = now or datetime.now(timezone.utc)
+    stamp = lambda days: (now - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+    hourly = await _compact_tier(
+        ROLLUP_HOURLY_SQL,
+        """kind = 'consumption' AND (item_id, strftime('%Y-%m-%d %H', created_at)) IN (
+               SELECT item_id, strftime('%Y-%m-%d %H', created_at) FROM stock_movements
+               WHERE id BETWEEN :lo AND :hi AND kind = 'consumption' AND created_at < :cutoff
+               GROUP BY 1, 2 HAVING COUNT(*) > 1
+           )""",
+        stamp(HOURLY_AFTER_DAYS),
+    )
+    opening = await _compact_tier(
+        ROLLUP_OPENING_SQL,
+        """item_id IN (
+               SELECT item_id FROM stock_movements
+               WHERE id BETWEEN :lo AND :hi AND created_at < :cutoff
+               GROUP BY item_id HAVING COUNT(*) > 1
+           )""",
+        stamp(RETENTION_DAYS),
+    )
+    report = {
+        "hourly_rows_removed": hourly,
+        "opening_rows_removed": opening,
+        "total_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+    print(f"Ledger compaction — {hourly + opening} rows folded in {report['total_ms']} ms")
+    return report
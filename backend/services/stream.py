@@ -0,0 +1,203 @@
+import asyncio
+import json
+import os
+from collections import deque
+import orjson
+from database import pool
+from models.orders import ORDER_SELECT, RestockOrder
+from services import events, inventory_cache, metrics
+
+# Push channel for dashboards. One hub task turns change-feed events into
+# row-level diffs, serialized once per lounge filter and shared by every
+# client; per-client cost is a deque append. A client that falls more than
+# CLIENT_QUEUE diffs behind has its backlog merged into one diff (latest row
+# wins), and one whose merged backlog grows past RESYNC_ROWS is sent a fresh
+# snapshot instead. Recent diffs are kept so a reconnect can resume by seq.
+CLIENT_QUEUE = 64
+RESYNC_ROWS = 5000
+REPLAY_SIZE = 1000
+SNAPSHOT_ORDERS = 100
+KEEPALIVE_SECONDS = 15
+
+# Event ids are "<epoch>-<seq>"; seq restarts with the process, the epoch tells runs apart
+_epoch = os.urandom(4).hex()
+
+def _dumps(value) -> bytes:
+    return orjson.dumps(value)
+
+class Diff:
+    """Latest rows for the items and orders changed up to `seq`; None marks a deleted item."""
+
+    __slots__ = ("seq", "items", "orders", "_wire")
+
+    def __init__(self, seq: int, items: dict, orders: dict):
+        self.seq, self.items, self.orders = seq, items, orders
+        self._wire = {}
+
+    def size(self) -> int:
+        return len(self.items) + len(self.orders)
+
+    def merge(self, later: "Diff") -> "Diff":
+        return Diff(later.seq, {**self.items, **later.items}, {**self.orders, **later.orders})
+
+    def wire(self, location: str = None) -> bytes:
+        if location not in self._wire:
+            items = [r for r in self.items.values() if r is not None and location in (None, r.location)]
+            orders = [r for r in self.orders.values() if location in (None, r.location)]
+            deleted = [item_id for item_id, r in self.items.items() if r is None]
+            self._wire[location] = _frame("diff", self.seq, {
+                "seq": self.seq, "items": items, "deleted_items": deleted, "orders": orders,
+            })
+        return self._wire[location]
+
+def _frame(event: str, seq: int, data) -> bytes:
+    payload = data if isinstance(data, bytes) else _dumps(data)
+    return b"id: %s-%d\nevent: %s\ndata: %s\n\n" % (_epoch.encode(), seq, event.encode(), payload)
+
+class Client:
+    def __init__(self):
+        self.pending = deque()
+        self.resync = False
+        self.ready = asyncio.Event()
+
+    def push(self, diff: Diff):
+        self.pending.append(diff)
+        if len(self.pending) > CLIENT_QUEUE:
+            merged = self.pending.popleft()
+            while self.pending:
+                merged = merged.merge(self.pending.popleft())
+            if merged.size() > RESYNC_ROWS:
+                self.resync = True
+                metrics.stream_coalesced.inc("resync")
+            else:
+                self.pending.append(merged)
+                metrics.stream_coalesced.inc("merge")
+        self.ready.set()
+
+    def drain(self) -> list:
+        diffs = list(self.pending)
+        self.pending.clear()
+        self.ready.clear()
+        return diffs
+
+_clients: set = set()
+_history = deque(maxlen=REPLAY_SIZE)
+_hub_task = None
+last_seq = 0
+_orders_seq = 0         # last diff that touched an order
+_dropped_through = 0    # newest seq no longer in _history
+
+async def _order_rows(order_ids) -> dict:
+    async with pool.read() as db:
+        rows = await db.execute_fetchall(
+            f"SELECT {ORDER_SELECT} FROM restock_orders WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(sorted(order_ids)),),
+        )
+    return {r[0]: RestockOrder(*r) for r in rows}
+
+async def _hub():
+    global last_seq, _orders_seq, _dropped_through
+    queue = events.subscribe()
+    try:
+        while True:
+            # Everything already queued goes out as one diff
+            batch = [await queue.get()]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            item_ids, order_ids = set(), set()
+            for event in batch:
+                (item_ids if event["kind"] == "item" else order_ids).update(event["ids"])
+            # Rows as they are now; later events only make them newer
+            items = {item_id: inventory_cache.get(item_id) for item_id in item_ids}
+            orders = await _order_rows(order_ids) if order_ids else {}
+            diff = Diff(batch[-1]["seq"], items, orders)
+            last_seq = diff.seq
+            if orders:
+                _orders_seq = diff.seq
+            if len(_history) == _history.maxlen:
+                _dropped_through = _history[0].seq
+            _history.append(diff)
+            for client in _clients:
+                client.push(diff)
+    finally:
+        events.unsubscribe(queue)
+
+_order_snapshots: dict = {}   # location -> (seq, serialized orders)
+
+async def _orders_snapshot(location: str = None) -> bytes:
+    """Newest orders as JSON, re-read only once an order event has arrived since."""
+    cached = _order_snapshots.get(location)
+    if cached is not None and cached[0] == _orders_seq:
+        return cached[1]
+    seq = _orders_seq
+    where, params = ("WHERE location = ?", (location,)) if location else ("", ())
+    async with pool.read() as db:
+        rows = await db.execute_fetchall(
+            f"SELECT {ORDER_SELECT} FROM restock_orders {where} ORDER BY triggered_at DESC, id DESC LIMIT ?",
+            (*params, SNAPSHOT_ORDERS),
+        )
+    body = _dumps([RestockOrder(*r) for r in rows])
+    _order_snapshots[location] = (seq, body)
+    return body
+
+async def snapshot(location: str = None) -> bytes:
+    seq = last_seq
+    orders = await _orders_snapshot(location)
+    data = b'{"seq":%d,"items":%s,"orders":%s}' % (seq, inventory_cache.body(location), orders)
+    return _frame("snapshot", seq, data)
+
+def _resume_point(last_event_id: str):
+    """Diffs after the client's last seen event, or None when only a snapshot will do."""
+    try:
+        epoch, seq = last_event_id.rsplit("-", 1)
+        seq = int(seq)
+    except (AttributeError, ValueError):
+        return None
+    if epoch != _epoch or not _dropped_through <= seq <= last_seq:
+        return None
+    return [d for d in _history if d.seq > seq]
+
+async def subscribe(location: str = None, last_event_id: str = None):
+    """Async generator of SSE frames: a snapshot (or the missed diffs), then diffs as they happen."""
+    client = Client()
+    _clients.add(client)
+    try:
+        missed = _resume_point(last_event_id)
+        if missed is None:
+            yield await snapshot(location)
+        else:
+            for diff in missed:
+                yield diff.wire(location)
+        while True:
+            try:
+                await asyncio.wait_for(client.ready.wait(), timeout=KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+            diffs = client.drain()
+            if client.resync:
+                client.resync = False
+                yield await snapshot(location)
+                continue
+            for diff in diffs:
+                yield diff.wire(location)
+    finally:
+        _clients.discard(client)
+
+metrics.Gauge("stream_clients", "Connected /stream clients", (), lambda: {(): len(_clients)})
+
+def start():
+    global _hub_task
+    if _hub_task is None:
+        _hub_task = asyncio.create_task(_hub())
+
+async def stop():
+    global _hub_task
+    if _hub_task is None:
+        return
+    _hub_task.cancel()
+    try:
+        await _hub_task
+    except asyncio.CancelledError:
+        pass
+    _hub_task = None
@@ -0,0 +1,133 @@
+import os
+import socket
+import time
+from datetime import datetime, timezone
+from config import LEADER_LEASE_SECONDS
+from database import pool
+from services import analytics, inventory_cache, metrics
+from services.inventory_service import check_and_trigger_reorders, sweep_inputs
+
+# Scheduled sweeps for a deployment that may run several uvicorn workers.
+# A lease row in SQLite picks one leader; only it runs the scheduled sweeps
+# (stock-change sweeps stay with whichever worker made the change). Each
+# run only evaluates what could have changed since the previous one: rows
+# with a newer last_updated, lounges whose peak state moved, and items whose
+# forecast threshold moved. A run requested while one is in flight is folded
+# into a single follow-up run instead of queueing up.
+LEASE_NAME = "reorder_sweeps"
+# Above this share of all items an incremental run just sweeps everything
+FULL_SWEEP_RATIO = 0.5
+
+ACQUIRE_SQL = """
+    INSERT INTO scheduler_lease (name, holder, expires_at) VALUES (:name, :holder, :expires)
+    ON CONFLICT (name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at
+    WHERE scheduler_lease.holder = excluded.holder OR scheduler_lease.expires_at < :now
+    RETURNING holder
+"""
+
+holder = f"{socket.gethostname()}:{os.getpid()}:{os.urandom(3).hex()}"
+is_leader = False
+
+_running = False
+_rerun = False
+# What the last run saw; None forces the next run to sweep everything
+_high_water = None
+_peaks = None
+_plan = None
+
+async def renew_lease() -> bool:
+    """Take or extend the lease; returns whether this process leads."""
+    global is_leader
+    now = time.time()
+    async with pool.write() as db:
+        row = await (await db.execute(ACQUIRE_SQL, {
+            "name": LEASE_NAME, "holder": holder, "expires": now + LEADER_LEASE_SECONDS, "now": now,
+        })).fetchone()
+    leading = row is not None
+    if leading == is_leader:
+        return leading
+    print(f"Sweep leadership {'acquired' if leading else 'lost'} ({holder})")
+    is_leader = leading
+    # The rollup backfill is database-wide work, so it follows the lease
+    if leading:
+        # Another process may have swept in between; start from scratch
+        _forget()
+        await analytics.start()
+    else:
+        await analytics.stop()
+    return leading
+
+async def release_lease():
+    global is_leader
+    if not is_leader:
+        return
+    async with pool.write() as db:
+        await db.execute("DELETE FROM scheduler_lease WHERE name = ? AND holder = ?", (LEASE_NAME, holder))
+    is_leader = False
+    await analytics.stop()
+
+def _forget():
+    global _high_water, _peaks, _plan
+    _high_water = _peaks = _plan = None
+
+async def _dirty_items(now: datetime):
+    """Item ids to re-evaluate, or None for a full sweep; plus the new high-water mark."""
+    async with pool.read() as db:
+        [high_water] = await (await db.execute("SELECT CURRENT_TIMESTAMP")).fetchone()
+        changed = None
+        if _high_water is not None:
+            # >= because CURRENT_TIMESTAMP has one-second resolution
+            changed = {r[0] for r in await db.execute_fetchall(
+                "SELECT id FROM inventory_items WHERE last_updated >= ?", (_high_water,)
+            )}
+    inputs = sweep_inputs(now)
+    peaks = {location: (multiplier, peak) for location, multiplier, peak in inputs["peaks"]}
+    plan = {item_id: (threshold, target) for item_id, threshold, target in inputs["plan"]}
+    state = (high_water, peaks, plan)
+    if changed is None or _peaks is None or _plan is None or set(peaks) != set(_peaks):
+        return None, state
+
+    for location, value in peaks.items():
+        if _peaks[location] != value:
+            changed.update(r.id for r in inventory_cache.items(location))
+    changed.update(item_id for item_id, value in plan.items() if _plan.get(item_id) != value)
+    # Items that lost their forecast fall back to the base threshold
+    changed.update(item_id for item_id in _plan if item_id not in plan)
+    if len(changed) > FULL_SWEEP_RATIO * max(len(inventory_cache.items()), 1):
+        return None, state
+    return changed, state
+
+async def run_sweep(now: datetime = None) -> dict:
+    """
+    Scheduled reorder sweep. Skips when another process holds the lease;
+    coalesces with a run already in progress.
+    """
+    global _running, _rerun, _high_water, _peaks, _plan
+    if not is_leader:
+        return {"skipped": "not_leader"}
+    if _running:
+        _rerun = True
+        metrics.sweep_runs.inc("scheduled", "coalesced")
+        return {"skipped": "coalesced"}
+    _running = True
+    try:
+        while True:
+            _rerun = False
+            started = datetime.now(timezone.utc) if now is None else now
+            item_ids, state = await _dirty_items(started)
+            if item_ids is None:
+                report = await check_and_trigger_reorders(now=started)
+            elif item_ids:
+                report = await check_and_trigger_reorders(sorted(item_ids), now=started)
+            else:
+                report = {"status_updates": 0, "orders_created": 0}
+            report["scope"] = "full" if item_ids is None else "incremental"
+            report["evaluated"] = len(inventory_cache.items()) if item_ids is None else len(item_ids)
+            _high_water, _peaks, _plan = state
+            if not _rerun or now is not None:
+                return report
+    except Exception:
+        _forget()
+        raise
+    finally:
+        _running = False
@@ -0,0 +1,111 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from config import DB_PATH
+from database import connect
+from services import inventory_cache, purchase_orders
+from services.inventory_service import apply_sweep, evaluate_sweep, publish_sweep, sweep_inputs
+
+# Full sweeps split by location across worker processes. Each worker reads
+# its partition on its own connection in parallel with the others, then
+# takes SQLite's write lock just long enough to apply its result. The app
+# process still owns the forecast, peak calendar, cache and event bus: it
+# ships each partition its inputs and publishes what the workers wrote.
+_executor = None
+_executor_size = 0
+
+def partition(sizes: dict, shards: int) -> list:
+    """Greedily balance locations (by item count) into at most `shards` groups."""
+    groups = [[0, []] for _ in range(min(shards, len(sizes)))]
+    for location, size in sorted(sizes.items(), key=lambda kv: (-kv[1], kv[0])):
+        group = min(groups, key=lambda g: g[0])
+        group[0] += size
+        group[1].append(location)
+    return [sorted(locations) for _, locations in groups]
+
+def _get_executor(processes: int) -> ProcessPoolExecutor:
+    global _executor, _executor_size
+    if _executor is None or _executor_size != processes:
+        shutdown()
+        # spawn, not fork: the app process runs aiosqlite and scheduler threads
+        _executor = ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn"))
+        _executor_size = processes
+    return _executor
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+async def _sweep_partition(db_path: str, inputs: dict, locations: list) -> dict:
+    started = time.perf_counter()
+    db = await connect(db_path)
+    try:
+        evaluated = await evaluate_sweep(db, inputs, locations=locations)
+        # End the read snapshot, then queue for the write lock behind the
+        # other partitions (busy_timeout) instead of failing on upgrade
+        await db.commit()
+        t = time.perf_counter()
+        await db.execute("BEGIN IMMEDIATE")
+        lock_wait_ms = round((time.perf_counter() - t) * 1000, 2)
+        try:
+            result = await apply_sweep(db, evaluated)
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            raise
+    finally:
+        await db.close()
+    result["timings_ms"]["lock_wait_ms"] = lock_wait_ms
+    result["timings_ms"]["total_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+def sweep_partition(db_path: str, inputs: dict, locations: list) -> dict:
+    """Worker process entry point."""
+    return asyncio.run(_sweep_partition(db_path, inputs, locations))
+
+async def run(now: datetime, processes: int, db_path: str = DB_PATH) -> dict:
+    """Sweep every location, one partition per worker process."""
+    started = time.perf_counter()
+    groups = partition(inventory_cache.location_sizes(), processes)
+    executor = _get_executor(processes)
+    loop = asyncio.get_running_loop()
+    results = await asyncio.gather(*(
+        loop.run_in_executor(executor, sweep_partition, db_path, sweep_inputs(now, locations=group), group)
+        for group in groups
+    ), return_exceptions=True)
+
+    changed, order_ids, shards = [], [], []
+    for group, result in zip(groups, results):
+        if isinstance(result, BaseException):
+            # A failed partition leaves its locations for the next sweep
+            print(f"Reorder sweep failed for {len(group)} locations ({group[0]}…): {result}")
+            shards.append({"locations": len(group), "error": str(result)})
+            continue
+        changed.extend(result["changed"])
+        order_ids.extend(result["order_ids"])
+        shards.append({
+            "locations": len(group),
+            "status_updates": len(result["changed"]),
+            "orders_created": len(result["order_ids"]),
+            "timings_ms": result["timings_ms"],
+        })
+    publish_sweep(changed, sorted(order_ids))
+    if order_ids:
+        # The lines are notified once consolidated into purchase orders
+        purchase_orders.wake()
+
+    report = {
+        "status_updates": len(changed),
+        "orders_created": len(order_ids),
+        "shards": shards,
+        "total_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+    print(
+        f"Reorder sweep — {len(changed)} status changes, {len(order_ids)} orders raised "
+        f"across {len(groups)} partitions in {report['total_ms']} ms"
+    )
+    return report
@@ -1,35 +1,52 @@
-import os
-from twilio.rest import Client
-from dotenv import load_dotenv
-
-dotenv_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), ".env")
-load_dotenv(dotenv_path)
-
-TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
-TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
-WHATSAPP_TO = os.getenv("WHATSAPP_TO")
-TWILIO_WHATSAPP_FROM = os.getenv("TWILIO_WHATSAPP_FROM", "whatsapp:+14155238886")
-
-def send_whatsapp_alert(item_name: str, quantity: int, is_peak: bool) -> bool:
-    if not TWILIO_ACCOUNT_SID or not TWILIO_AUTH_TOKEN or not WHATSAPP_TO:
-        print(f"[WHATSAPP SKIPPED] Restock: {item_name} x{quantity} {'PEAK' if is_peak else ''}")
-        return False
-        
-    try:
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        
-        peak_tag = " *PEAK HOURS - URGENT*" if is_peak else ""
-        body = f"📦 *Restock Alert*{peak_tag}\n\n*Item:* {item_name}\n*Quantity:* {quantity}\n*Priority:* {'HIGH' if is_peak else 'Normal'}"
-        
-        to_number = WHATSAPP_TO if WHATSAPP_TO.startswith('whatsapp:') else f"whatsapp:{WHATSAPP_TO}"
-
-        message = client.messages.create(
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from config import TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, WHATSAPP_TO, TWILIO_WHATSAPP_FROM
+
+def format_whatsapp_alert(lines: list, is_peak: bool) -> str:
+    peak_tag = " *PEAK HOURS - URGENT*" if is_peak else ""
+    if len(lines) == 1:
+        items = f"*Item:* {lines[0]['item_name']}\n*Quantity:* {lines[0]['quantity']}"
+    else:
+        items = "\n".join(f"• {l['item_name']} x{l['quantity']}" for l in lines)
+    po = lines[0].get("purchase_order_id")
+    po_tag = f"\n*PO #{po}* — {lines[0]['supplier']}" if po else ""
+    return f"📦 *Restock Alert*{peak_tag}{po_tag}\n\n{items}\n*Priority:* {'HIGH' if is_peak else 'Normal'}"
+
+class WhatsAppTransport:
+    """
+    Twilio's client is synchronous, so sends run on a small thread pool
+    instead of the event loop. Pass a client with the Twilio
+    `messages.create` signature to swap the transport out.
+    """
+
+    def __init__(self, client=None, max_workers: int = 4):
+        self._client = client
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="twilio")
+
+    @property
+    def configured(self) -> bool:
+        return self._client is not None or bool(TWILIO_ACCOUNT_SID and TWILIO_AUTH_TOKEN and WHATSAPP_TO)
+
+    def _get_client(self):
+        if self._client is None:
+            from twilio.rest import Client
+            self._client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        return self._client
+
+    def _send_sync(self, body: str):
+        to_number = WHATSAPP_TO if WHATSAPP_TO and WHATSAPP_TO.startswith('whatsapp:') else f"whatsapp:{WHATSAPP_TO}"
+        message = self._get_client().messages.create(
             from_=TWILIO_WHATSAPP_FROM,
             body=body,
             to=to_number
         )
-        print(f"WhatsApp sent for {item_name}. SID: {message.sid}")
-        return True
-    except Exception as e:
-        print(f"WhatsApp failed: {e}")
-        return False
+        return message.sid
+
+    async def send(self, lines: list, is_peak: bool):
+        body = format_whatsapp_alert(lines, is_peak)
+        loop = asyncio.get_running_loop()
+        sid = await loop.run_in_executor(self._executor, self._send_sync, body)
+        print(f"WhatsApp sent for {len(lines)} item(s). SID: {sid}")
+
+    async def close(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,129 @@
+"""
+What-if runs of the reorder rule: stockout probability, average stock and
+orders per item for a grid of threshold settings, and a recommendation.
+
+    python simulate.py --days 7 --scenarios 500 --threshold-scales 0.5,0.75,1,1.25,1.5 --out thresholds.csv
+
+Each setting scales every item's base_threshold and max_capacity and sets
+the peak multiplier (services.peak_hours.PEAK_MULTIPLIER); the live
+configuration is always included. Demand is the forecast's recorded
+hour-of-week rates, or base_threshold per day shaped by peak intensity for
+items without history (all items with --demand synthetic). The
+recommended multiplier is the one under which the most items stay within
+--target-stockout; each item then gets the setting with the least average
+stock that does. Nothing is written to the database.
+"""
+import argparse
+import asyncio
+import contextlib
+import csv
+import itertools
+import json
+import sys
+import time
+from database import init_db, pool
+from services import forecast, simulator
+
+def _floats(text: str) -> list:
+    return [float(v) for v in text.split(",") if v.strip()]
+
+async def _load(locations, recorded: bool) -> dict:
+    # Older databases lack the purchasing columns and tables load_items reads
+    await init_db()
+    await pool.open()
+    try:
+        if recorded:
+            await forecast.load()
+        return await simulator.load_items(locations)
+    finally:
+        await pool.close()
+
+def _write_csv(path: str, items: dict, current: dict, chosen: list):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow([
+            "id", "name", "location", "base_threshold", "max_capacity",
+            "stockout_probability", "avg_on_hand", "orders",
+            "recommended_base_threshold", "recommended_max_capacity",
+            "recommended_stockout_probability", "recommended_avg_on_hand", "recommended_orders",
+        ])
+        for i, setting in enumerate(chosen):
+            base, capacity = int(items["base_threshold"][i]), int(items["max_capacity"][i])
+            writer.writerow([
+                int(items["id"][i]), items["name"][i], items["location"][i], base, capacity,
+                round(current["stockout_probability"][i], 4), round(current["avg_on_hand"][i], 1),
+                round(current["orders"][i], 2),
+                int(base * setting["threshold_scale"]), int(capacity * setting["capacity_scale"]),
+                round(setting["stockout_probability"][i], 4), round(setting["avg_on_hand"][i], 1),
+                round(setting["orders"][i], 2),
+            ])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--scenarios", type=int, default=500)
+    parser.add_argument("--threshold-scales", type=_floats, default=[0.5, 0.75, 1.0, 1.25, 1.5, 2.0])
+    parser.add_argument("--capacity-scales", type=_floats, default=[1.0])
+    parser.add_argument("--peak-multipliers", type=_floats, default=[simulator.current_setting()[2]])
+    parser.add_argument("--demand", choices=("recorded", "synthetic"), default="recorded")
+    parser.add_argument("--demand-sigma", type=float, default=0.25, help="spread of scenario demand levels")
+    parser.add_argument("--target-stockout", type=float, default=0.05)
+    parser.add_argument("--location", action="append", help="only this lounge (repeatable)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="write per-item results and recommendations to this CSV")
+    args = parser.parse_args()
+
+    current = simulator.current_setting()
+    settings = list(itertools.product(args.threshold_scales, args.capacity_scales, args.peak_multipliers))
+    if current not in settings:
+        settings.append(current)
+    hours = args.days * 24
+
+    # Keep the app's own prints out of stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        items = asyncio.run(_load(args.location, args.demand == "recorded"))
+    if not len(items["id"]):
+        raise SystemExit("No inventory items to simulate.")
+    started = time.perf_counter()
+    rates, intensity = simulator.scenario_inputs(items, hours, recorded=args.demand == "recorded")
+    results = simulator.simulate(items, rates, intensity, settings, args.scenarios, args.demand_sigma, args.seed)
+    elapsed = time.perf_counter() - started
+
+    advice = simulator.recommend(results, args.target_stockout)
+    chosen = [advice["settings"][b] for b in advice["best"]]
+    live = results[settings.index(current)]
+    report = {
+        "items": len(items["id"]),
+        "scenarios": args.scenarios,
+        "hours": hours,
+        "elapsed_s": round(elapsed, 2),
+        "settings": [
+            {
+                "threshold_scale": r["threshold_scale"],
+                "capacity_scale": r["capacity_scale"],
+                "peak_multiplier": r["peak_multiplier"],
+                "mean_stockout_probability": round(float(r["stockout_probability"].mean()), 4),
+                "items_within_target": int((r["stockout_probability"] <= args.target_stockout).sum()),
+                "avg_on_hand_units": round(float(r["avg_on_hand"].sum()), 1),
+                "orders_per_day": round(float(r["orders"].sum()) / args.days, 1),
+            }
+            for r in results
+        ],
+        "recommended": {
+            "peak_multiplier": advice["peak_multiplier"],
+            "items_within_target": sum(
+                int(s["stockout_probability"][i] <= args.target_stockout) for i, s in enumerate(chosen)
+            ),
+            "items_changed": sum(
+                (s["threshold_scale"], s["capacity_scale"]) != current[:2] for s in chosen
+            ),
+            "avg_on_hand_units": round(sum(float(s["avg_on_hand"][i]) for i, s in enumerate(chosen)), 1),
+        },
+    }
+    if args.out:
+        _write_csv(args.out, items, live, chosen)
+        report["out"] = args.out
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
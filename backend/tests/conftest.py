@@ -0,0 +1,42 @@
+import asyncio
+import glob
+import os
+import sys
+import tempfile
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Settings are read once at import, so point them at scratch files (and away
+# from any real SMTP/Twilio/Groq credentials in .env) before the app loads
+_scratch = tempfile.mkdtemp(prefix="inventory-tests-")
+os.environ["DB_PATH"] = os.path.join(_scratch, "inventory.db")
+os.environ["PEAK_SCHEDULE_PATH"] = os.path.join(_scratch, "flight_schedule.csv")
+for _name in ("EMAIL_SENDER", "WAREHOUSE_EMAIL", "TWILIO_ACCOUNT_SID", "GROQ_API_KEY"):
+    os.environ[_name] = ""
+
+async def _session(scenario):
+    import httpx
+    import main
+    from services.auth_service import create_access_token
+    await main.startup()
+    try:
+        headers = {"Authorization": f"Bearer {create_access_token('tests@example.com')}"}
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as client:
+            return await scenario(client)
+    finally:
+        await main.shutdown()
+
+@pytest.fixture
+def app():
+    """
+    run(scenario): starts the app on a freshly seeded demo database and
+    awaits scenario(client), an httpx client signed in as a test user.
+    """
+    def run(scenario):
+        for path in glob.glob(os.environ["DB_PATH"] + "*"):
+            os.remove(path)
+        return asyncio.run(_session(scenario))
+    return run
@@ -0,0 +1,55 @@
+import pytest
+from database import pool
+
+DAYS = ["2024-04-30", "2024-05-01", "2024-05-02", "2024-05-03", "2024-05-04"]
+
+async def _usage(client, **params) -> list:
+    async with pool.write() as db:
+        await db.execute("DELETE FROM usage_category_daily")
+        await db.executemany(
+            """INSERT INTO usage_category_daily (bucket, location, category, units_consumed)
+               VALUES (?, 'main', 'food', 1)""",
+            [(day,) for day in DAYS],
+        )
+    r = await client.get("/analytics/usage", params={"grain": "day", **params})
+    return [row["bucket"] for row in r.json()["series"]]
+
+@pytest.mark.parametrize("since, until, buckets", [
+    # until at midnight: that day's bucket starts at until, so it is out
+    ("2024-05-01", "2024-05-03", ["2024-05-01", "2024-05-02"]),
+    ("2024-05-01T00:00", "2024-05-03T00:00:00", ["2024-05-01", "2024-05-02"]),
+    ("2024-05-01", "2024-05-03T00:00+00:00", ["2024-05-01", "2024-05-02"]),
+    # ...any later and the day has started
+    ("2024-05-01", "2024-05-03T00:00:01", ["2024-05-01", "2024-05-02", "2024-05-03"]),
+    # since mid-day keeps the day it falls in
+    ("2024-05-01T10:00", "2024-05-02", ["2024-05-01"]),
+])
+def test_day_grain_is_half_open_at_midnight(app, since, until, buckets):
+    async def scenario(client):
+        return await _usage(client, since=since, until=until)
+
+    assert app(scenario) == buckets
+
+def test_adjacent_ranges_count_each_day_once(app):
+    async def scenario(client):
+        first = await _usage(client, since="2024-04-30", until="2024-05-02")
+        second = await _usage(client, since="2024-05-02", until="2024-05-05")
+        return first + second
+
+    assert app(scenario) == DAYS
+
+def test_top_items_counts_the_until_day_once(app):
+    async def scenario(client):
+        async with pool.write() as db:
+            await db.execute("DELETE FROM usage_item_daily")
+            await db.executemany(
+                "INSERT INTO usage_item_daily (bucket, item_id, units_consumed) VALUES (?, 1, 1)",
+                [(day,) for day in DAYS],
+            )
+        totals = []
+        for since, until in (("2024-04-30", "2024-05-02"), ("2024-05-02", "2024-05-05")):
+            [top] = (await client.get("/analytics/top", params={"since": since, "until": until})).json()
+            totals.append(top["units_consumed"])
+        return totals
+
+    assert app(scenario) == [2, 3]
@@ -0,0 +1,38 @@
+import time
+import jwt
+import pytest
+from config import SECRET_KEY
+from services import auth_service
+from services.auth_service import TokenCache
+
+def test_cached_token_expires_at_its_exp():
+    cache = TokenCache()
+    cache.put("a", {"sub": "x", "exp": 100}, now=50)
+    assert cache.get("a", now=99) == {"sub": "x", "exp": 100}
+    assert cache.get("a", now=100) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert "a" not in cache._entries
+
+def test_expired_entries_are_swept_on_insert():
+    cache = TokenCache()
+    cache.put("old", {"exp": 100}, now=50)
+    cache.put("live", {"exp": 300}, now=50)
+    cache.put("new", {"exp": 400}, now=200)
+    assert list(cache._entries) == ["live", "new"]
+
+def test_least_recently_used_goes_first_at_capacity():
+    cache = TokenCache(maxsize=2)
+    cache.put("a", {"exp": 1000}, now=1)
+    cache.put("b", {"exp": 1000}, now=1)
+    cache.get("a", now=2)
+    cache.put("c", {"exp": 1000}, now=3)
+    assert list(cache._entries) == ["a", "c"]
+
+def test_decode_token_rejects_a_token_that_expired_in_the_cache(monkeypatch):
+    monkeypatch.setattr(auth_service, "token_cache", TokenCache())
+    claims = {"sub": "tests@example.com", "exp": int(time.time()) - 10}
+    token = jwt.encode(claims, SECRET_KEY, algorithm=auth_service.ALGORITHM)
+    # Verified and cached while it was still valid
+    auth_service.token_cache.put(token, claims, now=claims["exp"] - 60)
+    with pytest.raises(auth_service.InvalidToken):
+        auth_service.decode_token(token)
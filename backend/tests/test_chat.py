@@ -0,0 +1,54 @@
+import asyncio
+import json
+import pytest
+from bench import fake_llm_server, stubs
+from services import llm_client
+
+def _tokens(body: str) -> list:
+    events = [line[len("data: "):] for line in body.splitlines() if line.startswith("data: ")]
+    assert events[-1] == "[DONE]"
+    return [json.loads(e)["token"] for e in events[:-1]]
+
+def test_completion_slots_cap_concurrency_and_time_out(monkeypatch):
+    monkeypatch.setattr(llm_client, "_semaphore", None)
+    monkeypatch.setattr(llm_client, "CHAT_MAX_CONCURRENCY", 2)
+    monkeypatch.setattr(llm_client, "CHAT_MAX_QUEUE", 1)
+    monkeypatch.setattr(llm_client, "CHAT_QUEUE_TIMEOUT_SECONDS", 0.05)
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def chat():
+            async with llm_client.completion_slot():
+                await release.wait()
+
+        running = [asyncio.create_task(chat()) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(chat())
+        await asyncio.sleep(0.01)
+        overloaded = llm_client.overloaded()
+        with pytest.raises(llm_client.ChatBusy):
+            await queued
+        release.set()
+        await asyncio.gather(*running)
+        return overloaded, llm_client.overloaded()
+
+    assert asyncio.run(scenario()) == (True, False)
+
+def test_chat_streams_tokens_then_replays_the_answer(app, monkeypatch):
+    monkeypatch.setattr(fake_llm_server, "TOKENS", 5)
+    monkeypatch.setattr(fake_llm_server, "TTFT_MS", 0)
+    monkeypatch.setattr(fake_llm_server, "TOKEN_DELAY_MS", 0)
+
+    async def scenario(client):
+        llm_client.set_client(stubs.fake_llm_client())
+        question = {"message": "which items are critical at lounge main?"}
+        first = await client.post("/chat/", json=question)
+        second = await client.post("/chat/", json=question)
+        return first, second
+
+    first, second = app(scenario)
+    assert _tokens(first.text) == [f"tok{i} " for i in range(5)]
+    assert "x-cache" not in first.headers
+    assert second.headers["x-cache"] == "hit"
+    assert _tokens(second.text) == _tokens(first.text)
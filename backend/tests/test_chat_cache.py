@@ -0,0 +1,52 @@
+import itertools
+import pytest
+from services import chat_cache
+
+_versions = itertools.count()
+
+@pytest.fixture
+def version():
+    # A new data version starts from an empty cache. The chat route looks
+    # a question up (syncing the version) before it stores the answer.
+    version = ("test", next(_versions))
+    chat_cache.lookup("", version)
+    return version
+
+def test_exact_and_near_duplicates_hit(version):
+    chat_cache.store("Which items are running low right now?", version, ["two items"])
+    assert chat_cache.lookup("which items are running LOW?", version) == ["two items"]
+    assert chat_cache.lookup("which items are runing low", version) == ["two items"]
+
+@pytest.mark.parametrize("stored, asked", [
+    ("how many units of item 12 are left", "how many units of item 13 are left"),
+    ("what is running low in lounge A", "what is running low in lounge B"),
+    ("what is running low in lounge A", "what is running low in lounge"),
+    ("which orders were raised in the last 24 hours", "which orders were raised in the last 48 hours"),
+])
+def test_questions_about_different_items_or_lounges_miss(version, stored, asked):
+    chat_cache.store(stored, version, ["cached answer"])
+    assert chat_cache.lookup(stored, version) == ["cached answer"]
+    assert chat_cache.lookup(asked, version) is None
+
+@pytest.mark.parametrize("stored, asked", [
+    ("which liquor items are running low on stock", "which liquor items are not running low on stock"),
+    ("which orders were placed during peak hours", "which orders were placed during off peak hours"),
+    ("which items are critical", "which items aren't critical"),
+    ("what was consumed today", "what was consumed yesterday"),
+])
+def test_negated_or_qualified_questions_miss(version, stored, asked):
+    chat_cache.store(stored, version, ["cached answer"])
+    assert chat_cache.lookup(stored, version) == ["cached answer"]
+    assert chat_cache.lookup(asked, version) is None
+
+def test_answer_from_an_older_version_is_not_stored(version):
+    newer = (*version, "newer")
+    chat_cache.lookup("which items are running low", version)
+    # The data changed while that answer streamed, and another question was cached since
+    chat_cache.lookup("what is critical", newer)
+    chat_cache.store("what is critical", newer, ["newer answer"])
+
+    chat_cache.store("which items are running low", version, ["stale answer"])
+
+    assert chat_cache.lookup("which items are running low", newer) is None
+    assert chat_cache.lookup("what is critical", newer) == ["newer answer"]
@@ -0,0 +1,67 @@
+import asyncio
+import sqlite3
+import pytest
+from database import ConnectionPool
+
+def _run(path, scenario):
+    async def session():
+        pool = ConnectionPool(path, readers=2)
+        await pool.open()
+        try:
+            async with pool.write() as db:
+                await db.execute("CREATE TABLE t (n INTEGER)")
+            return await scenario(pool)
+        finally:
+            await pool.close()
+    return asyncio.run(session())
+
+def test_failed_write_rolls_back(tmp_path):
+    async def scenario(pool):
+        with pytest.raises(RuntimeError):
+            async with pool.write() as db:
+                await db.execute("INSERT INTO t VALUES (1)")
+                raise RuntimeError("boom")
+        async with pool.write() as db:
+            await db.execute("INSERT INTO t VALUES (2)")
+        async with pool.read() as db:
+            return [r[0] for r in await db.execute_fetchall("SELECT n FROM t")]
+
+    assert _run(str(tmp_path / "pool.db"), scenario) == [2]
+
+def test_readers_are_read_only_and_see_committed_rows_during_a_write(tmp_path):
+    async def scenario(pool):
+        async with pool.write() as db:
+            await db.execute("INSERT INTO t VALUES (1)")
+        async with pool.write() as writer:
+            await writer.execute("INSERT INTO t VALUES (2)")
+            # WAL: readers aren't blocked by the open write transaction
+            async with pool.read() as reader:
+                during = [r[0] for r in await reader.execute_fetchall("SELECT n FROM t")]
+                with pytest.raises(sqlite3.OperationalError):
+                    await reader.execute("INSERT INTO t VALUES (3)")
+        return during
+
+    assert _run(str(tmp_path / "pool.db"), scenario) == [1]
+
+def test_reads_wait_for_a_free_connection(tmp_path):
+    async def scenario(pool):
+        release = asyncio.Event()
+
+        async def hold():
+            async with pool.read():
+                await release.wait()
+
+        async def third():
+            async with pool.read() as db:
+                return (await (await db.execute("SELECT COUNT(*) FROM t")).fetchone())[0]
+
+        holders = [asyncio.create_task(hold()) for _ in range(pool.size)]
+        await asyncio.sleep(0.01)
+        waiting = asyncio.create_task(third())
+        await asyncio.sleep(0.05)
+        blocked = not waiting.done()
+        release.set()
+        await asyncio.gather(*holders)
+        return blocked, await asyncio.wait_for(waiting, 1)
+
+    assert _run(str(tmp_path / "pool.db"), scenario) == (True, 0)
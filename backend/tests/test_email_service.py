@@ -0,0 +1,54 @@
+import asyncio
+import socket
+import pytest
+from services.email_service import EmailTransport
+
+aiosmtpd = pytest.importorskip("aiosmtpd.controller")
+
+class _Inbox:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@pytest.fixture
+def smtp_server():
+    inbox = _Inbox()
+    controller = aiosmtpd.Controller(inbox, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    yield controller, inbox
+    controller.stop()
+
+def test_digest_goes_to_the_configured_server(smtp_server):
+    controller, inbox = smtp_server
+    transport = EmailTransport(
+        hostname=controller.hostname, port=controller.port, use_tls=False,
+        username=None, password=None, sender="agent@lounge.test", recipient="warehouse@lounge.test",
+    )
+    lines = [
+        {"item_name": "Croissants", "quantity": 40, "location": "lounge-b", "supplier": "bakery", "purchase_order_id": 7},
+        {"item_name": "Fruit Basket", "quantity": 30, "location": "main", "supplier": "bakery", "purchase_order_id": 7},
+    ]
+
+    async def send_twice():
+        # The second digest reuses the open session
+        await transport.send(lines, is_peak=True)
+        await transport.send(lines[:1], is_peak=False)
+        await transport.close()
+
+    asyncio.run(send_twice())
+    assert transport.configured
+    assert [(m.mail_from, m.rcpt_tos) for m in inbox.messages] == [("agent@lounge.test", ["warehouse@lounge.test"])] * 2
+    first = inbox.messages[0].content.decode()
+    assert "Subject: Restock PO #7 (bakery): 2 items PEAK HOURS - URGENT" in first
+    assert "- Croissants [lounge-b]: 40" in first and "- Fruit Basket: 30" in first
+
+def test_transport_without_addresses_is_not_configured():
+    assert not EmailTransport(sender=None, recipient="warehouse@lounge.test").configured
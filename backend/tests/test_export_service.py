@@ -0,0 +1,19 @@
+import pytest
+from fastapi import HTTPException
+from services.export_service import db_timestamp
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-05-01", "2024-05-01 00:00:00"),
+    ("2024-05-01T10:00", "2024-05-01 10:00:00"),
+    ("2024-05-01T10:00Z", "2024-05-01 10:00:00"),
+    ("2024-05-01T10:00+05:30", "2024-05-01 04:30:00"),
+    ("2024-05-01T01:00+05:30", "2024-04-30 19:30:00"),
+    ("2024-05-01T20:00-07:00", "2024-05-02 03:00:00"),
+])
+def test_timestamps_compare_as_utc(value, expected):
+    assert db_timestamp(value, "since") == expected
+
+def test_invalid_timestamp_is_a_400():
+    with pytest.raises(HTTPException) as e:
+        db_timestamp("yesterday", "since")
+    assert e.value.status_code == 400
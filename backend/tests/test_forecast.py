@@ -0,0 +1,38 @@
+import asyncio
+from services import forecast
+from services.forecast import MIN_HISTORY_HOURS, DemandForecast
+from services.inventory_service import check_and_trigger_reorders
+
+def test_first_consumption_does_not_count_as_history():
+    f = DemandForecast()
+    f.observe(12, 85, abs_hour=1000)
+    ids, thresholds, targets = f.plan(1000)
+    assert ids.size == 0
+
+    for hour in range(1001, 1001 + MIN_HISTORY_HOURS):
+        f.observe(12, 5, abs_hour=hour)
+    assert f.plan(1000 + MIN_HISTORY_HOURS)[0].tolist() == [12]
+
+def test_fit_needs_enough_hours_of_consumption():
+    f = DemandForecast()
+    f.fit([([1, 2, 2, 2], [10, 10, 11, 12], [5.0, 1.0, 1.0, 1.0])], now_hour=100)
+    assert f.has_history.tolist() == [False, True]
+
+def test_cold_start_restock_then_drop_raises_an_order(app):
+    # Croissants: base_threshold 20, no recorded consumption yet
+    async def scenario(client):
+        assert (await client.put("/inventory/12", json={"current_stock": 100})).status_code == 200
+        r = await client.put("/inventory/12", json={"current_stock": 15})
+        assert r.json()["new_status"] == "low"
+        # Let the forecast observer and reorder worker see the change first
+        await asyncio.sleep(0.2)
+        assert forecast.forecaster.plan(forecast.current_hour(), [12])[0].size == 0
+
+        await check_and_trigger_reorders()
+        [item] = [i for i in (await client.get("/inventory/")).json() if i["id"] == 12]
+        orders = (await client.get("/orders/")).json()
+        return item, [o for o in orders if o["item_id"] == 12]
+
+    item, orders = app(scenario)
+    assert item["status"] == "low"
+    assert [(o["triggered_by"], o["status"]) for o in orders] == [("auto", "pending")]
@@ -0,0 +1,67 @@
+from config import DB_PATH
+from database import connect
+from services import events, inventory_cache
+
+async def _write_elsewhere(sql: str, params=()):
+    # Another app process: its own connection, not this process' pool
+    db = await connect(DB_PATH)
+    try:
+        await db.execute(sql, params)
+        await db.commit()
+    finally:
+        await db.close()
+
+def _stock(body: list, item_id: int) -> int:
+    [item] = [i for i in body if i["id"] == item_id]
+    return item["current_stock"]
+
+def test_write_through_another_connection_is_served(app):
+    # Hendricks Gin: 8 in stock
+    async def scenario(client):
+        first = await client.get("/inventory/")
+        etag = first.headers["etag"]
+        queue = events.subscribe()
+        try:
+            await _write_elsewhere("UPDATE inventory_items SET current_stock = 40 WHERE id = 2")
+            changed = await client.get("/inventory/", headers={"If-None-Match": etag})
+            event = queue.get_nowait()
+        finally:
+            events.unsubscribe(queue)
+        again = await client.get("/inventory/", headers={"If-None-Match": changed.headers["etag"]})
+        return first, changed, event, again
+
+    first, changed, event, again = app(scenario)
+    assert _stock(first.json(), 2) == 8
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != first.headers["etag"]
+    assert _stock(changed.json(), 2) == 40
+    assert (event["ids"], event["source"]) == ([2], "peer")
+    assert again.status_code == 304
+
+def test_etag_is_the_shared_change_position(app):
+    async def scenario(client):
+        await _write_elsewhere("DELETE FROM inventory_items WHERE id = 3")
+        r = await client.get("/inventory/")
+        db = await connect(DB_PATH)
+        try:
+            [latest] = await (await db.execute("SELECT MAX(seq) FROM inventory_changes")).fetchone()
+        finally:
+            await db.close()
+        return r, latest
+
+    r, latest = app(scenario)
+    assert r.headers["etag"] == f'W/"{latest}"'
+    assert 3 not in {i["id"] for i in r.json()}
+
+def test_reloads_when_the_log_was_pruned_past_it(app):
+    async def scenario(client):
+        await client.get("/inventory/")
+        await _write_elsewhere("UPDATE inventory_items SET current_stock = 41 WHERE id = 2")
+        await _write_elsewhere("UPDATE inventory_items SET current_stock = 42 WHERE id = 4")
+        await _write_elsewhere(
+            "DELETE FROM inventory_changes WHERE seq < (SELECT MAX(seq) FROM inventory_changes)"
+        )
+        await inventory_cache.sync()
+        return inventory_cache.get(2).current_stock, inventory_cache.get(4).current_stock
+
+    assert app(scenario) == (41, 42)
@@ -0,0 +1,8 @@
+def test_profiles_need_a_signed_in_user(app):
+    async def scenario(client):
+        anonymous = await client.get("/metrics/profiles", headers={"Authorization": ""})
+        scrape = await client.get("/metrics", headers={"Authorization": ""})
+        signed_in = await client.get("/metrics/profiles")
+        return anonymous.status_code, scrape.status_code, signed_in.status_code
+
+    assert app(scenario) == (401, 200, 200)
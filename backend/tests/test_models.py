@@ -0,0 +1,41 @@
+import json
+import orjson
+from fastapi.encoders import jsonable_encoder
+from database import pool
+from models.inventory import InventoryItem
+from models.orders import RestockOrder
+from services import inventory_cache
+
+def _previous_json(rows) -> bytes:
+    # What the endpoints sent before the row models: dict rows through
+    # jsonable_encoder and starlette's JSONResponse.render
+    content = jsonable_encoder([dict(r) for r in rows])
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+def test_row_models_encode_like_the_previous_dict_rows(app):
+    async def scenario(client):
+        # Non-ASCII text, NULLs and a fulfilled order with a millisecond timestamp
+        await client.post("/inventory/", json={
+            "name": "Crème brûlée 🍮", "category": "food", "current_stock": 1, "base_threshold": 5,
+            "max_capacity": 20, "unit": "pots", "location": "Zürich",
+        })
+        await client.post("/orders/manual/1")
+        await client.post("/orders/manual/2")
+        async with pool.read() as db:
+            [first] = await db.execute_fetchall("SELECT MIN(id) FROM restock_orders")
+        await client.put(f"/orders/{first[0]}/fulfill")
+
+        async with pool.read() as db:
+            items = await db.execute_fetchall("SELECT * FROM inventory_items ORDER BY id")
+            orders = await db.execute_fetchall("SELECT * FROM restock_orders ORDER BY triggered_at DESC, id DESC")
+        await inventory_cache.sync()
+        cached = sorted(inventory_cache.items(), key=lambda r: r.id)
+        page = await client.get("/orders/", params={"limit": 1000})
+        return items, orders, cached, page.content
+
+    items, orders, cached, page = app(scenario)
+    assert any(r["fulfilled_at"] for r in orders) and any(r["purchase_order_id"] is None for r in orders)
+    assert orjson.dumps([InventoryItem.from_row(r) for r in items]) == _previous_json(items)
+    assert orjson.dumps(cached) == _previous_json(items)
+    assert orjson.dumps([RestockOrder(*r) for r in orders]) == _previous_json(orders)
+    assert page == _previous_json(orders)
@@ -0,0 +1,42 @@
+import asyncio
+import sqlite3
+import pytest
+from database import init_db
+from routes.orders import CURSOR_CLAUSE, _order_filters, _page_sql
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("plans") / "inventory.db")
+    asyncio.run(init_db(path))
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+
+def _plan(db, sql: str, params) -> list:
+    return [row[3] for row in db.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+@pytest.mark.parametrize("filters, index", [
+    ({}, "idx_orders_triggered"),
+    ({"status": "pending"}, "idx_orders_status_triggered"),
+    ({"location": "main"}, "idx_orders_location_triggered"),
+    ({"item_id": 12}, "idx_orders_item_triggered"),
+    ({"since": "2024-05-01", "until": "2024-06-01"}, "idx_orders_triggered"),
+    ({"status": "fulfilled", "since": "2024-05-01"}, "idx_orders_status_triggered"),
+])
+@pytest.mark.parametrize("cursor", [False, True])
+def test_order_pages_read_an_index_in_order(db, filters, index, cursor):
+    clauses, params = _order_filters(**filters)
+    if cursor:
+        clauses.append(CURSOR_CLAUSE)
+        params.extend(["2024-05-15 10:00:00", 42])
+    # A single step: no USE TEMP B-TREE FOR ORDER BY after it
+    [step] = _plan(db, _page_sql(clauses), (*params, 100))
+
+    assert f"USING INDEX {index}" in step
+    if clauses:
+        # Only the unfiltered first page walks the whole index, newest first
+        assert step.startswith("SEARCH")
+
+def test_pending_order_lookup_uses_index(db):
+    plan = _plan(db, "SELECT 1 FROM restock_orders WHERE item_id = ? AND status = 'pending'", (12,))
+    assert plan == ["SEARCH restock_orders USING COVERING INDEX idx_orders_item_status (item_id=? AND status=?)"]
@@ -0,0 +1,51 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+import pytest
+from services import peak_calendar
+from services.peak_hours import PEAK_WINDOWS
+
+SCHEDULE = [
+    # The main lounge is only busy before a 03:00 UTC departure
+    {"lounge": "main", "timezone": "UTC", "departure": "03:00", "pax": 100},
+]
+
+def _index():
+    lounges = peak_calendar.build_from_schedule(SCHEDULE)
+    return peak_calendar.PeakIndex(lounges, "test", (peak_calendar._window_index(PEAK_WINDOWS), timezone.utc))
+
+def test_scheduled_lounge_uses_its_schedule():
+    index = _index()
+    assert index.intensity("main", datetime(2024, 5, 1, 2, 0, tzinfo=timezone.utc)) == 1.0
+    assert index.intensity("main", datetime(2024, 5, 1, 7, 0, tzinfo=timezone.utc)) == 0.0
+
+def test_unscheduled_lounge_falls_back_to_peak_windows():
+    index = _index()
+    start, _ = PEAK_WINDOWS[0]
+    assert index.intensity("lounge-b", datetime(2024, 5, 1, start, 0, tzinfo=timezone.utc)) == 1.0
+    assert index.intensity("lounge-b", datetime(2024, 5, 1, 2, 0, tzinfo=timezone.utc)) == 0.0
+
+def test_build_index_without_a_schedule_uses_peak_windows(tmp_path):
+    index = peak_calendar.build_index(str(tmp_path / "missing.csv"))
+    assert index.source == "PEAK_WINDOWS" and index.lounges == {}
+    values, _ = index._lookup("main")
+    assert values.max() == 1.0
+
+def test_schedule_that_failed_to_load_is_retried(tmp_path, monkeypatch):
+    monkeypatch.setattr(peak_calendar, "_index", None)
+    monkeypatch.setattr(peak_calendar, "_mtime", None)
+    path = str(tmp_path / "schedule.json")
+    with open(path, "w") as f:
+        json.dump([{"lounge": "main", "departure": "soon"}], f)
+    mtime = os.path.getmtime(path)
+    with pytest.raises(ValueError):
+        asyncio.run(peak_calendar.reload_if_changed(path))
+
+    # Fixed within the file system's mtime resolution
+    with open(path, "w") as f:
+        json.dump(SCHEDULE, f)
+    os.utime(path, (mtime, mtime))
+    asyncio.run(peak_calendar.reload_if_changed(path))
+    assert peak_calendar.current().source == path
+    assert peak_calendar.intensity("main", datetime(2024, 5, 1, 2, 0, tzinfo=timezone.utc)) == 1.0
@@ -0,0 +1,35 @@
+from models.inventory import InventoryItem
+from services import prompt_builder
+
+def _item(n: int, status: str) -> InventoryItem:
+    return InventoryItem(n, f"Item {n:04d}", "food", 5, 10, 50, "units", status, "main", None, None, 1, 0)
+
+def test_prompt_fits_its_budget_and_lists_the_urgent_items_first():
+    inventory = [_item(n, ("ok", "low", "critical")[n % 3]) for n in range(3000)]
+    prompt, omitted = prompt_builder.render_prompt(inventory, {"pending": 2}, [], token_budget=3000)
+    assert prompt_builder.estimate_tokens(prompt) <= 3000
+    assert omitted > 0
+    listed = [line for line in prompt.splitlines() if line.startswith("  - [")]
+    assert listed and all(line.startswith("  - [CRITICAL]") for line in listed)
+    assert f"... {1000 - len(listed)} more CRITICAL items not listed" in prompt
+    assert "... 1000 more OK items not listed" in prompt
+
+def test_small_inventory_is_listed_in_full():
+    inventory = [_item(1, "ok"), _item(2, "critical")]
+    prompt, omitted = prompt_builder.render_prompt(inventory, {}, [])
+    assert omitted == 0
+    assert prompt.index("[CRITICAL] Item 0002") < prompt.index("[OK] Item 0001")
+
+def test_prompt_is_rebuilt_only_after_a_change(app):
+    async def scenario(client):
+        first = await prompt_builder.get_system_prompt()
+        builds = prompt_builder.stats["builds"]
+        cached = await prompt_builder.get_system_prompt()
+        unchanged_builds = prompt_builder.stats["builds"]
+        await client.put("/inventory/1", json={"current_stock": 77})
+        rebuilt = await prompt_builder.get_system_prompt()
+        return first, cached, unchanged_builds - builds, rebuilt, prompt_builder.stats["builds"] - builds
+
+    first, cached, unchanged, rebuilt, after_change = app(scenario)
+    assert cached is first and unchanged == 0
+    assert after_change == 1 and "Stock: 77 bottles" in rebuilt
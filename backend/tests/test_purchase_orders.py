@@ -0,0 +1,70 @@
+import asyncio
+from database import pool
+from services import purchase_orders
+from services.inventory_service import check_and_trigger_reorders
+
+def _lines(**overrides) -> dict:
+    lines = {
+        "id": [1, 2], "item_id": [12, 12], "supplier": ["food", "food"], "is_peak_hour": [0, 0],
+        "item_name": ["Croissants"] * 2, "location": ["main"] * 2,
+        "current_stock": [10, 10], "base_threshold": [20, 20], "max_capacity": [60, 60],
+        "case_pack": [1, 1], "min_order_qty": [0, 0], "lead_time_hours": [4, 4], "on_order": [0, 0],
+    }
+    lines.update(overrides)
+    return lines
+
+def test_item_with_two_lines_tops_up_once():
+    batch = purchase_orders.plan_batch(_lines(), now_hour=1000)
+    assert batch["quantities"].tolist() == [50, 0]
+    assert [o[:4] for o in batch["orders"]] == [("food", 0, 1, 50)]
+
+def test_units_on_open_purchase_orders_count_as_stock():
+    one_line = {column: values[:1] for column, values in _lines(on_order=[30, 30]).items()}
+    batch = purchase_orders.plan_batch(one_line, now_hour=1000)
+    assert batch["quantities"].tolist() == [20]
+
+def test_covered_stock_orders_nothing():
+    # Minimum order and case rounding only apply to a real shortfall
+    stock, target, capacity = [60, 70, 55], [60, 60, 60], [80, 80, 80]
+    quantities = purchase_orders.order_quantities(stock, target, capacity, [12] * 3, [24] * 3, [0] * 3)
+    assert quantities.tolist() == [0, 0, 24]
+
+async def _item_lines(item_id: int) -> list:
+    async with pool.read() as db:
+        return [tuple(r) for r in await db.execute_fetchall(
+            """SELECT id, triggered_by, status, quantity_ordered, purchase_order_id IS NOT NULL
+               FROM restock_orders WHERE item_id = ? ORDER BY id""",
+            (item_id,),
+        )]
+
+def test_manual_and_auto_lines_for_one_item_stay_within_capacity(app):
+    # Croissants: max_capacity 60
+    async def scenario(client):
+        await client.put("/inventory/12", json={"current_stock": 5})
+        await check_and_trigger_reorders([12])
+        assert (await client.post("/orders/manual/12")).status_code == 200
+        await purchase_orders.consolidate_once(hold_seconds=0)
+        await asyncio.sleep(0.1)
+        consolidated = await _item_lines(12)
+        # Once the order arrives and stock runs down again, the item reorders
+        [ordered] = [line[0] for line in consolidated if line[2] == "pending"]
+        assert (await client.put(f"/orders/{ordered}/fulfill")).status_code == 200
+        await client.put("/inventory/12", json={"current_stock": 5})
+        await check_and_trigger_reorders([12])
+        return consolidated, await _item_lines(12)
+
+    consolidated, later = app(scenario)
+    assert [line[1:] for line in consolidated] == [("auto", "pending", 55, 1), ("manual", "cancelled", 55, 0)]
+    assert [line[1:3] for line in later[2:]] == [("auto", "pending")]
+
+def test_line_for_stock_that_recovered_is_cancelled(app):
+    async def scenario(client):
+        await client.put("/inventory/12", json={"current_stock": 5})
+        await check_and_trigger_reorders([12])
+        await client.put("/inventory/12", json={"current_stock": 60})
+        report = await purchase_orders.consolidate_once(hold_seconds=0)
+        return report, await _item_lines(12)
+
+    report, lines = app(scenario)
+    assert (report["purchase_orders"], report["cancelled"]) == (0, 1)
+    assert [line[1:] for line in lines] == [("auto", "cancelled", 55, 0)]
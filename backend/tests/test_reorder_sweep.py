@@ -0,0 +1,60 @@
+import asyncio
+from datetime import datetime, timezone
+from database import pool
+from services.inventory_service import check_and_trigger_reorders
+from services.peak_hours import get_peak_multiplier, is_peak_hour
+
+NOW = datetime(2024, 5, 1, 7, 30, tzinfo=timezone.utc)
+
+def _expected(item) -> tuple:
+    """The per-item rules the set-based sweep replaced (items without forecast history)."""
+    threshold = int(item["base_threshold"] * get_peak_multiplier(NOW, item["location"]))
+    stock = item["current_stock"]
+    status = "critical" if stock <= item["base_threshold"] // 2 else "low" if stock <= threshold else "ok"
+    order = None
+    if stock <= threshold:
+        order = (max(item["max_capacity"] - stock, 1), int(is_peak_hour(NOW, item["location"])))
+    return status, order
+
+async def _state():
+    async with pool.read() as db:
+        items = await db.execute_fetchall("SELECT * FROM inventory_items ORDER BY id")
+        orders = await db.execute_fetchall(
+            "SELECT item_id, quantity_ordered, is_peak_hour FROM restock_orders WHERE status = 'pending'"
+        )
+    return items, {o["item_id"]: (o["quantity_ordered"], o["is_peak_hour"]) for o in orders}
+
+def test_sweep_matches_the_per_item_rules(app):
+    async def scenario(client):
+        async with pool.write() as db:
+            await db.execute("UPDATE inventory_items SET current_stock = (id * 7) % max_capacity")
+        before, _ = await _state()
+        first = await check_and_trigger_reorders(now=NOW)
+        items, orders = await _state()
+        second = await check_and_trigger_reorders(now=NOW)
+        return before, first, items, orders, second
+
+    before, first, items, orders, second = app(scenario)
+    expected = {item["id"]: _expected(item) for item in before}
+    assert {item["id"]: item["status"] for item in items} == {i: status for i, (status, _) in expected.items()}
+    assert orders == {i: order for i, (_, order) in expected.items() if order}
+    assert first["orders_created"] == len(orders) > 0
+    # Nothing left to do, and no second order for an item with one pending
+    assert (second["status_updates"], second["orders_created"]) == (0, 0)
+
+def test_stock_write_raises_an_order_without_a_scheduled_sweep(app):
+    # Red Bull: base threshold 15
+    async def scenario(client):
+        await client.put("/inventory/10", json={"current_stock": 2})
+        for _ in range(50):
+            await asyncio.sleep(0.02)
+            async with pool.read() as db:
+                order = await (await db.execute(
+                    "SELECT triggered_by FROM restock_orders WHERE item_id = 10 AND status = 'pending'"
+                )).fetchone()
+            if order:
+                break
+        [item] = [i for i in (await client.get("/inventory/")).json() if i["id"] == 10]
+        return order and order[0], item["status"]
+
+    assert app(scenario) == ("auto", "critical")
@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+from bench.startup import LAZY_MODULES
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imports main, starts and stops the app with no integrations configured
+# (conftest's environment), and reports which lazy modules got loaded
+PROBE = f"""
+import asyncio, json, sys
+import main
+from services import providers
+after_import = [m for m in {LAZY_MODULES!r} if m in sys.modules]
+asyncio.run(main.startup())
+loaded = providers.loaded()
+after_startup = [m for m in ("twilio", "groq", "aiosmtplib") if m in sys.modules]
+asyncio.run(main.shutdown())
+print(json.dumps([after_import, loaded, after_startup]))
+"""
+
+def test_unconfigured_integrations_are_never_imported(tmp_path):
+    env = dict(os.environ, DB_PATH=str(tmp_path / "startup.db"))
+    result = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", PROBE], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    after_import, loaded, after_startup = json.loads(result.stdout.strip().splitlines()[-1])
+    assert after_import == []
+    assert loaded == []
+    assert after_startup == []
@@ -0,0 +1,73 @@
+from database import pool
+from routes import inventory
+
+async def _stock(client, item_id: int) -> int:
+    [item] = [i for i in (await client.get("/inventory/")).json() if i["id"] == item_id]
+    return item["current_stock"]
+
+def test_delta_below_zero_is_rejected(app):
+    # Mixed Nuts: 12 in stock
+    async def scenario(client):
+        r = await client.post("/inventory/bulk", json=[
+            {"item_id": 11, "delta": -10},
+            {"item_id": 11, "delta": -5},
+            {"item_id": 11, "current_stock": 4},
+        ])
+        return r.json(), await _stock(client, 11)
+
+    body, stock = app(scenario)
+    assert [r["result"] for r in body["results"]] == ["applied", "insufficient_stock", "applied"]
+    assert body["results"][1]["current_stock"] == 2
+    assert (body["applied"], body["rejected"]) == (2, 1)
+    assert stock == 4
+
+def test_ingest_rejects_consumption_past_zero(app):
+    async def scenario(client):
+        r = await client.post("/inventory/ingest", content=b'{"item_id": 13, "delta": -4}\n')
+        return r.json(), await _stock(client, 13)
+
+    body, stock = app(scenario)
+    assert (body["applied"], body["rejected"]) == (0, 1)
+    assert [(e["line"], e["result"]) for e in body["errors"]] == [(1, "insufficient_stock")]
+    assert stock == 3
+
+def test_ingest_reports_counts_and_only_the_first_errors(app, monkeypatch):
+    monkeypatch.setattr(inventory, "INGEST_BATCH", 3)
+    monkeypatch.setattr(inventory, "MAX_INGEST_ERRORS", 2)
+    lines = [b'{"item_id": 1, "delta": 1}', b"not json", b'{"item_id": 999999, "delta": 1}',
+             b'{"item_id": 2, "delta": 1}', b'{"item_id": 999998, "delta": 1}']
+
+    async def scenario(client):
+        return (await client.post("/inventory/ingest", content=b"\n".join(lines))).json()
+
+    body = app(scenario)
+    assert (body["applied"], body["rejected"]) == (2, 3)
+    assert [(e["line"], e["result"]) for e in body["errors"]] == [(2, "invalid"), (3, "not_found")]
+
+def test_negative_absolute_stock_is_a_422(app):
+    async def scenario(client):
+        return (await client.put("/inventory/1", json={"current_stock": -1})).status_code
+
+    assert app(scenario) == 422
+
+def test_only_pending_orders_can_be_fulfilled(app):
+    async def scenario(client):
+        await client.post("/orders/manual/1")
+        await client.post("/orders/manual/2")
+        async with pool.write() as db:
+            [cancelled, pending] = [r[0] for r in await db.execute_fetchall(
+                "SELECT id FROM restock_orders WHERE item_id IN (1, 2) ORDER BY item_id"
+            )]
+            await db.execute("UPDATE restock_orders SET status = 'cancelled' WHERE id = ?", (cancelled,))
+        before = await _stock(client, 1)
+        results = [
+            (await client.put(f"/orders/{cancelled}/fulfill")).status_code,
+            (await client.put(f"/orders/{pending}/fulfill")).status_code,
+            (await client.put(f"/orders/{pending}/fulfill")).status_code,
+            (await client.put("/orders/999999/fulfill")).status_code,
+        ]
+        return results, before, await _stock(client, 1)
+
+    results, before, after = app(scenario)
+    assert results == [400, 200, 400, 404]
+    assert after == before
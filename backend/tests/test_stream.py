@@ -0,0 +1,64 @@
+import asyncio
+import json
+from services import stream
+
+def _frame(raw: bytes) -> tuple:
+    fields = dict(line.split(": ", 1) for line in raw.decode().strip().split("\n"))
+    return fields["event"], json.loads(fields["data"])
+
+async def _first_frame(**kwargs) -> tuple:
+    frames = stream.subscribe(**kwargs)
+    try:
+        return _frame(await frames.__anext__())
+    finally:
+        await frames.aclose()
+
+async def _settled():
+    # Let the hub (and the reorder worker's follow-up events) catch up
+    for _ in range(5):
+        await asyncio.sleep(0.02)
+    return stream.last_seq
+
+def test_reconnect_resumes_from_last_event_id(app):
+    async def scenario(client):
+        await client.put("/inventory/1", json={"current_stock": 90})
+        seen = await _settled()
+        await client.put("/inventory/2", json={"current_stock": 50})
+        await _settled()
+        return (
+            await _first_frame(last_event_id=f"{stream._epoch}-{seen}"),
+            await _first_frame(last_event_id=f"0000-{seen}"),
+            await _first_frame(last_event_id="garbage"),
+        )
+
+    resumed, other_run, garbage = app(scenario)
+    assert resumed[0] == "diff"
+    assert [i["id"] for i in resumed[1]["items"]] == [2]
+    assert resumed[1]["items"][0]["current_stock"] == 50
+    assert other_run[0] == garbage[0] == "snapshot"
+
+def test_replay_only_covers_diffs_still_kept(monkeypatch):
+    history = [stream.Diff(seq, {}, {}) for seq in (11, 12, 13)]
+    monkeypatch.setattr(stream, "_history", history)
+    monkeypatch.setattr(stream, "_dropped_through", 10)
+    monkeypatch.setattr(stream, "last_seq", 13)
+    assert [d.seq for d in stream._resume_point(f"{stream._epoch}-11")] == [12, 13]
+    assert stream._resume_point(f"{stream._epoch}-13") == []
+    # Older than the history, or from the future
+    assert stream._resume_point(f"{stream._epoch}-9") is None
+    assert stream._resume_point(f"{stream._epoch}-14") is None
+
+def test_slow_client_gets_merged_diffs_then_a_resync(monkeypatch):
+    monkeypatch.setattr(stream, "CLIENT_QUEUE", 2)
+    monkeypatch.setattr(stream, "RESYNC_ROWS", 4)
+    client = stream.Client()
+    client.push(stream.Diff(1, {1: "a"}, {}))
+    client.push(stream.Diff(2, {2: "b"}, {}))
+    client.push(stream.Diff(3, {1: "c"}, {}))
+    [merged] = client.drain()
+    assert (merged.seq, merged.items, client.resync) == (3, {1: "c", 2: "b"}, False)
+
+    for seq in range(4, 9):
+        client.push(stream.Diff(seq, {seq: "x"}, {}))
+    assert client.resync
+    assert client.drain() == []
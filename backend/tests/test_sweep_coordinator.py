@@ -0,0 +1,62 @@
+import time
+from datetime import datetime, timezone
+from database import pool
+from services import analytics, inventory_cache, sweep_coordinator
+
+async def _set_lease(holder: str, expires_at: float):
+    async with pool.write() as db:
+        await db.execute(
+            "UPDATE scheduler_lease SET holder = ?, expires_at = ? WHERE name = ?",
+            (holder, expires_at, sweep_coordinator.LEASE_NAME),
+        )
+
+def test_live_lease_is_kept_and_expired_one_taken_over(app):
+    async def scenario(client):
+        leading = [sweep_coordinator.is_leader]
+        await _set_lease("other-host:1:abc", time.time() + 60)
+        leading.append(await sweep_coordinator.renew_lease())
+        skipped = await sweep_coordinator.run_sweep()
+        await _set_lease("other-host:1:abc", time.time() - 1)
+        leading.append(await sweep_coordinator.renew_lease())
+        leading.append(await sweep_coordinator.renew_lease())
+        return leading, skipped
+
+    leading, skipped = app(scenario)
+    assert leading == [True, False, True, True]
+    assert skipped == {"skipped": "not_leader"}
+
+def test_rollup_backfill_follows_leadership(app):
+    async def scenario(client):
+        await _set_lease("other-host:1:abc", time.time() + 60)
+        await sweep_coordinator.renew_lease()
+        follower = analytics._backfill_task
+        # A database whose history predates the rollups
+        async with pool.write() as db:
+            await db.execute("DELETE FROM rollup_backfills")
+        await _set_lease("other-host:1:abc", time.time() - 1)
+        await sweep_coordinator.renew_lease()
+        leader = analytics._backfill_task
+        await leader
+        return follower, leader
+
+    follower, leader = app(scenario)
+    assert follower is None
+    assert leader is not None
+
+def test_scheduled_sweep_only_evaluates_items_changed_since_the_last(app):
+    now = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+    async def scenario(client):
+        async with pool.write() as db:
+            await db.execute("UPDATE inventory_items SET last_updated = '2000-01-01 00:00:00'")
+        sweep_coordinator._forget()
+        reports = [await sweep_coordinator.run_sweep(now)]
+        await client.put("/inventory/5", json={"current_stock": 3})
+        reports.append(await sweep_coordinator.run_sweep(now))
+        # Losing track (e.g. after a failed run) sweeps everything again
+        sweep_coordinator._forget()
+        reports.append(await sweep_coordinator.run_sweep(now))
+        return [(r["scope"], r["evaluated"]) for r in reports], len(inventory_cache.items())
+
+    scopes, items = app(scenario)
+    assert scopes == [("full", items), ("incremental", 1), ("full", items)]
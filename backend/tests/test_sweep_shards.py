@@ -0,0 +1,56 @@
+import sqlite3
+from datetime import datetime, timezone
+from config import DB_PATH
+from database import pool
+from services import inventory_cache, sweep_shards
+from services.inventory_service import check_and_trigger_reorders
+
+NOW = datetime(2024, 5, 1, 7, 30, tzinfo=timezone.utc)
+
+def _outcome(path: str) -> tuple:
+    db = sqlite3.connect(path)
+    try:
+        items = db.execute("SELECT id, status FROM inventory_items ORDER BY id").fetchall()
+        orders = db.execute(
+            """SELECT item_id, quantity_ordered, is_peak_hour, location, status FROM restock_orders
+               ORDER BY item_id, id"""
+        ).fetchall()
+    finally:
+        db.close()
+    return items, orders
+
+def test_partitions_cover_every_location_once():
+    sizes = {"a": 5, "b": 4, "c": 3, "d": 1, "e": 1}
+    groups = sweep_shards.partition(sizes, 2)
+    assert sorted(loc for group in groups for loc in group) == sorted(sizes)
+    assert sorted(sum(sizes[loc] for loc in group) for group in groups) == [7, 7]
+    assert len(sweep_shards.partition(sizes, 10)) == len(sizes)
+
+def test_sharded_sweep_matches_single_process_sweep(app, tmp_path):
+    copy = str(tmp_path / "sharded.db")
+
+    async def scenario(client):
+        # Three lounges, with the demo items spread over them at 0-3x their threshold
+        async with pool.write() as db:
+            await db.execute(
+                """UPDATE inventory_items SET location = CASE id % 3 WHEN 0 THEN 'main' WHEN 1 THEN 'north' ELSE 'south' END,
+                                              current_stock = base_threshold * (id % 4)"""
+            )
+        await inventory_cache.load()
+        source, target = sqlite3.connect(DB_PATH), sqlite3.connect(copy)
+        try:
+            source.backup(target)
+        finally:
+            source.close()
+            target.close()
+
+        await check_and_trigger_reorders(now=NOW)
+        report = await sweep_shards.run(NOW, processes=2, db_path=copy)
+        return report
+
+    report = app(scenario)
+    assert [s.get("error") for s in report["shards"]] == [None, None]
+    single, sharded = _outcome(DB_PATH), _outcome(copy)
+    assert sharded == single
+    assert {status for _, status in single[0]} == {"critical", "low", "ok"}
+    assert {order[3] for order in single[1]} == {"main", "north", "south"}
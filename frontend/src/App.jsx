@@ -1,5 +1,5 @@
 import { useState, useEffect } from "react";
-import { getInventory, getOrders } from "./api/inventoryApi";
+import { getInventory, getOrders, openStream } from "./api/inventoryApi";
 
 import { Routes, Route, Navigate } from "react-router-dom";
 import { useAuth } from "./context/AuthContext";
@@ -15,6 +15,21 @@ import Signup from "./components/Signup";
 import { isPeakHour } from "./utils/statusHelper";
 import { motion } from "framer-motion";
 
+// Upsert changed rows by id; orders are newest first, so new ones go on top
+const mergeRows = (rows, changed, deleted = [], prepend = false) => {
+  const byId = new Map(changed.map((r) => [r.id, r]));
+  const gone = new Set(deleted);
+  const kept = rows
+    .filter((r) => !gone.has(r.id))
+    .map((r) => {
+      const next = byId.get(r.id);
+      byId.delete(r.id);
+      return next || r;
+    });
+  const added = [...byId.values()];
+  return prepend ? [...added.reverse(), ...kept] : [...kept, ...added];
+};
+
 const ProtectedRoute = ({ children }) => {
   const { user } = useAuth();
   if (!user) return <Navigate to="/login" replace />;
@@ -26,6 +41,8 @@ export default function App() {
   const [orders, setOrders] = useState([]);
   const [activeTab, setActiveTab] = useState("dashboard");
 
+  const { user, token, logout } = useAuth();
+
   const peak = isPeakHour();
 
   const fetchData = async () => {
@@ -42,12 +59,28 @@ export default function App() {
   };
 
   useEffect(() => {
-    fetchData();
-    const interval = setInterval(fetchData, 30000);
-    return () => clearInterval(interval);
-  }, []);
-
-  const { user, logout } = useAuth();
+    // Snapshot on connect, then only the changed rows; EventSource
+    // reconnects on its own and resumes from the last event it saw, but
+    // not after a 401, so only connect once signed in and reconnect when
+    // the token changes
+    if (!user || !token) return;
+    const stream = openStream(token);
+    stream.addEventListener("snapshot", (e) => {
+      const snapshot = JSON.parse(e.data);
+      setInventory(snapshot.items);
+      setOrders(snapshot.orders);
+    });
+    stream.addEventListener("diff", (e) => {
+      const diff = JSON.parse(e.data);
+      if (diff.items.length || diff.deleted_items.length) {
+        setInventory((rows) => mergeRows(rows, diff.items, diff.deleted_items));
+      }
+      if (diff.orders.length) {
+        setOrders((rows) => mergeRows(rows, diff.orders, [], true));
+      }
+    });
+    return () => stream.close();
+  }, [user, token]);
 
   return (
     <Routes>
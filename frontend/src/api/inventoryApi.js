@@ -1,6 +1,13 @@
 import axios from "axios";
 const BASE = import.meta.env.VITE_API_URL || "http://localhost:8000";
 
+// Inventory and order routes need the token from login
+axios.interceptors.request.use((config) => {
+  const token = localStorage.getItem("token");
+  if (token) config.headers.Authorization = `Bearer ${token}`;
+  return config;
+});
+
 export const getInventory = () => axios.get(`${BASE}/inventory/`);
 export const getOrders = () => axios.get(`${BASE}/orders/`);
 export const updateStock = (id, stock) => axios.put(`${BASE}/inventory/${id}`, { current_stock: stock });
@@ -8,3 +15,8 @@ export const manualOrder = (id) => axios.post(`${BASE}/orders/manual/${id}`);
 export const fulfillOrder = (id) => axios.put(`${BASE}/orders/${id}/fulfill`);
 export const addItem = (item) => axios.post(`${BASE}/inventory/`, item);
 export const deleteItem = (id) => axios.delete(`${BASE}/inventory/${id}`);
+// Totals from the usage rollups; the order list only holds the newest page
+export const getUsageSummary = (params) => axios.get(`${BASE}/analytics/summary`, { params });
+// EventSource can't set headers, so the stream takes the token as a query parameter
+export const openStream = (token) =>
+  new EventSource(`${BASE}/stream?access_token=${encodeURIComponent(token)}`);
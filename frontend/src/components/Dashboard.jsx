@@ -1,13 +1,26 @@
+import { useEffect, useState } from "react";
 import { motion } from "framer-motion";
+import { getUsageSummary } from "../api/inventoryApi";
 
 export default function Dashboard({ inventory = [], orders = [] }) {
   const low = inventory.filter(i => i.status === "low").length;
   const critical = inventory.filter(i => i.status === "critical").length;
 
   const today = new Date().toDateString();
-  const ordersToday = orders.filter(
-    o => new Date(o.triggered_at).toDateString() === today
-  ).length;
+  const [usage, setUsage] = useState({ today: null, allTime: null });
+
+  // Refetch when an order is raised or fulfilled
+  const latestOrder = orders[0] ? `${orders[0].id}:${orders[0].status}` : "";
+  useEffect(() => {
+    const midnight = new Date();
+    midnight.setHours(0, 0, 0, 0);
+    Promise.all([
+      getUsageSummary({ since: midnight.toISOString() }),
+      getUsageSummary({ since: "1970-01-01" }),
+    ])
+      .then(([day, all]) => setUsage({ today: day.data.totals, allTime: all.data.totals }))
+      .catch((err) => console.error("Usage summary failed:", err));
+  }, [latestOrder]);
 
   const glass =
     "backdrop-blur-xl bg-white/25 border border-white/30";
@@ -39,7 +52,7 @@ export default function Dashboard({ inventory = [], orders = [] }) {
           { label: "Total Items", value: inventory.length },
           { label: "Low Stock", value: low },
           { label: "Critical", value: critical },
-          { label: "Orders Today", value: ordersToday }
+          { label: "Orders Today", value: usage.today?.orders_raised ?? "–" }
         ].map((item, index) => (
           <motion.div
             key={item.label}
@@ -68,7 +81,7 @@ export default function Dashboard({ inventory = [], orders = [] }) {
           {[
             { label: "Healthy Items", value: inventory.length - low - critical },
             { label: "Reorder Required", value: low + critical },
-            { label: "Total Orders", value: orders.length }
+            { label: "Total Orders", value: usage.allTime?.orders_raised ?? "–" }
           ].map((item, index) => (
             <motion.div
               key={item.label}